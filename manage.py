@@ -22,6 +22,7 @@ from flask.ext.migrate import Migrate, MigrateCommand
 from security_monkey.scheduler import run_change_reporter as sm_run_change_reporter
 from security_monkey.scheduler import find_changes as sm_find_changes
 from security_monkey.scheduler import audit_changes as sm_audit_changes
+from security_monkey.scheduler import refresh_items as sm_refresh_items
 from security_monkey.backup import backup_config_to_json as sm_backup_config_to_json
 
 manager = Manager(app)
@@ -56,6 +57,18 @@ def audit_changes(accounts, monitors, send_report):
     sm_audit_changes(accounts, monitors, send_report)
 
 
+@manager.option('-m', '--monitor', dest='monitor', type=unicode, required=True)
+@manager.option('-a', '--account', dest='account', type=unicode, required=True)
+@manager.option('-r', '--region', dest='region', type=unicode, required=True)
+@manager.option('-n', '--name', dest='names', type=unicode, action='append', required=True,
+                help='Item name.  Repeat to refresh several items in the same account and region.')
+def refresh_items(monitor, account, region, names):
+    """ Re-checks only the given items """
+    changes = sm_refresh_items(monitor, [(account, region, name) for name in names])
+    print "{} created, {} changed, {} deleted".format(len(changes.created), len(changes.changed), len(changes.deleted))
+    db.session.close()
+
+
 @manager.option('-a', '--accounts', dest='accounts', type=unicode, default=u'all')
 @manager.option('-m', '--monitors', dest='monitors', type=unicode, default=u'all')
 @manager.option('-o', '--outputfolder', dest='outputfolder', type=unicode, default=u'backups')
@@ -71,6 +84,28 @@ def start_scheduler():
     scheduler.setup_scheduler()
     scheduler.scheduler.start()
 
+@manager.command
+def repair_latest_revisions():
+    """ Points every item at its newest revision """
+    from security_monkey.datastore import Datastore
+    print "Repaired {} items".format(Datastore().repair_latest_revisions())
+    db.session.close()
+
+@manager.option('-t', '--technology', dest='tech', type=unicode, default=None)
+@manager.option('-a', '--account', dest='account', type=unicode, default=None)
+@manager.option('-e', '--expand', dest='expand', action='store_true', default=False)
+def compact_revisions(tech, account, expand):
+    """ Rewrites revision history as snapshots and deltas, or back to full configs with --expand """
+    from security_monkey.datastore import Datastore
+    print "Rewrote {} revisions".format(Datastore().compact_revisions(tech=tech, account=account, expand=expand))
+    db.session.close()
+
+@manager.command
+def run_event_worker():
+    """ Refreshes items as change events arrive on the EVENT_QUEUE_BACKEND queue """
+    from security_monkey.event_worker import run_event_worker as sm_run_event_worker
+    sm_run_event_worker()
+
 @manager.command
 def sync_jira():
     from security_monkey import jirasync
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+
+"""
+Compares sub_dict(), and the sorted JSON of sub_dict() that config hashes
+used to be computed from, with canonical_bytes() on configs shaped like the ones
+the security group, IAM role and S3 watchers store.
+
+Run from the repository root with SECURITY_MONKEY_SETTINGS set:
+    python scripts/benchmark_canonical.py [iterations]
+"""
+
+import json
+import sys
+import timeit
+
+from security_monkey.common.utils.utils import sub_dict
+from security_monkey.common.utils.canonical import canonical_bytes
+
+
+def security_group(n_rules=40, n_assigned=500):
+    return {
+        "id": "sg-12345678",
+        "name": "webserver",
+        "description": "web tier",
+        "vpc_id": "vpc-12345678",
+        "owner_id": "000000000000",
+        "rules": [{
+            "ip_protocol": "tcp",
+            "from_port": 1000 + i,
+            "to_port": 1000 + i,
+            "cidr_ip": "10.0.{}.0/24".format(i % 255),
+            "owner_id": None,
+            "name": None,
+            "rule_type": "ingress" if i % 2 else "egress"
+        } for i in range(n_rules)],
+        "assigned_to": [{
+            "instance_id": "i-{:08x}".format(i),
+            "name": "instance {}".format(i),
+            "tags": {"Name": "instance {}".format(i), "stack": "prod"}
+        } for i in range(n_assigned)]
+    }
+
+
+def iam_role(n_policies=10, n_statements=15):
+    statement = lambda i: {
+        "Effect": "Allow",
+        "Action": ["s3:GetObject", "s3:PutObject", "sqs:SendMessage", "sns:Publish"],
+        "Resource": ["arn:aws:s3:::bucket-{}/*".format(i), "arn:aws:sqs:us-east-1:000000000000:queue-{}".format(i)]
+    }
+    return {
+        "role": {
+            "arn": "arn:aws:iam::000000000000:role/app",
+            "role_name": "app",
+            "create_date": "2015-01-01T00:00:00Z",
+            "path": "/",
+            "role_id": "AROAEXAMPLE"
+        },
+        "assume_role_policy_document": {"Version": "2012-10-17", "Statement": [statement(0)]},
+        "rolepolicies": {"policy{}".format(p): {"Version": "2012-10-17", "Statement": [statement(s) for s in range(n_statements)]}
+                         for p in range(n_policies)},
+        "instance_profiles": [{"arn": "arn:aws:iam::000000000000:instance-profile/app", "instance_profile_name": "app"}],
+        "managed_policies": [{"name": "ReadOnly", "arn": "arn:aws:iam::aws:policy/ReadOnlyAccess", "version": "v3"}]
+    }
+
+
+def s3_bucket(n_grants=20, n_rules=10):
+    return {
+        "grants": {"user{}".format(i): ["READ", "WRITE"] for i in range(n_grants)},
+        "owner": {"ID": "0123456789abcdef"},
+        "LifecycleRules": [{"id": "rule{}".format(i), "prefix": "logs/{}".format(i), "status": "Enabled",
+                            "expiration": {"days": 30}} for i in range(n_rules)],
+        "policy": json.loads(json.dumps(iam_role(1, 20)["rolepolicies"]["policy0"])),
+        "region": "us-east-1",
+        "versioning": {"Versioning": "Enabled"}
+    }
+
+
+def main(iterations):
+    configs = [("security group", security_group()), ("iam role", iam_role()), ("s3 bucket", s3_bucket())]
+    print "{:<16}{:>14}{:>20}{:>14}".format("shape", "sub_dict ms", "json(sub_dict) ms", "canonical ms")
+    for name, config in configs:
+        old = timeit.timeit(lambda: sub_dict(config), number=iterations) * 1000 / iterations
+        old_json = timeit.timeit(lambda: json.dumps(sub_dict(config), sort_keys=True), number=iterations) * 1000 / iterations
+        new = timeit.timeit(lambda: canonical_bytes(config), number=iterations) * 1000 / iterations
+        print "{:<16}{:>14.3f}{:>20.3f}{:>14.3f}".format(name, old, old_json, new)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
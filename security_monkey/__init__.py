@@ -124,8 +124,10 @@ api.add_resource(IgnorelistListPost, '/api/1/ignorelistentries')
 
 from security_monkey.views.item import ItemList
 from security_monkey.views.item import ItemGet
+from security_monkey.views.item import ItemRefresh
 api.add_resource(ItemList, '/api/1/items')
 api.add_resource(ItemGet, '/api/1/items/<int:item_id>')
+api.add_resource(ItemRefresh, '/api/1/items/<int:item_id>/refresh')
 
 from security_monkey.views.item_comment import ItemCommentPost
 from security_monkey.views.item_comment import ItemCommentDelete
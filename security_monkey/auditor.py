@@ -28,6 +28,7 @@ from security_monkey.watcher import ChangeItem
 from security_monkey.common.jinja import get_jinja_env
 from security_monkey.datastore import User, AuditorSettings, Item, ItemAudit, Technology, Account
 from security_monkey.common.utils.utils import send_email
+from security_monkey.common.account_registry import registry
 
 from sqlalchemy import and_
 
@@ -127,17 +128,16 @@ class Auditor(object):
         """
         prev_list = []
         for account in self.accounts:
-            prev = self.datastore.get_all_ctype_filtered(tech=self.index, account=account, include_inactive=False)
-            # Returns a map of {Item: ItemRevision}
-            for item in prev:
-                item_revision = prev[item]
+            previous_items = self.datastore.get_latest_revisions(self.index, account, include_config=True,
+                                                                 include_db_item=True)
+            for previous in previous_items:
                 new_item = ChangeItem(index=self.index,
-                                      region=item.region,
-                                      account=item.account.name,
-                                      name=item.name,
-                                      new_config=item_revision.config)
+                                      region=previous.region,
+                                      account=previous.account,
+                                      name=previous.name,
+                                      new_config=previous.config)
                 new_item.audit_issues = []
-                new_item.db_item = item
+                new_item.db_item = previous.db_item
                 prev_list.append(new_item)
         return prev_list
 
@@ -292,7 +292,7 @@ class Auditor(object):
         return auditor_setting
 
     def _check_cross_account(self, src_account_number, dest_item, location):
-        account = Account.query.filter(Account.number == src_account_number).first()
+        account = registry.account_by_number(src_account_number)
         account_name = None
         if account is not None:
             account_name = account.name
@@ -22,7 +22,8 @@
 
 from security_monkey.auditor import Auditor
 from security_monkey.watchers.ec2 import EC2
-from security_monkey.datastore import Item, Technology
+from security_monkey.datastore import Item
+from security_monkey.common.account_registry import registry
 from security_monkey import app
 
 import yaml
@@ -42,8 +43,7 @@ class EC2Auditor(Auditor):
         """
         Finds the names of all tracked users and saves them for validating creator tags.
         """
-        iamuser = Technology.query.filter(Technology.name == 'iamuser').first()
-        query = Item.query.filter(Item.tech_id == iamuser.id)
+        query = Item.query.filter(Item.tech_id == registry.technology_id('iamuser'))
         self.users = [user.name for user in query.all()]
         self.users.append('mrjob-emr') # TODO INFRA-3453
 
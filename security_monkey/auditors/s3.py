@@ -22,7 +22,7 @@
 
 from security_monkey.auditor import Auditor
 from security_monkey.watchers.s3 import S3
-from security_monkey.datastore import Account
+from security_monkey.common.account_registry import registry
 
 import re
 
@@ -36,7 +36,7 @@ class S3Auditor(Auditor):
         super(S3Auditor, self).__init__(accounts=accounts, debug=debug)
 
     def check_acl(self, s3_item):
-        accounts = Account.query.all()
+        accounts = registry.accounts()
         S3_ACCOUNT_NAMES = [account.s3_name for account in accounts if account.third_party == False]
         S3_THIRD_PARTY_ACCOUNTS = [account.s3_name for account in accounts if account.third_party == True]
 
@@ -128,7 +128,7 @@ class S3Auditor(Auditor):
             print "This is an odd arn: {}".format(arn)
             return
 
-        account = Account.query.filter(Account.number==m.group(1)).first()
+        account = registry.account_by_number(m.group(1))
         if account:
             # Friendly Account.
             if not account.third_party:
@@ -24,7 +24,7 @@ from security_monkey.auditor import Auditor
 from security_monkey.watchers.sns import SNS
 from security_monkey.exceptions import InvalidARN
 from security_monkey.exceptions import InvalidSourceOwner
-from security_monkey.datastore import Account
+from security_monkey.common.account_registry import registry
 
 import re
 
@@ -92,7 +92,7 @@ class SNSAuditor(Auditor):
                 self._check_account(account_number, snsitem, 'policy')
 
     def _check_account(self, account_number, snsitem, source):
-        account = Account.query.filter(Account.number == account_number).first()
+        account = registry.account_by_number(account_number)
         account_name = None
         if account is not None:
             account_name = account.name
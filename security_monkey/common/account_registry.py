@@ -0,0 +1,118 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.account_registry
+    :platform: Unix
+    :synopsis: Process-wide snapshot of the account and technology tables,
+    so watchers and auditors can look them up without querying.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+from collections import namedtuple
+import threading
+import time
+
+# Detached copy of an Account row, safe to share between threads and sessions.
+AccountInfo = namedtuple('AccountInfo', ['id', 'name', 'number', 's3_name', 'role_name',
+                                         'third_party', 'active', 'notes'])
+
+
+class _Snapshot(object):
+
+    def __init__(self, accounts, technologies):
+        self.accounts = accounts
+        self.by_id = {account.id: account for account in accounts}
+        self.by_name = {account.name: account for account in accounts}
+        self.by_number = {}
+        self.by_s3_name = {}
+        for account in accounts:
+            if account.number:
+                self.by_number.setdefault(account.number, account)
+            if account.s3_name:
+                self.by_s3_name.setdefault(account.s3_name, account)
+        self.technologies = technologies
+
+
+class AccountRegistry(object):
+    """
+    Loads every account and technology in two queries and serves lookups from
+    memory.  The snapshot is reloaded after REGISTRY_CACHE_TTL seconds, or as
+    soon as the account API or add_account of this process changes an account.
+
+    Names are only looked up for accounts and technologies that exist, so a
+    miss reloads the snapshot once.  Numbers come from policies, which mostly
+    name unknown accounts, so a miss by number does not.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0
+
+    def accounts(self):
+        """
+        :returns: list of AccountInfo for every account, third party and inactive ones included.
+        """
+        return list(self._get().accounts)
+
+    def account_by_id(self, account_id):
+        return self._get().by_id.get(account_id)
+
+    def account_by_name(self, name):
+        account = self._get().by_name.get(name)
+        if account is None:
+            account = self._get(reload=True).by_name.get(name)
+        return account
+
+    def account_by_number(self, number):
+        return self._get().by_number.get(number)
+
+    def account_by_s3_name(self, s3_name):
+        return self._get().by_s3_name.get(s3_name)
+
+    def technology_id(self, name):
+        """
+        :returns: the id of the technology, or None if it is not in the database yet.
+        """
+        technology_id = self._get().technologies.get(name)
+        if technology_id is None:
+            technology_id = self._get(reload=True).technologies.get(name)
+        return technology_id
+
+    def invalidate(self):
+        with self._lock:
+            self._snapshot = None
+
+    def _get(self, reload=False):
+        with self._lock:
+            if reload or self._snapshot is None or \
+                    time.time() - self._loaded_at > app.config.get('REGISTRY_CACHE_TTL', 300):
+                self._snapshot = self._load()
+                self._loaded_at = time.time()
+            return self._snapshot
+
+    def _load(self):
+        from security_monkey.datastore import Account, Technology
+        from security_monkey import db
+        accounts = [AccountInfo(*row) for row in db.session.query(
+            Account.id, Account.name, Account.number, Account.s3_name, Account.role_name,
+            Account.third_party, Account.active, Account.notes).order_by(Account.id)]
+        technologies = dict(db.session.query(Technology.name, Technology.id))
+        return _Snapshot(accounts, technologies)
+
+
+registry = AccountRegistry()
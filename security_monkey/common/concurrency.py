@@ -0,0 +1,193 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.concurrency
+    :platform: Unix
+    :synopsis: Small helpers for running work on a bounded number of threads,
+    and for pipelining stages through bounded queues.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import db
+
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+import Queue
+import sys
+import threading
+import time
+
+
+def _in_worker(func):
+    def run(args):
+        try:
+            return func(args)
+        finally:
+            # Flask-SQLAlchemy scopes sessions per thread.  Hand the worker's
+            # connection back to the pool before the thread is reused.
+            db.session.remove()
+    return run
+
+
+def map_in_threads(func, args_list, workers):
+    """
+    Calls func once for every element of args_list, using at most `workers` threads.
+    With a single worker, everything runs serially in the calling thread.
+
+    :returns: list of results, in the same order as args_list.
+    """
+    args_list = list(args_list)
+    if workers <= 1 or len(args_list) <= 1:
+        return [func(args) for args in args_list]
+
+    pool = ThreadPool(min(workers, len(args_list)))
+    try:
+        return pool.map(_in_worker(func), args_list)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def imap_in_threads(func, args_list, workers):
+    """
+    Lazy version of map_in_threads.  Yields each result, in the same order as
+    args_list, as soon as it and every result before it are ready.
+    """
+    args_list = list(args_list)
+    if workers <= 1 or len(args_list) <= 1:
+        for args in args_list:
+            yield func(args)
+        return
+
+    pool = ThreadPool(min(workers, len(args_list)))
+    try:
+        for result in pool.imap(_in_worker(func), args_list):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def prefetch(iterable, size):
+    """
+    Iterates over iterable in a background thread that works at most `size`
+    items ahead of the consumer.  Exceptions raised while iterating are
+    re-raised in the consumer.
+    """
+    queue = Queue.Queue(maxsize=size)
+    stop = threading.Event()
+
+    def put(entry):
+        # Gives up once the consumer has gone away.
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(('item', item)):
+                    return
+            put(('done', None))
+        except Exception:
+            put(('error', sys.exc_info()))
+        finally:
+            db.session.remove()
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            kind, value = queue.get()
+            if kind == 'done':
+                return
+            if kind == 'error':
+                raise value[0], value[1], value[2]
+            yield value
+    finally:
+        stop.set()
+
+
+class StageTimer(object):
+    """
+    Adds up the wall-clock time spent in each stage of a pipeline.
+    Safe to use from every thread of the pipeline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = []
+        self.totals = {}
+
+    def add(self, name, seconds):
+        with self._lock:
+            if name not in self.totals:
+                self.stages.append(name)
+                self.totals[name] = 0.0
+            self.totals[name] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, time.time() - start)
+
+    def iterate(self, name, iterable):
+        """
+        Yields from iterable, charging the time spent producing each item to `name`.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.time()
+            try:
+                item = next(iterator)
+            finally:
+                self.add(name, time.time() - start)
+            yield item
+
+    def pipe(self, name, stage, source):
+        """
+        Yields from stage(source), charging the time spent in stage to `name`,
+        but not the time it spends waiting on source or on its own consumer.
+        """
+        clock = {'start': time.time()}
+
+        def timed_source():
+            iterator = iter(source)
+            while True:
+                self.add(name, time.time() - clock['start'])
+                try:
+                    item = next(iterator)
+                finally:
+                    clock['start'] = time.time()
+                yield item
+
+        for result in stage(timed_source()):
+            self.add(name, time.time() - clock['start'])
+            yield result
+            clock['start'] = time.time()
+        self.add(name, time.time() - clock['start'])
+
+    def summary(self):
+        with self._lock:
+            return ', '.join(['{} {:0.1f} s'.format(name, self.totals[name]) for name in self.stages])
@@ -0,0 +1,161 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.connection_registry
+    :platform: Unix
+    :synopsis: Hands out boto connections that are shared by every watcher
+    working on the same account during a run.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+from contextlib import contextmanager
+import threading
+import time
+
+
+class ConnectionRegistry(object):
+    """
+    Caches the objects returned by sts_connect.connect, keyed on
+    (account, connection_type, region).
+
+    boto connections keep a pool of HTTP connections, so handing the same
+    object to every watcher lets them reuse keep-alive sessions instead of
+    opening a new TLS connection for each watcher.  Connections are replaced,
+    and the old one closed, after CONNECTION_MAX_AGE seconds so they never
+    outlive their STS credentials.
+
+    Runs hold the accounts they work on.  close(account) waits until the
+    last holder of the account releases it, so a run ending does not close
+    connections another job is still using for the same account.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._key_locks = {}
+        self._holders = {}
+        self._pending_close = set()
+
+    def connect(self, account, connection_type, **args):
+        """
+        Same signature as sts_connect.connect.  Any extra arguments are only
+        used the first time a connection is created for a given key.
+        """
+        region = args.get('region')
+        key = (account, connection_type, getattr(region, 'name', region))
+
+        conn = self._get(key)
+        if conn is not None:
+            return conn
+
+        with self._lock_for(key):
+            conn = self._get(key)
+            if conn is not None:
+                return conn
+
+            with self._lock:
+                expired = self._connections.pop(key, None)
+            if expired is not None:
+                _close_connection(expired[0])
+
+            # Looked up at call time so tests can patch sts_connect.connect.
+            from security_monkey.common import sts_connect
+            conn = sts_connect.connect(account, connection_type, **args)
+            if conn is not None:
+                with self._lock:
+                    self._connections[key] = (conn, time.time())
+            return conn
+
+    def acquire(self, account):
+        with self._lock:
+            self._holders[account] = self._holders.get(account, 0) + 1
+
+    def release(self, account):
+        """
+        Drops a hold taken with acquire, and runs a close() of the account
+        that was put off while it was held.
+        """
+        with self._lock:
+            holders = self._holders.get(account, 0) - 1
+            if holders > 0:
+                self._holders[account] = holders
+                return
+            self._holders.pop(account, None)
+            if account not in self._pending_close:
+                return
+        self.close(account)
+
+    @contextmanager
+    def hold(self, account):
+        self.acquire(account)
+        try:
+            yield
+        finally:
+            self.release(account)
+
+    def close(self, account=None):
+        """
+        Drops (and closes) every connection for the given account, or every
+        connection in the registry if no account is given.  While the account
+        is held, the close is put off until its last holder releases it.
+        """
+        with self._lock:
+            if account is not None and self._holders.get(account):
+                self._pending_close.add(account)
+                return
+            if account is None:
+                self._pending_close.clear()
+            else:
+                self._pending_close.discard(account)
+            keys = [key for key in self._connections if account is None or key[0] == account]
+            entries = [self._connections.pop(key) for key in keys]
+
+        for conn, _ in entries:
+            _close_connection(conn)
+
+    def _get(self, key):
+        entry = self._connections.get(key)
+        if not entry:
+            return None
+        if time.time() - entry[1] > app.config.get('CONNECTION_MAX_AGE', 1800):
+            return None
+        return entry[0]
+
+    def _lock_for(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+
+def _close_connection(conn):
+    close = getattr(conn, 'close', None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception as e:
+        app.logger.debug("Could not close connection {}: {}".format(conn, e))
+
+
+connection_registry = ConnectionRegistry()
+
+
+def connect(account, connection_type, **args):
+    """
+    Returns the shared connection for the given account, connection_type and region.
+    See sts_connect.connect for the supported connection types.
+    """
+    return connection_registry.connect(account, connection_type, **args)
@@ -0,0 +1,153 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.event_queue
+    :platform: Unix
+    :synopsis: Queues of AWS change events for the event worker.  SQS in production,
+    a SQLite file for development and tests.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+from collections import namedtuple
+import sqlite3
+import threading
+import time
+
+# body is the raw message text; handle is whatever the backend needs to delete it.
+QueuedEvent = namedtuple('QueuedEvent', ['body', 'handle'])
+
+
+class EventQueue(object):
+    """
+    Messages received and not deleted within visibility_timeout seconds
+    are handed out again, so an event is only dropped once it was handled.
+    """
+
+    def receive(self, max_events=10, wait_time=20):
+        """
+        Waits up to wait_time seconds for events.
+        :returns: list of QueuedEvent, possibly empty.
+        """
+        raise NotImplementedError()
+
+    def delete(self, event):
+        raise NotImplementedError()
+
+    def send(self, body):
+        raise NotImplementedError()
+
+
+class SQSEventQueue(EventQueue):
+    """
+    An SQS queue, usually subscribed to the SNS topic that CloudWatch Events
+    or AWS Config publish to.
+    """
+
+    def __init__(self, queue_name, region='us-east-1', owner_account_id=None, visibility_timeout=300):
+        import boto.sqs
+        from boto.sqs.message import RawMessage
+        conn = boto.sqs.connect_to_region(region)
+        self.queue = conn.get_queue(queue_name, owner_acct_id=owner_account_id)
+        if self.queue is None:
+            raise ValueError("SQS queue {} does not exist in {}".format(queue_name, region))
+        # The default message class expects base64 bodies.
+        self.queue.set_message_class(RawMessage)
+        self.visibility_timeout = visibility_timeout
+
+    def receive(self, max_events=10, wait_time=20):
+        messages = self.queue.get_messages(num_messages=min(max_events, 10),
+                                           visibility_timeout=self.visibility_timeout,
+                                           wait_time_seconds=wait_time)
+        return [QueuedEvent(message.get_body(), message) for message in messages]
+
+    def delete(self, event):
+        self.queue.delete_message(event.handle)
+
+    def send(self, body):
+        from boto.sqs.message import RawMessage
+        message = RawMessage()
+        message.set_body(body)
+        self.queue.write(message)
+
+
+class SQLiteEventQueue(EventQueue):
+    """
+    A queue in a local SQLite file.  Several processes may share the file.
+    """
+
+    POLL_INTERVAL = 1
+
+    def __init__(self, path, visibility_timeout=300):
+        self.visibility_timeout = visibility_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS events ("
+                           "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                           "body TEXT NOT NULL, "
+                           "visible_at REAL NOT NULL)")
+
+    def receive(self, max_events=10, wait_time=20):
+        deadline = time.time() + wait_time
+        while True:
+            events = self._claim(max_events)
+            if events or time.time() >= deadline:
+                return events
+            time.sleep(min(self.POLL_INTERVAL, max(deadline - time.time(), 0)))
+
+    def _claim(self, max_events):
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE keeps other processes from claiming the same rows.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT id, body FROM events WHERE visible_at <= ? ORDER BY id LIMIT ?",
+                                          (now, max_events)).fetchall()
+                for (event_id, body) in rows:
+                    self._conn.execute("UPDATE events SET visible_at = ? WHERE id = ?",
+                                       (now + self.visibility_timeout, event_id))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [QueuedEvent(body, event_id) for (event_id, body) in rows]
+
+    def delete(self, event):
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE id = ?", (event.handle,))
+
+    def send(self, body):
+        with self._lock:
+            self._conn.execute("INSERT INTO events (body, visible_at) VALUES (?, ?)", (body, time.time()))
+
+
+def get_event_queue():
+    """
+    :returns: the EventQueue selected by EVENT_QUEUE_BACKEND, or None if event mode is off.
+    """
+    backend = app.config.get('EVENT_QUEUE_BACKEND')
+    visibility_timeout = app.config.get('EVENT_QUEUE_VISIBILITY_TIMEOUT', 300)
+    if not backend:
+        return None
+    if backend == 'sqs':
+        return SQSEventQueue(app.config.get('EVENT_QUEUE_NAME'),
+                             region=app.config.get('EVENT_QUEUE_REGION', 'us-east-1'),
+                             owner_account_id=app.config.get('EVENT_QUEUE_OWNER'),
+                             visibility_timeout=visibility_timeout)
+    if backend == 'sqlite':
+        return SQLiteEventQueue(app.config.get('EVENT_QUEUE_PATH', 'security_monkey_events.db'),
+                                visibility_timeout=visibility_timeout)
+    raise ValueError("Unknown EVENT_QUEUE_BACKEND {}".format(backend))
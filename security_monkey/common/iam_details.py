@@ -0,0 +1,306 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.iam_details
+    :platform: Unix
+    :synopsis: Pulls a whole account's IAM configuration with GetAccountAuthorizationDetails,
+    or just its managed policy attachments, and indexes it for the IAM watchers.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+from security_monkey.common.rate_limiter import rate_limiter
+
+from boto.utils import pythonize_name
+
+import datetime
+import json
+import urllib
+
+
+def _paginate(account, method, result_keys, **args):
+    """
+    Follows Marker/IsTruncated through every page of a boto3 IAM call.
+    :returns: dict of {result_key: items from every page}
+    """
+    results = {result_key: [] for result_key in result_keys}
+    while True:
+        response = rate_limiter.call(account, method, **args)
+        for result_key in result_keys:
+            results[result_key].extend(response.get(result_key, []))
+        if response.get('IsTruncated'):
+            args['Marker'] = response['Marker']
+        else:
+            break
+    return results
+
+
+def fetch_authorization_details(account, region=None):
+    """
+    Pages through GetAccountAuthorizationDetails.
+    :returns: AuthorizationDetails for the account.
+    """
+    from security_monkey.common.connection_registry import connect
+    iam = connect(account, 'iam_boto3_client')
+
+    details = _paginate(
+        account,
+        iam.get_account_authorization_details,
+        ['UserDetailList', 'GroupDetailList', 'RoleDetailList', 'Policies'],
+        Filter=['User', 'Group', 'Role', 'LocalManagedPolicy', 'AWSManagedPolicy']
+    )
+    return AuthorizationDetails(details)
+
+
+def fetch_policy_attachments(account, region=None):
+    """
+    Builds the managed policy attachment graph with one list_entities_for_policy
+    pass over the policies that are attached to anything.
+    :returns: PolicyAttachmentIndex for the account.
+    """
+    from security_monkey.common.connection_registry import connect
+    iam = connect(account, 'iam_boto3_client')
+
+    # list_entities_for_policy only returns names, so map them to ARNs first.
+    arns = {}
+    for kind, method, result_key, name_key in [
+            ('users', iam.list_users, 'Users', 'UserName'),
+            ('groups', iam.list_groups, 'Groups', 'GroupName'),
+            ('roles', iam.list_roles, 'Roles', 'RoleName')]:
+        for principal in _paginate(account, method, [result_key])[result_key]:
+            arns[(kind, principal[name_key])] = principal['Arn']
+
+    policies = _paginate(account, iam.list_policies, ['Policies'], OnlyAttached=True)['Policies']
+    attachments = {}
+    for policy in policies:
+        if not policy.get('AttachmentCount'):
+            continue
+        entities = _paginate(account, iam.list_entities_for_policy,
+                             ['PolicyUsers', 'PolicyGroups', 'PolicyRoles'], PolicyArn=policy['Arn'])
+        attachments[policy['Arn']] = {}
+        for kind, result_key, name_key in [
+                ('users', 'PolicyUsers', 'UserName'),
+                ('groups', 'PolicyGroups', 'GroupName'),
+                ('roles', 'PolicyRoles', 'RoleName')]:
+            # Principals created since the listings above are picked up next cycle.
+            attachments[policy['Arn']][kind] = sorted([
+                arns[(kind, entity[name_key])] for entity in entities[result_key] if (kind, entity[name_key]) in arns
+            ])
+
+    return PolicyAttachmentIndex(policies, attachments)
+
+
+def get_authorization_details(account):
+    """
+    :returns: the account's AuthorizationDetails from this cycle's inventory,
+        or None if they cannot be fetched (e.g. the role is not allowed to call
+        iam:GetAccountAuthorizationDetails) and the caller must fetch everything per call.
+    """
+    from security_monkey.common.inventory import inventory
+    try:
+        return inventory.get(account, 'universal', 'iam_authorization_details')
+    except Exception as e:
+        app.logger.warn("Could not get IAM authorization details for {}, "
+                        "falling back to per-call fetching: {}".format(account, e))
+        return None
+
+
+def get_policy_attachments(account):
+    """
+    :returns: the account's PolicyAttachmentIndex from this cycle's inventory.
+    """
+    from security_monkey.common.inventory import inventory
+    return inventory.get(account, 'universal', 'iam_policy_attachments')
+
+
+def managed_policies_for(account, details, arn):
+    """
+    :returns: the managed policies attached to a user, group or role, read from
+        the authorization details if available, else from the attachment index.
+    """
+    managed_policies = details.managed_policies(arn) if details else None
+    if managed_policies is None:
+        managed_policies = get_policy_attachments(account).managed_policies(arn)
+    return managed_policies
+
+
+def policy_attachments_for(account, details, arn):
+    """
+    :returns: dict with the ARNs of the users, groups and roles a managed policy is attached to.
+    """
+    if details:
+        # Every attached policy is in the authorization details, so missing ones are unattached.
+        return details.policy_attachments(arn)
+    return get_policy_attachments(account).policy_attachments(arn)
+
+
+def policy_document(document):
+    """
+    Policy documents come back URL encoded from some API versions
+    and already decoded from others.
+    """
+    if isinstance(document, basestring):
+        return json.loads(urllib.unquote(document))
+    return document
+
+
+def boto_dict(detail, keys):
+    """
+    Converts a boto3 detail dict into the shape boto returns
+    for the same entity: snake_case keys and ISO 8601 timestamps.
+    """
+    converted = {}
+    for key in keys:
+        if key not in detail:
+            continue
+        value = detail[key]
+        if isinstance(value, datetime.datetime):
+            value = value.strftime('%Y-%m-%dT%H:%M:%SZ')
+        converted[pythonize_name(key)] = value
+    return converted
+
+
+INSTANCE_PROFILE_KEYS = ['Path', 'InstanceProfileName', 'InstanceProfileId', 'Arn', 'CreateDate']
+
+
+class AuthorizationDetails(object):
+    """
+    Indexes the output of GetAccountAuthorizationDetails by ARN.
+    Lookups return None for principals that are not in the snapshot,
+    in which case the watchers fetch that principal per call.
+
+    Access keys, MFA devices, login profiles, signing certificates
+    and password_last_used are not part of this dataset.
+    """
+
+    def __init__(self, details):
+        self.users = {user['Arn']: user for user in details['UserDetailList']}
+        self.groups = {group['Arn']: group for group in details['GroupDetailList']}
+        self.roles = {role['Arn']: role for role in details['RoleDetailList']}
+        self.policies = {policy['Arn']: policy for policy in details['Policies']}
+
+        self._group_members = {}
+        for user in details['UserDetailList']:
+            for group_name in user.get('GroupList', []):
+                self._group_members.setdefault(group_name, {})[user['Arn']] = user['UserName']
+
+        self._attachments = {}
+        for kind, principals in [('users', self.users), ('groups', self.groups), ('roles', self.roles)]:
+            for principal_arn in sorted(principals):
+                for attached in principals[principal_arn].get('AttachedManagedPolicies', []):
+                    attachments = self._attachments.setdefault(attached['PolicyArn'], {'users': [], 'groups': [], 'roles': []})
+                    attachments[kind].append(principal_arn)
+
+    def _principal(self, arn):
+        return self.users.get(arn) or self.groups.get(arn) or self.roles.get(arn)
+
+    def inline_policies(self, arn):
+        """
+        :returns: {policy_name: policy_document} for a user, group or role.
+        """
+        principal = self._principal(arn)
+        if principal is None:
+            return None
+        policies = principal.get('UserPolicyList') or principal.get('GroupPolicyList') or principal.get('RolePolicyList') or []
+        return {policy['PolicyName']: policy_document(policy['PolicyDocument']) for policy in policies}
+
+    def managed_policies(self, arn):
+        """
+        :returns: list of the managed policies attached to a user, group or role,
+            in the shape used by the IAM watchers' managed_policies config.
+        """
+        principal = self._principal(arn)
+        if principal is None:
+            return None
+        managed_policies = []
+        for attached in principal.get('AttachedManagedPolicies', []):
+            policy = self.policies.get(attached['PolicyArn'], {})
+            managed_policies.append({
+                "name": attached['PolicyName'],
+                "arn": attached['PolicyArn'],
+                "version": policy.get('DefaultVersionId')
+            })
+        return sorted(managed_policies, key=lambda policy: policy['arn'])
+
+    def group_members(self, arn):
+        """
+        :returns: {user_arn: user_name} for every member of the group.
+        """
+        group = self.groups.get(arn)
+        if group is None:
+            return None
+        return dict(self._group_members.get(group['GroupName'], {}))
+
+    def instance_profiles(self, arn):
+        """
+        :returns: list of instance profiles for the role, without their roles.
+        """
+        role = self.roles.get(arn)
+        if role is None:
+            return None
+        return [boto_dict(profile, INSTANCE_PROFILE_KEYS) for profile in role.get('InstanceProfileList', [])]
+
+    def assume_role_policy_document(self, arn):
+        role = self.roles.get(arn)
+        if role is None:
+            return None
+        return policy_document(role.get('AssumeRolePolicyDocument', ''))
+
+    def policy_attachments(self, arn):
+        """
+        :returns: dict with the ARNs of the users, groups and roles the managed policy is attached to.
+        """
+        attachments = self._attachments.get(arn, {'users': [], 'groups': [], 'roles': []})
+        return {kind: list(arns) for kind, arns in attachments.items()}
+
+    def default_policy_document(self, arn):
+        """
+        :returns: the document of the policy's default version, as returned by the API.
+        """
+        policy = self.policies.get(arn)
+        if policy is None:
+            return None
+        for version in policy.get('PolicyVersionList', []):
+            if version.get('IsDefaultVersion'):
+                return version['Document']
+        return None
+
+
+class PolicyAttachmentIndex(object):
+    """
+    Managed policy attachments for an account, indexed both by policy and by principal.
+    Policies that are not attached to anything have no entries.
+    """
+
+    def __init__(self, policies, attachments):
+        versions = {policy['Arn']: policy.get('DefaultVersionId') for policy in policies}
+        names = {policy['Arn']: policy['PolicyName'] for policy in policies}
+        self._attachments = attachments
+        self._managed_policies = {}
+        for policy_arn in sorted(attachments):
+            for kind in ['users', 'groups', 'roles']:
+                for principal_arn in attachments[policy_arn][kind]:
+                    self._managed_policies.setdefault(principal_arn, []).append({
+                        "name": names[policy_arn],
+                        "arn": policy_arn,
+                        "version": versions[policy_arn]
+                    })
+
+    def managed_policies(self, arn):
+        return list(self._managed_policies.get(arn, []))
+
+    def policy_attachments(self, arn):
+        attachments = self._attachments.get(arn, {'users': [], 'groups': [], 'roles': []})
+        return {kind: list(arns) for kind, arns in attachments.items()}
@@ -0,0 +1,98 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.ignore_matcher
+    :platform: Unix
+    :synopsis: Compiles the ignore list into one prefix trie per technology,
+    shared by every watcher in the process.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+import threading
+import time
+
+
+class PrefixTrie(object):
+    """
+    Case-insensitive prefix matching in O(len(name)), whatever the number of prefixes.
+    """
+
+    # Key marking the end of a prefix.  Never a single character, so it cannot clash.
+    _END = ''
+
+    def __init__(self, prefixes):
+        self._root = {}
+        for prefix in prefixes:
+            node = self._root
+            for char in prefix.lower():
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, prefix)
+
+    def match(self, name):
+        """
+        :returns: the shortest prefix that name starts with, or None.
+        """
+        node = self._root
+        if self._END in node:
+            return node[self._END]
+        for char in name.lower():
+            node = node.get(char)
+            if node is None:
+                return None
+            if self._END in node:
+                return node[self._END]
+        return None
+
+
+class IgnoreMatcher(object):
+    """
+    Holds a PrefixTrie per technology, built from a single read of the whole
+    ignore list.  The tries are rebuilt after IGNORE_LIST_CACHE_TTL seconds,
+    or as soon as the ignore list API of this process changes an entry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tries = None
+        self._loaded_at = 0
+
+    def trie(self, tech):
+        """
+        :returns: PrefixTrie of the ignore list entries for the technology.
+        """
+        with self._lock:
+            if self._tries is None or time.time() - self._loaded_at > app.config.get('IGNORE_LIST_CACHE_TTL', 300):
+                self._tries = self._load()
+                self._loaded_at = time.time()
+            return self._tries.get(tech) or PrefixTrie([])
+
+    def invalidate(self):
+        with self._lock:
+            self._tries = None
+
+    def _load(self):
+        from security_monkey.datastore import IgnoreListEntry, Technology
+        from security_monkey import db
+        prefixes = {}
+        query = db.session.query(Technology.name, IgnoreListEntry.prefix) \
+            .join((IgnoreListEntry, IgnoreListEntry.tech_id == Technology.id))
+        for tech, prefix in query:
+            prefixes.setdefault(tech, []).append(prefix)
+        return {tech: PrefixTrie(tech_prefixes) for tech, tech_prefixes in prefixes.items()}
+
+
+ignore_matcher = IgnoreMatcher()
@@ -0,0 +1,170 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.inventory
+    :platform: Unix
+    :synopsis: Per-cycle snapshot of AWS datasets that several watchers need.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+from security_monkey.common.rate_limiter import rate_limiter
+from security_monkey.common.iam_details import fetch_authorization_details
+from security_monkey.common.iam_details import fetch_policy_attachments
+
+import boto.ec2
+import boto.rds
+import threading
+import time
+
+
+def _connect(account, connection_type, **args):
+    # Looked up at call time so tests can patch sts_connect.connect.
+    from security_monkey.common.connection_registry import connect
+    return connect(account, connection_type, **args)
+
+
+def _ec2_region(region):
+    # Watchers for other services hand us their own RegionInfo, which points at their endpoint.
+    if region.endpoint and region.endpoint.startswith('ec2.'):
+        return region
+    return boto.ec2.get_region(region.name)
+
+
+def _rds_region(region):
+    # The security group watcher hands us its EC2 RegionInfo.
+    if region.endpoint and region.endpoint.startswith('rds.'):
+        return region
+    for rds_region in boto.rds.regions():
+        if rds_region.name == region.name:
+            return rds_region
+    raise Exception('The supplied region {0} is not in boto.rds.regions. {1}'.format(region.name, boto.rds.regions()))
+
+
+def fetch_instances(account, region):
+    ec2 = _connect(account, 'ec2', region=_ec2_region(region))
+    return rate_limiter.call(account, ec2.get_only_instances)
+
+
+def fetch_tags(account, region):
+    ec2 = _connect(account, 'ec2', region=_ec2_region(region))
+    return rate_limiter.call(account, ec2.get_all_tags)
+
+
+def fetch_rds_instances(account, region):
+    rds = _connect(account, 'rds', region=_rds_region(region))
+    return rate_limiter.call(account, rds.get_all_dbinstances)
+
+
+def fetch_load_balancers(account, region):
+    elb_conn = _connect(account, 'elb', region=region.name)
+    elbs = []
+    marker = None
+    while True:
+        response = rate_limiter.call(account, elb_conn.get_all_load_balancers, marker=marker)
+        elbs.extend(response)
+        if response.next_marker:
+            marker = response.next_marker
+        else:
+            break
+    return elbs
+
+
+def fetch_redshift_clusters(account, region):
+    redshift = _connect(account, 'redshift', region=region)
+    clusters = []
+    marker = None
+    while True:
+        response = rate_limiter.call(account, redshift.describe_clusters, marker=marker)
+        result = response['DescribeClustersResponse']['DescribeClustersResult']
+        clusters.extend(result['Clusters'])
+        if result['Marker'] is not None:
+            marker = result['Marker']
+        else:
+            break
+    return clusters
+
+
+DATASETS = {
+    'iam_authorization_details': fetch_authorization_details,
+    'iam_policy_attachments': fetch_policy_attachments,
+    'instances': fetch_instances,
+    'tags': fetch_tags,
+    'rds_instances': fetch_rds_instances,
+    'load_balancers': fetch_load_balancers,
+    'redshift_clusters': fetch_redshift_clusters,
+}
+
+
+class Inventory(object):
+    """
+    Snapshot of the datasets in DATASETS, keyed on (account, region, dataset).
+    Global datasets, such as IAM, use the 'universal' region.
+
+    The first watcher asking for a dataset fetches it, and every other watcher
+    in the same cycle reads it from memory.  The reporter invalidates an
+    account's snapshot once the account's run is over.  INVENTORY_MAX_AGE
+    is a safety net in case a run dies before invalidating.
+    Failed fetches are not cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._datasets = {}
+
+    def get(self, account, region, dataset):
+        """
+        :param region: boto RegionInfo for any service, or 'universal' for global datasets.
+            Only the region name is used as the key.
+        :returns: the dataset for the given account and region.
+        """
+        region_name = getattr(region, 'name', region)
+        key = (account, region_name, dataset)
+        value = self._get(key)
+        if value is not None:
+            return value
+
+        with self._lock_for(key):
+            value = self._get(key)
+            if value is not None:
+                return value
+
+            app.logger.debug("Fetching {} for {}/{}".format(dataset, account, region_name))
+            value = DATASETS[dataset](account, region)
+            with self._lock:
+                self._datasets[key] = (value, time.time())
+            return value
+
+    def invalidate(self, account=None):
+        """Drops the snapshot for the given account, or for every account."""
+        with self._lock:
+            for key in [key for key in self._datasets if account is None or key[0] == account]:
+                del self._datasets[key]
+
+    def _get(self, key):
+        entry = self._datasets.get(key)
+        if not entry:
+            return None
+        if time.time() - entry[1] > app.config.get('INVENTORY_MAX_AGE', 600):
+            return None
+        return entry[0]
+
+    def _lock_for(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+
+inventory = Inventory()
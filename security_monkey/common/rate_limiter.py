@@ -0,0 +1,206 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.rate_limiter
+    :platform: Unix
+    :synopsis: Token buckets shared by every watcher calling the same AWS endpoint.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+from boto.exception import BotoServerError
+try:
+    from botocore.exceptions import ClientError
+except ImportError:
+    ClientError = None
+
+import random
+import threading
+import time
+
+
+THROTTLING_ERROR_CODES = [
+    'Throttling',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'SlowDown',
+]
+
+
+def is_throttling_error(e):
+    """
+    Recognizes throttling in boto errors as well as in botocore ClientErrors,
+    raised by the boto3 calls sent through the limiter.
+    """
+    if isinstance(e, BotoServerError):
+        return e.error_code in THROTTLING_ERROR_CODES
+    if ClientError is not None and isinstance(e, ClientError):
+        return e.response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+    return False
+
+
+def endpoint_for(awsfunc):
+    """
+    Returns the host a boto call will be sent to, e.g. ec2.us-east-1.amazonaws.com.
+    The host encodes both the service and the region.  Works for methods on
+    connections as well as on objects holding a connection (buckets, queues, ...).
+    """
+    owner = getattr(awsfunc, '__self__', None)
+    host = getattr(owner, 'host', None)
+    if host is None:
+        host = getattr(getattr(owner, 'connection', None), 'host', None)
+    if host is None:
+        # boto3 clients
+        host = getattr(getattr(owner, '_endpoint', None), 'host', None)
+    return host
+
+
+class TokenBucket(object):
+    """
+    Token bucket whose fill rate adapts to AWS throttling: it grows by
+    AWS_RATE_INCREASE calls/second after every success and halves after
+    every throttle (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, rate, min_rate, max_rate, increase):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.tokens = max_rate
+        self.last_fill = time.time()
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def acquire(self):
+        """Takes a token, sleeping until one is available."""
+        with self.lock:
+            now = time.time()
+            self.tokens = min(self.max_rate, self.tokens + (now - self.last_fill) * self.rate)
+            self.last_fill = now
+            # Taking the token before sleeping reserves our slot for concurrent callers.
+            self.tokens -= 1
+            self.calls += 1
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens / self.rate
+                wait = wait + random.uniform(0, wait / 2)
+                self.waits += 1
+                self.wait_time += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttled(self):
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'rate': self.rate,
+                'calls': self.calls,
+                'throttles': self.throttles,
+                'waits': self.waits,
+                'wait_time': self.wait_time
+            }
+
+
+class RateLimiter(object):
+    """
+    Hands out one TokenBucket per (account, endpoint) so that every watcher
+    hitting the same AWS API in the same account shares what it learned
+    about that API's limits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def bucket(self, account, endpoint):
+        key = (account, endpoint)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                max_rate = float(app.config.get('AWS_RATE_LIMIT', 20))
+                bucket = TokenBucket(
+                    rate=max_rate,
+                    min_rate=float(app.config.get('AWS_RATE_LIMIT_MIN', 0.5)),
+                    max_rate=max_rate,
+                    increase=float(app.config.get('AWS_RATE_INCREASE', 0.5))
+                )
+                self._buckets[key] = bucket
+            return bucket
+
+    def call(self, account, awsfunc, *args, **nargs):
+        """
+        Calls awsfunc through the bucket for its account and endpoint.
+        Throttled calls are retried up to AWS_THROTTLE_RETRIES times
+        with jittered exponential backoff before the error is re-raised.
+        """
+        endpoint = endpoint_for(awsfunc)
+        bucket = self.bucket(account, endpoint)
+        retries = app.config.get('AWS_THROTTLE_RETRIES', 5)
+        attempts = 0
+
+        while True:
+            attempts = attempts + 1
+            bucket.acquire()
+            try:
+                retval = awsfunc(*args, **nargs)
+            except Exception as e:
+                if not is_throttling_error(e):
+                    raise
+                bucket.throttled()
+                if attempts > retries:
+                    app.logger.warn("Giving up on {} in account {} after {} throttled attempts."
+                                    .format(endpoint, account, attempts))
+                    raise e
+                backoff = random.uniform(0, min(16, 2 ** attempts))
+                app.logger.warn("Being rate-limited by AWS on {} in account {}. Rate is now {:.2f}/s. "
+                                "Retrying in {:.1f} seconds. Attempt {}"
+                                .format(endpoint, account, bucket.rate, backoff, attempts))
+                time.sleep(backoff)
+                continue
+
+            bucket.success()
+            return retval
+
+    def stats(self, account=None):
+        """
+        :returns: dict of {(account, endpoint): counters} for the given account,
+            or for every account if none is given.
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {key: bucket.stats() for key, bucket in buckets.items() if account is None or key[0] == account}
+
+    def clear(self):
+        with self._lock:
+            self._buckets = {}
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,157 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.region_catalog
+    :platform: Unix
+    :synopsis: Discovers and caches the regions to scan per account and service,
+    and remembers the regions where a technology keeps failing or coming back empty.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app
+
+import importlib
+import threading
+import time
+
+
+# boto module holding the static regions() list for each service.
+SERVICE_MODULES = {
+    'ec2': 'boto.ec2',
+    'elb': 'boto.ec2.elb',
+    'rds': 'boto.rds',
+    'redshift': 'boto.redshift',
+    'ses': 'boto.ses',
+    'sns': 'boto.sns',
+    'sqs': 'boto.sqs',
+    'vpc': 'boto.vpc',
+}
+
+
+class RegionCatalog(object):
+    """
+    The regions enabled for an account are discovered once with
+    ec2.get_all_regions() and cached for REGION_CATALOG_TTL seconds.  Other
+    services scan the regions from boto's static list that are enabled in the
+    account, or the whole static list when discovery fails.
+
+    Regions that fail or return nothing for a technology REGION_COLD_AFTER times
+    in a row are cold for that technology, and are only scanned for it once
+    every REGION_COLD_SCAN_INTERVAL runs.  Several technologies share a
+    service, so their misses are counted apart.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._regions = {}
+        self._misses = {}
+        self._skips = {}
+
+    def regions(self, account, service):
+        """
+        :returns: list of boto RegionInfo objects to scan for the service in the account.
+        Raises whatever ec2.get_all_regions() raised if the ec2 regions cannot be discovered.
+        """
+        key = (account, service)
+        regions = self._get(key)
+        if regions is not None:
+            return regions
+
+        with self._lock_for(key):
+            regions = self._get(key)
+            if regions is not None:
+                return regions
+
+            if service == 'ec2':
+                regions = self._discover(account)
+            else:
+                regions = self._static_regions(account, service)
+
+            with self._lock:
+                self._regions[key] = (regions, time.time())
+            return regions
+
+    def should_scan(self, account, tech, region_name):
+        """
+        Returns False for regions cold for the technology, except once every
+        REGION_COLD_SCAN_INTERVAL calls.
+        """
+        key = (account, tech, region_name)
+        with self._lock:
+            if self._misses.get(key, 0) < app.config.get('REGION_COLD_AFTER', 5):
+                return True
+
+            skips = self._skips.get(key, 0) + 1
+            if skips >= app.config.get('REGION_COLD_SCAN_INTERVAL', 12):
+                self._skips[key] = 0
+                return True
+
+            self._skips[key] = skips
+            return False
+
+    def record(self, account, tech, region_name, found_items):
+        """
+        Records the outcome of scanning a region for a technology.  found_items
+        should be False when the scan failed or returned no items.
+        """
+        key = (account, tech, region_name)
+        with self._lock:
+            if found_items:
+                self._misses.pop(key, None)
+                self._skips.pop(key, None)
+            else:
+                self._misses[key] = self._misses.get(key, 0) + 1
+                if self._misses[key] == app.config.get('REGION_COLD_AFTER', 5):
+                    app.logger.info("Region {} has nothing for {} in account {}. Only scanning it every {} runs."
+                                    .format(region_name, tech, account,
+                                            app.config.get('REGION_COLD_SCAN_INTERVAL', 12)))
+
+    def clear(self, account=None):
+        with self._lock:
+            for cache in [self._regions, self._misses, self._skips]:
+                for key in [key for key in cache if account is None or key[0] == account]:
+                    del cache[key]
+
+    def _discover(self, account):
+        from security_monkey.common.connection_registry import connect
+        from security_monkey.common.rate_limiter import rate_limiter
+        ec2 = connect(account, 'ec2')
+        return rate_limiter.call(account, ec2.get_all_regions)
+
+    def _static_regions(self, account, service):
+        regions = importlib.import_module(SERVICE_MODULES[service]).regions()
+        try:
+            enabled = set([region.name for region in self.regions(account, 'ec2')])
+        except Exception as e:
+            app.logger.debug("Could not discover regions for account {}, scanning every {} region: {}"
+                             .format(account, service, e))
+            return regions
+        return [region for region in regions if region.name in enabled]
+
+    def _get(self, key):
+        entry = self._regions.get(key)
+        if not entry:
+            return None
+        if time.time() - entry[1] > app.config.get('REGION_CATALOG_TTL', 21600):
+            return None
+        return entry[0]
+
+    def _lock_for(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+
+region_catalog = RegionCatalog()
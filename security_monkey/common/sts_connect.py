@@ -19,7 +19,8 @@
 .. moduleauthor:: Patrick Kelley <pkelley@netflix.com> @monkeysecurity
 
 """
-from security_monkey.datastore import Account
+from security_monkey import app
+from security_monkey.common.account_registry import registry
 import boto
 import boto.ec2
 import boto.ses
@@ -31,6 +32,91 @@ import boto.redshift
 import boto.vpc
 import botocore.session
 import boto3
+from boto.utils import parse_ts
+
+import calendar
+import threading
+import time
+
+
+class RoleCredentialCache(object):
+    """
+    Process-wide cache of the temporary credentials returned by sts.assume_role.
+
+    Credentials are keyed on (account number, role name) and reused until they
+    are within STS_CREDENTIAL_EXPIRY_MARGIN seconds of their Expiration.  Once they
+    enter the STS_CREDENTIAL_REFRESH_WINDOW, a background thread fetches a new set
+    so the scheduler threads rarely have to wait on AssumeRole.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._key_locks = {}
+        self._refreshing = set()
+
+    def get(self, account_number, role_name):
+        """
+        :returns: boto.sts.credentials.Credentials for the given account and role.
+        """
+        key = (account_number, role_name)
+        entry = self._entries.get(key)
+        if entry:
+            remaining = entry[1] - time.time()
+            if remaining > app.config.get('STS_CREDENTIAL_EXPIRY_MARGIN', 120):
+                if remaining < app.config.get('STS_CREDENTIAL_REFRESH_WINDOW', 600):
+                    self._refresh_in_background(key)
+                return entry[0]
+
+        with self._lock_for(key):
+            # Another thread may have refreshed the entry while we were waiting.
+            entry = self._entries.get(key)
+            if entry and entry[1] - time.time() > app.config.get('STS_CREDENTIAL_EXPIRY_MARGIN', 120):
+                return entry[0]
+            return self._assume_role(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+    def _lock_for(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _assume_role(self, key):
+        account_number, role_name = key
+        sts = boto.connect_sts()
+        role = sts.assume_role('arn:aws:iam::' + account_number + ':role/' + role_name, 'secmonkey')
+        expires_at = calendar.timegm(parse_ts(role.credentials.expiration).timetuple())
+        with self._lock:
+            self._entries[key] = (role.credentials, expires_at)
+        return role.credentials
+
+    def _refresh_in_background(self, key):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self._lock_for(key):
+                    self._assume_role(key)
+                app.logger.debug("Refreshed STS credentials for {}/{}".format(*key))
+            except Exception as e:
+                # The foreground path will retry once the cached credentials expire.
+                app.logger.warn("Could not refresh STS credentials for {}/{}: {}".format(key[0], key[1], e))
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh, name='sts-refresh-{}'.format(key[0]))
+        thread.daemon = True
+        thread.start()
+
+
+credential_cache = RoleCredentialCache()
+
 
 def connect(account_name, connection_type, **args):
     """
@@ -53,27 +139,26 @@ def connect(account_name, connection_type, **args):
     :note: To use this method a SecurityMonkey role must be created
             in the target account with full read only privileges.
     """
-    account = Account.query.filter(Account.name == account_name).first()
-    sts = boto.connect_sts()
+    account = registry.account_by_name(account_name)
     role_name = 'SecurityMonkey'
     if account.role_name and account.role_name != '':
         role_name = account.role_name
-    role = sts.assume_role('arn:aws:iam::' + account.number + ':role/' + role_name, 'secmonkey')
+    credentials = credential_cache.get(account.number, role_name)
 
     if connection_type == 'botocore':
         botocore_session = botocore.session.get_session()
         botocore_session.set_credentials(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            token=role.credentials.session_token
+            credentials.access_key,
+            credentials.secret_key,
+            token=credentials.session_token
         )
         return botocore_session
 
     if connection_type == 'ec2':
         return boto.connect_ec2(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'elb':
@@ -85,9 +170,9 @@ def connect(account_name, connection_type, **args):
 
         return boto.ec2.elb.connect_to_region(
             region,
-            aws_access_key_id=role.credentials.access_key,
-            aws_secret_access_key=role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            aws_access_key_id=credentials.access_key,
+            aws_secret_access_key=credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 's3':
@@ -97,15 +182,15 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.s3.connect_to_region(
                 region,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_s3(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'ses':
@@ -114,25 +199,33 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.ses.connect_to_region(
                 region,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_ses(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'iam_boto3':
         session = boto3.Session(
-            aws_access_key_id=role.credentials.access_key,
-            aws_secret_access_key=role.credentials.secret_key,
-            aws_session_token=role.credentials.session_token
+            aws_access_key_id=credentials.access_key,
+            aws_secret_access_key=credentials.secret_key,
+            aws_session_token=credentials.session_token
         )
         return session.resource('iam')
 
+    if connection_type == 'iam_boto3_client':
+        session = boto3.Session(
+            aws_access_key_id=credentials.access_key,
+            aws_secret_access_key=credentials.secret_key,
+            aws_session_token=credentials.session_token
+        )
+        return session.client('iam')
+
     if connection_type == 'iam':
         if 'region' in args:
             region = args['region']
@@ -140,22 +233,22 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.iam.connect_to_region(
                 region,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_iam(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'route53':
         return boto.connect_route53(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'sns':
@@ -164,15 +257,15 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.sns.connect_to_region(
                 region.name,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_sns(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'sqs':
@@ -181,22 +274,22 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.sqs.connect_to_region(
                 region.name,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_sqs(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'vpc':
         return boto.connect_vpc(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'rds':
@@ -211,9 +304,9 @@ def connect(account_name, connection_type, **args):
                 raise Exception('The supplied region {0} is not in boto.rds.regions. {1}'.format(reg, boto.rds.regions()))
 
         return boto.connect_rds(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'redshift':
@@ -222,15 +315,15 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.redshift.connect_to_region(
                 region.name,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_redshift(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     if connection_type == 'vpc':
@@ -239,15 +332,15 @@ def connect(account_name, connection_type, **args):
             del args['region']
             return boto.vpc.connect_to_region(
                 region.name,
-                aws_access_key_id=role.credentials.access_key,
-                aws_secret_access_key=role.credentials.secret_key,
-                security_token=role.credentials.session_token,
+                aws_access_key_id=credentials.access_key,
+                aws_secret_access_key=credentials.secret_key,
+                security_token=credentials.session_token,
                 **args)
 
         return boto.connect_vpc(
-            role.credentials.access_key,
-            role.credentials.secret_key,
-            security_token=role.credentials.session_token,
+            credentials.access_key,
+            credentials.secret_key,
+            security_token=credentials.session_token,
             **args)
 
     err_msg = 'The connection_type supplied (%s) is not implemented.' % connection_type
@@ -0,0 +1,114 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.utils.canonical
+    :platform: Unix
+    :synopsis: Single pass canonical form of item configs, used to compare and hash them.
+
+.. version:: $$VERSION$$
+
+"""
+from json.encoder import encode_basestring_ascii
+
+import datetime
+import decimal
+import hashlib
+
+
+def canonical_bytes(config):
+    """
+    Encodes a config as compact JSON in which dict keys and list items are sorted.
+    Like sub_dict()/sub_list(), the order of list items does not matter.
+
+    - str and unicode holding the same text encode the same.
+    - dict keys are compared as strings, as they would be after a JSON round trip.
+    - tuples, sets and frozensets encode as lists.
+    - datetimes and dates encode as their isoformat() string.
+    - Decimals encode as the int or float they hold.
+    - anything else encodes as its str().
+    """
+    return _encode(config)
+
+
+def config_hash(config):
+    """
+    SHA-1 of canonical_bytes(config).
+    """
+    return hashlib.sha1(_encode(config)).hexdigest()
+
+
+def configs_equal(config_a, config_b):
+    return _encode(config_a) == _encode(config_b)
+
+
+def _encode(value, encode_string=encode_basestring_ascii):
+    # Exact type checks first: they cover nearly everything in a config.
+    value_type = type(value)
+    if value_type is dict:
+        parts = []
+        append = parts.append
+        for key, item in value.iteritems():
+            key_type = type(key)
+            key = encode_string(key) if key_type is str or key_type is unicode else _encode_key(key)
+            item_type = type(item)
+            if item_type is str or item_type is unicode:
+                append(key + ':' + encode_string(item))
+            else:
+                append(key + ':' + _encode(item))
+        # Keys are unique, so sorted "key:value" strings have a stable order.
+        parts.sort()
+        return '{' + ','.join(parts) + '}'
+    if value_type is list or value_type is tuple or value_type is set or value_type is frozenset:
+        parts = [_encode(item) for item in value]
+        parts.sort()
+        return '[' + ','.join(parts) + ']'
+    if value_type is str or value_type is unicode:
+        return encode_string(value)
+    if value_type is int or value_type is long:
+        return str(value)
+    if value_type is bool:
+        return 'true' if value else 'false'
+    if value is None:
+        return 'null'
+    if value_type is float:
+        return repr(value)
+    return _encode_other(value)
+
+
+def _encode_key(key):
+    if isinstance(key, basestring):
+        return encode_basestring_ascii(key)
+    return encode_basestring_ascii(_encode(key).strip('"'))
+
+
+def _encode_other(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, long)):
+        return str(int(value))
+    if isinstance(value, float):
+        return repr(float(value))
+    if isinstance(value, basestring):
+        return encode_basestring_ascii(value)
+    if isinstance(value, dict):
+        return _encode(dict(value))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return _encode(list(value))
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return encode_basestring_ascii(value.isoformat())
+    if isinstance(value, decimal.Decimal):
+        if value == value.to_integral_value():
+            return str(int(value))
+        return repr(float(value))
+    return encode_basestring_ascii(str(value))
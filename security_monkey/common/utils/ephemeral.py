@@ -0,0 +1,93 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.utils.ephemeral
+    :platform: Unix
+    :synopsis: Strips a watcher's ephemeral paths from a config without copying the whole config.
+
+.. version:: $$VERSION$$
+
+"""
+import fnmatch
+
+_DELETED = object()
+
+
+def compile_ephemeral_paths(paths, separator='$'):
+    """
+    Compiles dpath-style paths, such as "user$password_last_used" or
+    "rules$*$ephemeral", into a function returning the durable view of a config.
+
+    The durable view shares every untouched dict and list with the original.
+    Only the containers along a removed path are copied, and a config holding
+    none of the paths is returned as is, so the view must not be modified.
+    """
+    tree = {}
+    for path in paths:
+        segments = [segment for segment in path.split(separator) if segment]
+        if not segments:
+            continue
+        node = tree
+        for segment in segments[:-1]:
+            if segment in node and node[segment] is None:
+                # A shorter path already removes this whole subtree.
+                break
+            node = node.setdefault(segment, {})
+        else:
+            node[segments[-1]] = None
+
+    def durable_view(config):
+        if not tree:
+            return config
+        return _project(config, tree)
+
+    return durable_view
+
+
+def _project(value, tree):
+    if isinstance(value, dict):
+        children = value.items()
+    elif isinstance(value, list):
+        children = enumerate(value)
+    else:
+        return value
+
+    changes = {}
+    for key, child in children:
+        name = key if isinstance(key, basestring) else str(key)
+        projected = child
+        for pattern, subtree in tree.items():
+            if not fnmatch.fnmatchcase(name, pattern):
+                continue
+            if subtree is None:
+                projected = _DELETED
+                break
+            projected = _project(projected, subtree)
+        if projected is not child:
+            changes[key] = projected
+
+    if not changes:
+        return value
+
+    if isinstance(value, dict):
+        result = dict(value)
+        for key, projected in changes.items():
+            if projected is _DELETED:
+                del result[key]
+            else:
+                result[key] = projected
+        return result
+
+    return [changes.get(index, child) for index, child in enumerate(value)
+            if changes.get(index) is not _DELETED]
@@ -0,0 +1,137 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.common.utils.json_delta
+    :platform: Unix
+    :synopsis: Computes and applies JSON patches (RFC 6902 add, remove and replace
+    operations) between two configs.
+
+.. version:: $$VERSION$$
+
+"""
+from copy import deepcopy
+import difflib
+import json
+
+
+def make_patch(source, target):
+    """
+    :returns: list of operations turning source into target when applied in order.
+        List entries are matched with difflib, so adding or removing a few
+        entries of a long list only records those entries.
+    """
+    operations = []
+    _diff(source, target, [], operations)
+    return operations
+
+
+def apply_patch(document, patch):
+    """
+    :returns: a copy of document with the operations of patch applied.
+        The document itself is left untouched.
+    """
+    document = deepcopy(document)
+    for operation in patch:
+        parts = _parse_pointer(operation['path'])
+        if not parts:
+            if operation['op'] == 'remove':
+                document = None
+            else:
+                document = deepcopy(operation['value'])
+            continue
+
+        parent = document
+        for part in parts[:-1]:
+            parent = parent[_index(parent, part)]
+        last = parts[-1]
+
+        if operation['op'] == 'remove':
+            del parent[_index(parent, last)]
+        elif operation['op'] == 'add' and isinstance(parent, list):
+            if last == '-':
+                parent.append(deepcopy(operation['value']))
+            else:
+                parent.insert(int(last), deepcopy(operation['value']))
+        elif operation['op'] in ('add', 'replace'):
+            parent[_index(parent, last)] = deepcopy(operation['value'])
+        else:
+            raise ValueError("Unsupported JSON patch operation {}".format(operation['op']))
+    return document
+
+
+def _diff(source, target, path, operations):
+    if type(source) is dict and type(target) is dict:
+        for key in sorted(source):
+            if key not in target:
+                operations.append({'op': 'remove', 'path': _pointer(path + [key])})
+        for key in sorted(target):
+            if key not in source:
+                operations.append({'op': 'add', 'path': _pointer(path + [key]), 'value': target[key]})
+            elif source[key] != target[key]:
+                _diff(source[key], target[key], path + [key], operations)
+        return
+
+    if type(source) is list and type(target) is list:
+        prefix = 0
+        limit = min(len(source), len(target))
+        while prefix < limit and source[prefix] == target[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and source[-1 - suffix] == target[-1 - suffix]:
+            suffix += 1
+
+        source_middle = source[prefix:len(source) - suffix]
+        target_middle = target[prefix:len(target) - suffix]
+        matcher = difflib.SequenceMatcher(None, [_key(value) for value in source_middle],
+                                          [_key(value) for value in target_middle], autojunk=False)
+        # Working back from the end keeps the indexes of earlier entries valid.
+        for (tag, i1, i2, j1, j2) in reversed(matcher.get_opcodes()):
+            if tag == 'equal':
+                continue
+            if tag == 'replace' and i2 - i1 == j2 - j1:
+                for offset in range(i2 - i1):
+                    _diff(source_middle[i1 + offset], target_middle[j1 + offset],
+                          path + [prefix + i1 + offset], operations)
+                continue
+            for _ in range(i1, i2):
+                operations.append({'op': 'remove', 'path': _pointer(path + [prefix + i1])})
+            for offset, value in enumerate(target_middle[j1:j2]):
+                operations.append({'op': 'add', 'path': _pointer(path + [prefix + i1 + offset]), 'value': value})
+        return
+
+    if type(source) is not type(target) or source != target:
+        operations.append({'op': 'replace', 'path': _pointer(path), 'value': target})
+
+
+def _key(value):
+    # Hashable stand-in for a list entry that only matches equal entries.
+    return json.dumps(value, sort_keys=True)
+
+
+def _pointer(parts):
+    if not parts:
+        return ''
+    return ''.join(['/' + unicode(part).replace('~', '~0').replace('/', '~1') for part in parts])
+
+
+def _parse_pointer(pointer):
+    if not pointer:
+        return []
+    return [part.replace('~1', '/').replace('~0', '~') for part in pointer.split('/')[1:]]
+
+
+def _index(container, part):
+    if isinstance(container, list):
+        return int(part)
+    return part
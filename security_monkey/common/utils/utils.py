@@ -22,7 +22,8 @@
 """
 
 from security_monkey import app, mail, db
-from security_monkey.datastore import Account, User, Role
+from security_monkey.datastore import Account, User, Role, item_id_cache
+from security_monkey.common.account_registry import registry
 from flask_mail import Message
 import boto
 import traceback
@@ -117,6 +118,8 @@ def add_account(number, third_party, name, s3_name, active, notes, role_name='Se
     account.third_party = third_party
     db.session.add(account)
     db.session.commit()
+    registry.invalidate()
+    item_id_cache.clear()
     return True
 
 def grant_admin(user):
@@ -23,16 +23,26 @@
 
 
 from security_monkey import db, app
+from security_monkey.common.utils.canonical import config_hash
+from security_monkey.common.utils.json_delta import make_patch, apply_patch
+from security_monkey.common.lru_cache import LRUCache
+from security_monkey.common.account_registry import registry
 
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Unicode
+from sqlalchemy import select, or_
 from sqlalchemy.dialects.postgresql import CIDR
-from sqlalchemy.schema import ForeignKey, UniqueConstraint
+from sqlalchemy.schema import ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from flask.ext.security import UserMixin, RoleMixin
-from sqlalchemy.orm import deferred
+from sqlalchemy.orm import deferred, aliased
+from sqlalchemy.sql.expression import cast
+from sqlalchemy.exc import IntegrityError
 
+from collections import namedtuple
+from itertools import islice
 import datetime
+import json
 
 
 association_table = db.Table(
@@ -125,6 +135,7 @@ class ItemAudit(db.Model):
     justified_date = Column(DateTime(), default=datetime.datetime.utcnow, nullable=True)
     item_id = Column(Integer, ForeignKey("item.id"), nullable=False)
     auditor_setting_id = Column(Integer, ForeignKey("auditorsettings.id"), nullable=True)
+    __table_args__ = (Index('ix_itemaudit_item_id', 'item_id'), )
 
 
 class AuditorSettings(db.Model):
@@ -139,6 +150,7 @@ class AuditorSettings(db.Model):
     tech_id = Column(Integer, ForeignKey("technology.id"))
     account_id = Column(Integer, ForeignKey("account.id"))
     unique_const = UniqueConstraint('account_id', 'issue_text', 'tech_id')
+    __table_args__ = (Index('ix_auditorsettings_tech_account_issue', 'tech_id', 'account_id', 'issue_text'), )
 
 
 class Item(db.Model):
@@ -156,6 +168,7 @@ class Item(db.Model):
     issues = relationship("ItemAudit", backref="item", cascade="all, delete, delete-orphan")
     latest_revision_id = Column(Integer, nullable=True)
     comments = relationship("ItemComment", backref="revision", cascade="all, delete, delete-orphan", order_by="ItemComment.date_created")
+    __table_args__ = (Index('ix_item_identity', 'tech_id', 'account_id', 'region', 'name', unique=True), )
 
 
 class ItemComment(db.Model):
@@ -173,14 +186,29 @@ class ItemComment(db.Model):
 class ItemRevision(db.Model):
     """
     Every new configuration for an item is saved in a new ItemRevision.
+
+    With REVISION_STORAGE set to delta, most revisions only hold a JSON patch
+    from the config of an earlier snapshot revision of the same item.
+    Read the config property, which rebuilds their full config.
     """
     __tablename__ = "itemrevision"
     id = Column(Integer, primary_key=True)
     active = Column(Boolean())
-    config = deferred(Column(JSON))
+    stored_config = deferred(Column('config', JSON))  # NULL for revisions stored as a delta.
+    config_delta = deferred(Column(JSON, nullable=True))
+    snapshot_id = Column(Integer, nullable=True)  # The revision config_delta applies to.
+    delta_seq = Column(Integer, nullable=True)  # Revisions since the snapshot.  NULL or 0 for snapshots.
+    config_hash = Column(String(40), nullable=True)  # NULL for revisions stored before hashing.
     date_created = Column(DateTime(), default=datetime.datetime.utcnow, nullable=False)
     item_id = Column(Integer, ForeignKey("item.id"), nullable=False)
     comments = relationship("ItemRevisionComment", backref="revision", cascade="all, delete, delete-orphan", order_by="ItemRevisionComment.date_created")
+    __table_args__ = (Index('ix_itemrevision_item_id_date_created', 'item_id', 'date_created'), )
+
+    @property
+    def config(self):
+        if self.snapshot_id is None:
+            return self.stored_config
+        return _apply_delta(snapshot_configs([self.snapshot_id]), self.snapshot_id, self.config_delta)
 
 
 class ItemRevisionComment(db.Model):
@@ -219,6 +247,134 @@ class IgnoreListEntry(db.Model):
     tech_id = Column(Integer, ForeignKey("technology.id"), nullable=False)
 
 
+class FailedPartition(db.Model):
+    """
+    An (account, region) partition of a technology that could not be slurped.
+    A region of NULL stands for the whole account.  Rows are retried with
+    backoff and deleted as soon as the partition is slurped successfully.
+    """
+    __tablename__ = "failedpartition"
+    id = Column(Integer, primary_key=True)
+    tech_id = Column(Integer, ForeignKey("technology.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("account.id"), nullable=False)
+    region = Column(String(32), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(512))
+    first_failed = Column(DateTime(), default=datetime.datetime.utcnow, nullable=False)
+    next_retry = Column(DateTime(), nullable=False)
+    __table_args__ = (UniqueConstraint('tech_id', 'account_id', 'region', name='uix_failedpartition'), )
+
+
+# (tech, account, region, name) -> item id, shared by every Datastore in the process.
+item_id_cache = LRUCache(app.config.get('ITEM_ID_CACHE_SIZE', 100000))
+
+# Full configs of the snapshot revisions deltas are applied to, keyed on revision id.
+snapshot_cache = LRUCache(app.config.get('REVISION_SNAPSHOT_CACHE_SIZE', 1000))
+
+# One item to save with Datastore.store_many, with the same meaning as the arguments of Datastore.store.
+StoredItem = namedtuple('StoredItem', ['region', 'account', 'name', 'active', 'config', 'new_issues'])
+
+# Latest recorded state of an item, as streamed by Datastore.get_latest_revisions.
+PreviousItem = namedtuple('PreviousItem', ['item_id', 'region', 'name', 'account', 'revision_id',
+                                           'active', 'config_hash', 'config', 'db_item'])
+
+
+def _newest_revision_id():
+    """
+    Correlated subquery selecting the id of the item's newest revision.
+    """
+    item_table = Item.__table__
+    revision_table = ItemRevision.__table__
+    return select([revision_table.c.id]) \
+        .where(revision_table.c.item_id == item_table.c.id) \
+        .order_by(revision_table.c.date_created.desc(), revision_table.c.id.desc()) \
+        .limit(1).as_scalar()
+
+
+def snapshot_configs(revision_ids):
+    """
+    Reads the full config of the given revisions through snapshot_cache.
+    A revision turned into a delta since it was picked as a snapshot,
+    e.g. by compact_revisions, is rebuilt from its own snapshot.
+    :return: dict of {revision_id: config}
+    """
+    configs = {}
+    missing = []
+    for revision_id in set(revision_ids):
+        config = snapshot_cache.get(revision_id)
+        if config is None:
+            missing.append(revision_id)
+        else:
+            configs[revision_id] = config
+
+    deltas = []
+    for i in range(0, len(missing), 500):
+        query = db.session.query(ItemRevision.id, ItemRevision.stored_config,
+                                 ItemRevision.config_delta, ItemRevision.snapshot_id) \
+            .filter(ItemRevision.id.in_(missing[i:i + 500]))
+        for (revision_id, stored_config, config_delta, snapshot_id) in query:
+            if snapshot_id is None:
+                configs[revision_id] = stored_config
+                snapshot_cache.put(revision_id, stored_config)
+            else:
+                deltas.append((revision_id, config_delta, snapshot_id))
+
+    if deltas:
+        snapshots = snapshot_configs([snapshot_id for (revision_id, config_delta, snapshot_id) in deltas])
+        for (revision_id, config_delta, snapshot_id) in deltas:
+            configs[revision_id] = _apply_delta(snapshots, snapshot_id, config_delta)
+            snapshot_cache.put(revision_id, configs[revision_id])
+    return configs
+
+
+def _apply_delta(snapshots, snapshot_id, config_delta):
+    if snapshot_id not in snapshots:
+        raise Exception("Snapshot revision {} of a delta revision is missing".format(snapshot_id))
+    # apply_patch copies the snapshot, so the cached config is never modified.
+    return apply_patch(snapshots[snapshot_id], config_delta or [])
+
+
+def _materialize(entries):
+    """
+    :param entries: list of (stored_config, config_delta, snapshot_id) columns of revisions.
+    :return: list of the full configs of the revisions, in the same order.
+    """
+    snapshots = snapshot_configs([snapshot_id for (stored_config, config_delta, snapshot_id) in entries
+                                  if snapshot_id is not None])
+    return [stored_config if snapshot_id is None else _apply_delta(snapshots, snapshot_id, config_delta)
+            for (stored_config, config_delta, snapshot_id) in entries]
+
+
+def filter_config_contains(query, text):
+    """
+    Filters a query on ItemRevision down to the revisions whose config
+    contains text, ignoring case.  A delta revision is matched on the text of
+    its snapshot and of its patch, so it also matches when its patch removed
+    the text from the snapshot.
+    """
+    snapshot = aliased(ItemRevision)
+    pattern = '%{}%'.format(text)
+    return query.outerjoin((snapshot, ItemRevision.snapshot_id == snapshot.id)) \
+        .filter(or_(cast(ItemRevision.stored_config, String).ilike(pattern),
+                    cast(snapshot.stored_config, String).ilike(pattern),
+                    cast(ItemRevision.config_delta, String).ilike(pattern)))
+
+
+def _full_revision(config):
+    return {'config': config, 'config_delta': None, 'snapshot_id': None, 'delta_seq': 0}
+
+
+def _delta_revision(snapshot_id, snapshot_config, delta_seq, config):
+    """
+    :return: the columns storing config as a delta from the snapshot,
+        or in full if the delta would not be smaller.
+    """
+    delta = make_patch(snapshot_config, config)
+    if len(json.dumps(delta)) >= len(json.dumps(config)):
+        return _full_revision(config)
+    return {'config': None, 'config_delta': delta, 'snapshot_id': snapshot_id, 'delta_seq': delta_seq}
+
+
 class Datastore(object):
     def __init__(self, debug=False):
         pass
@@ -265,6 +421,73 @@ class Datastore(object):
 
         return item_map
 
+    def get_latest_revisions(self, tech, account, include_config=False, include_db_item=False, include_inactive=False):
+        """
+        Streams the latest revision of every item of a technology in an account,
+        joining each item to its latest_revision_id, account and technology in a
+        single query read through a server-side cursor.
+        Items whose latest_revision_id is unset are left out until
+        repair_latest_revisions fixes them.
+        :return: generator of PreviousItem tuples.  config and db_item are None
+            unless include_config or include_db_item is set.
+        """
+        columns = [Item.id, Item.region, Item.name, Account.name, ItemRevision.id,
+                   ItemRevision.active, ItemRevision.config_hash]
+        if include_config:
+            columns.extend([ItemRevision.stored_config, ItemRevision.config_delta, ItemRevision.snapshot_id])
+        if include_db_item:
+            columns.append(Item)
+
+        query = db.session.query(*columns) \
+            .join((ItemRevision, ItemRevision.id == Item.latest_revision_id)) \
+            .join((Account, Item.account_id == Account.id)) \
+            .join((Technology, Item.tech_id == Technology.id)) \
+            .filter(Technology.name == tech) \
+            .filter(Account.name == account)
+        if not include_inactive:
+            query = query.filter(ItemRevision.active == True)
+
+        rows = iter(query.yield_per(1000))
+        while True:
+            # Deltas are rebuilt a chunk at a time, so their snapshots are read together.
+            chunk = list(islice(rows, 1000))
+            if not chunk:
+                break
+            if include_config:
+                configs = _materialize([tuple(row[7:10]) for row in chunk])
+            else:
+                configs = [None] * len(chunk)
+            for row, config in zip(chunk, configs):
+                db_item = row[-1] if include_db_item else None
+                yield PreviousItem(*(tuple(row[:7]) + (config, db_item)))
+
+    def repair_latest_revisions(self, tech=None, account=None):
+        """
+        Points latest_revision_id at the newest revision of every item whose
+        pointer is unset or out of date, with a single UPDATE.  Items stored
+        before latest_revision_id was maintained have it unset, which hides
+        them from get_latest_revisions.
+        :return: the number of items repaired.
+        """
+        item_table = Item.__table__
+        newest = _newest_revision_id()
+
+        statement = item_table.update().values(latest_revision_id=newest) \
+            .where(newest != None) \
+            .where(or_(item_table.c.latest_revision_id == None,
+                       item_table.c.latest_revision_id != newest))
+        if tech:
+            statement = statement.where(item_table.c.tech_id == registry.technology_id(tech))
+        if account:
+            account_info = registry.account_by_name(account)
+            statement = statement.where(item_table.c.account_id == (account_info.id if account_info else None))
+
+        repaired = db.session.execute(statement).rowcount
+        db.session.commit()
+        if repaired:
+            app.logger.info("Repaired the latest revision of {} items".format(repaired))
+        return repaired
+
     def get(self, ctype, region, account, name):
         """
         Returns a list of all revisions for the given item.
@@ -284,8 +507,14 @@ class Datastore(object):
         Saves an itemrevision.  Create the item if it does not already exist.
         """
         item = self._get_item(ctype, region, account, name)
-        item_revision = ItemRevision(active=active_flag, config=config)
-        item.revisions.append(item_revision)
+        db.session.add(item)
+        # Gives a new item its id.  Appending to item.revisions would load the whole history.
+        db.session.flush()
+        columns = self._encode_revisions([(item.id, config)])[0]
+        item_revision = ItemRevision(item_id=item.id, active=active_flag, stored_config=columns['config'],
+                                     config_delta=columns['config_delta'], snapshot_id=columns['snapshot_id'],
+                                     delta_seq=columns['delta_seq'], config_hash=config_hash(config))
+        db.session.add(item_revision)
 
         # Add new issues
         for new_issue in new_issues:
@@ -300,27 +529,336 @@ class Datastore(object):
             if ok not in ["{}/{}".format(new_issue.issue, new_issue.notes) for new_issue in new_issues]:
                 db.session.delete(old_issue)
 
-        db.session.add(item)
-        db.session.add(item_revision)
+        db.session.flush()
+        item.latest_revision_id = item_revision.id
         db.session.commit()
 
-        self._set_latest_revision(item)
+    def store_many(self, ctype, stored_items):
+        """
+        Saves a new revision for every StoredItem of a technology, creating the
+        items that do not exist yet, in a single transaction.  Equivalent to
+        calling store() for each of them, with a handful of queries in total.
+        """
+        stored_items = list(stored_items)
+        if not stored_items:
+            return
+
+        account_names = set([stored.account for stored in stored_items])
+        account_ids = {}
+        for account in account_names:
+            account_info = registry.account_by_name(account)
+            if not account_info:
+                raise Exception("Account with name [{}] not found.".format(account))
+            account_ids[account] = account_info.id
+        tech_id = self._get_technology_id(ctype)
+
+        account_names = {account_id: account for account, account_id in account_ids.items()}
+        keys = [(account_ids[stored.account], stored.region, stored.name) for stored in stored_items]
+        item_ids = self._get_item_ids(ctype, tech_id, keys, account_names)
+        missing = sorted(set([key for key in keys if key not in item_ids]))
+        if missing:
+            item_ids.update(self._insert_items(ctype, tech_id, missing, account_names))
+
+        now = datetime.datetime.utcnow()
+        encoded = self._encode_revisions([(item_ids[key], stored.config) for key, stored in zip(keys, stored_items)])
+        db.session.execute(ItemRevision.__table__.insert(), [
+            dict(columns, item_id=item_ids[key], active=stored.active,
+                 config_hash=config_hash(stored.config), date_created=now)
+            for key, stored, columns in zip(keys, stored_items, encoded)
+        ])
+
+        ids = sorted(set(item_ids[key] for key in keys))
+        item_table = Item.__table__
+        for i in range(0, len(ids), 500):
+            db.session.execute(item_table.update()
+                               .where(item_table.c.id.in_(ids[i:i + 500]))
+                               .values(latest_revision_id=_newest_revision_id()))
+
+        self._reconcile_issues([(item_ids[key], stored.new_issues) for key, stored in zip(keys, stored_items)])
+        db.session.commit()
+
+    def _insert_items(self, ctype, tech_id, keys, account_names):
+        """
+        Creates the items with the given keys.  Another process, such as the
+        event worker or a failed partition retry, may create some of them at
+        the same time.  Those inserts conflict on ix_item_identity and the
+        items are read back instead.  Each attempt runs in a savepoint, so a
+        conflict does not roll back the rest of the batch.
+        :param keys: list of (account_id, region, name) that did not exist.
+        :return: dict of {(account_id, region, name): item_id}
+        """
+        item_ids = {}
+        while keys:
+            savepoint = db.session.begin_nested()
+            try:
+                db.session.execute(Item.__table__.insert(), [
+                    {'tech_id': tech_id, 'account_id': account_id, 'region': region, 'name': name}
+                    for (account_id, region, name) in keys
+                ])
+            except IntegrityError as e:
+                savepoint.rollback()
+                found = self._get_item_ids(ctype, tech_id, keys, account_names)
+                if not found:
+                    raise e
+                app.logger.debug("{} of {} new {} items were created concurrently".format(len(found), len(keys), ctype))
+                item_ids.update(found)
+                keys = [key for key in keys if key not in found]
+                continue
+            savepoint.commit()
+            item_ids.update(self._get_item_ids(ctype, tech_id, keys, account_names))
+            break
+        return item_ids
+
+    def _encode_revisions(self, item_configs):
+        """
+        Picks how to store the next revision of each item.  With REVISION_STORAGE
+        set to delta, a revision is stored as a JSON patch from the item's latest
+        snapshot, unless REVISION_SNAPSHOT_INTERVAL revisions were stored since.
+        :param item_configs: list of (item_id, config)
+        :return: list of dicts of ItemRevision columns, in the same order.
+        """
+        if app.config.get('REVISION_STORAGE', 'full') != 'delta':
+            return [_full_revision(config) for (item_id, config) in item_configs]
+
+        item_ids = sorted(set([item_id for (item_id, config) in item_configs]))
+        latest = {}
+        for i in range(0, len(item_ids), 500):
+            query = db.session.query(Item.id, ItemRevision.id, ItemRevision.snapshot_id, ItemRevision.delta_seq) \
+                .join((ItemRevision, ItemRevision.id == Item.latest_revision_id)) \
+                .filter(Item.id.in_(item_ids[i:i + 500]))
+            for (item_id, revision_id, snapshot_id, delta_seq) in query:
+                if (delta_seq or 0) + 1 < app.config.get('REVISION_SNAPSHOT_INTERVAL', 20):
+                    latest[item_id] = (snapshot_id or revision_id, (delta_seq or 0) + 1)
+
+        snapshots = snapshot_configs([snapshot_id for (snapshot_id, delta_seq) in latest.values()])
+        encoded = []
+        for (item_id, config) in item_configs:
+            if item_id in latest and latest[item_id][0] in snapshots:
+                (snapshot_id, delta_seq) = latest[item_id]
+                encoded.append(_delta_revision(snapshot_id, snapshots[snapshot_id], delta_seq, config))
+            else:
+                encoded.append(_full_revision(config))
+        return encoded
+
+    def _get_item_ids(self, ctype, tech_id, keys, account_names):
+        """
+        :param keys: list of (account_id, region, name)
+        :param account_names: dict of {account_id: account name}
+        :return: dict of {(account_id, region, name): item_id} for the keys that exist.
+        """
+        item_ids = {}
+        for key in set(keys):
+            (key_account_id, key_region, key_name) = key
+            item_id = item_id_cache.get((ctype, account_names[key_account_id], key_region, key_name))
+            if item_id is not None:
+                item_ids[key] = item_id
+
+        wanted = set(keys) - set(item_ids)
+        names = sorted(set([name for (account_id, region, name) in wanted]))
+        account_ids = set([account_id for (account_id, region, name) in wanted])
+        for i in range(0, len(names), 500):
+            query = db.session.query(Item.id, Item.account_id, Item.region, Item.name) \
+                .filter(Item.tech_id == tech_id) \
+                .filter(Item.account_id.in_(account_ids)) \
+                .filter(Item.name.in_(names[i:i + 500]))
+            for (item_id, account_id, region, name) in query:
+                key = (account_id, region, name)
+                if key not in wanted:
+                    continue
+                if key in item_ids:
+                    # DB needs to be cleaned up and a bug needs to be found if this ever happens.
+                    raise Exception("Found multiple items for tech: {} region: {} account: {} and name: {}"
+                                    .format(ctype, region, account_id, name))
+                item_ids[key] = item_id
+                item_id_cache.put((ctype, account_names[account_id], region, name), item_id)
+        return item_ids
+
+    def _reconcile_issues(self, item_issues):
+        """
+        Adds the issues an item does not have yet and deletes the ones it no
+        longer has, comparing them on their issue and notes like store().
+        :param item_issues: list of (item_id, new_issues)
+        """
+        ids = [item_id for (item_id, new_issues) in item_issues]
+        existing = {}
+        for i in range(0, len(ids), 500):
+            for issue in ItemAudit.query.filter(ItemAudit.item_id.in_(ids[i:i + 500])):
+                existing.setdefault(issue.item_id, {})[(issue.issue, issue.notes)] = issue
+
+        for (item_id, new_issues) in item_issues:
+            old_issues = existing.get(item_id, {})
+            new_keys = set()
+            for new_issue in new_issues:
+                key = (new_issue.issue, new_issue.notes)
+                new_keys.add(key)
+                if key not in old_issues:
+                    new_issue.item_id = item_id
+                    db.session.add(new_issue)
+            for key in set(old_issues) - new_keys:
+                db.session.delete(old_issues[key])
+
+    def get_revision_configs(self, revision_ids):
+        """
+        Loads the deferred config of the given revisions, a few hundred per query,
+        rebuilding the ones stored as a delta.
+        :return: dict of {revision_id: config}
+        """
+        configs = {}
+        revision_ids = list(revision_ids)
+        for i in range(0, len(revision_ids), 500):
+            chunk = revision_ids[i:i + 500]
+            rows = db.session.query(ItemRevision.id, ItemRevision.stored_config,
+                                    ItemRevision.config_delta, ItemRevision.snapshot_id) \
+                .filter(ItemRevision.id.in_(chunk)).all()
+            for row, config in zip(rows, _materialize([tuple(row[1:]) for row in rows])):
+                configs[row[0]] = config
+        return configs
+
+    def compact_revisions(self, tech=None, account=None, expand=False):
+        """
+        Rewrites the history of every item, or of a technology and/or account,
+        as a full snapshot every REVISION_SNAPSHOT_INTERVAL revisions and deltas
+        in between.  With expand, every revision is stored in full again, as
+        needed before setting REVISION_STORAGE back to full.
+        Configs are unchanged, only the way they are stored.
+        :return: the number of revisions rewritten.
+        """
+        interval = app.config.get('REVISION_SNAPSHOT_INTERVAL', 20)
+        query = db.session.query(Item.id).order_by(Item.id)
+        if tech:
+            query = query.filter(Item.tech_id == registry.technology_id(tech))
+        if account:
+            account_info = registry.account_by_name(account)
+            query = query.filter(Item.account_id == (account_info.id if account_info else None))
+        item_ids = [row[0] for row in query.all()]
+
+        rewritten = 0
+        for count, item_id in enumerate(item_ids, 1):
+            revisions = db.session.query(ItemRevision.id, ItemRevision.stored_config,
+                                         ItemRevision.config_delta, ItemRevision.snapshot_id) \
+                .filter(ItemRevision.item_id == item_id) \
+                .order_by(ItemRevision.date_created, ItemRevision.id).all()
+            # Every config is rebuilt before any row of the item is rewritten.
+            configs = _materialize([tuple(revision[1:]) for revision in revisions])
+
+            snapshot_id, snapshot_config, delta_seq = None, None, 0
+            for revision, config in zip(revisions, configs):
+                columns = _full_revision(config)
+                if not expand and snapshot_id is not None and delta_seq + 1 < interval:
+                    columns = _delta_revision(snapshot_id, snapshot_config, delta_seq + 1, config)
+                if columns['snapshot_id'] is None:
+                    snapshot_id, snapshot_config, delta_seq = revision[0], config, 0
+                else:
+                    delta_seq += 1
+                ItemRevision.query.filter(ItemRevision.id == revision[0]).update(
+                    {ItemRevision.stored_config: columns['config'], ItemRevision.config_delta: columns['config_delta'],
+                     ItemRevision.snapshot_id: columns['snapshot_id'], ItemRevision.delta_seq: columns['delta_seq']},
+                    synchronize_session=False)
+            rewritten += len(revisions)
+
+            if count % 100 == 0:
+                db.session.commit()
+                app.logger.info("Rewrote the revisions of {} of {} items".format(count, len(item_ids)))
+
+        db.session.commit()
+        return rewritten
+
+    def set_config_hashes(self, hashes):
+        """
+        Backfills config_hash on revisions stored before the column existed,
+        or hashed by an older version of canonical.config_hash.
+        :param hashes: dict of {revision_id: config_hash}
+        """
+        for revision_id, revision_hash in hashes.items():
+            ItemRevision.query.filter(ItemRevision.id == revision_id) \
+                .update({'config_hash': revision_hash}, synchronize_session=False)
+        db.session.commit()
+
+    def record_partition_results(self, tech, partitions, failures):
+        """
+        Deletes the FailedPartition rows of partitions that were slurped
+        successfully, and schedules a retry of the ones that failed.
+        :param partitions: list of (account, region) partitions that were slurped.
+            A region of None covers every region of the account.
+        :param failures: dict of {(account, region): exception} for the partitions that failed.
+        """
+        if not partitions and not failures:
+            return
+
+        for (account, region) in partitions:
+            if (account, None) in failures:
+                continue
+            query = FailedPartition.query \
+                .join((Technology, FailedPartition.tech_id == Technology.id)) \
+                .join((Account, FailedPartition.account_id == Account.id)) \
+                .filter(Technology.name == tech) \
+                .filter(Account.name == account)
+            if region is not None:
+                query = query.filter(FailedPartition.region == region)
+            for failed_partition in query.all():
+                if (account, failed_partition.region) in failures:
+                    continue
+                app.logger.info("{} in {}/{} recovered after {} attempts".format(
+                    tech, account, failed_partition.region, failed_partition.attempts))
+                db.session.delete(failed_partition)
+
+        now = datetime.datetime.utcnow()
+        for (account, region), exception in failures.items():
+            account_info = registry.account_by_name(account)
+            if not account_info:
+                continue
+            tech_id = self._get_technology_id(tech)
+            failed_partition = FailedPartition.query \
+                .filter(FailedPartition.tech_id == tech_id) \
+                .filter(FailedPartition.account_id == account_info.id) \
+                .filter(FailedPartition.region == region) \
+                .first()
+            if not failed_partition:
+                failed_partition = FailedPartition(tech_id=tech_id, account_id=account_info.id,
+                                                   region=region, attempts=0, first_failed=now)
+            failed_partition.attempts += 1
+            failed_partition.last_error = str(exception)[:512]
+            failed_partition.next_retry = now + datetime.timedelta(seconds=self._retry_delay(failed_partition.attempts))
+            db.session.add(failed_partition)
 
-    def _set_latest_revision(self, item):
-        sorted_revisions = sorted(item.revisions, key=lambda revision: revision.date_created)
-        latest_revision = sorted_revisions[-1]
-        item.latest_revision_id = latest_revision.id
-        db.session.add(item)
         db.session.commit()
-        #db.session.close()
+
+    def _retry_delay(self, attempts):
+        """
+        Exponential backoff in seconds after the given number of failed attempts.
+        """
+        base = app.config.get('FAILED_PARTITION_RETRY_BASE', 60)
+        return min(base * 2 ** (attempts - 1), app.config.get('FAILED_PARTITION_RETRY_MAX', 900))
+
+    def get_due_failed_partitions(self):
+        """
+        :return: list of (tech, account, region) partitions due for a retry.
+            Partitions that used up FAILED_PARTITION_MAX_ATTEMPTS wait for the next full sweep.
+        """
+        query = db.session.query(Technology.name, Account.name, FailedPartition.region) \
+            .join((FailedPartition, FailedPartition.tech_id == Technology.id)) \
+            .join((Account, FailedPartition.account_id == Account.id)) \
+            .filter(FailedPartition.next_retry <= datetime.datetime.utcnow()) \
+            .filter(FailedPartition.attempts < app.config.get('FAILED_PARTITION_MAX_ATTEMPTS', 6)) \
+            .filter(Account.active == True) \
+            .order_by(FailedPartition.next_retry)
+        return [tuple(row) for row in query.all()]
 
     def _get_item(self, technology, region, account, name):
         """
         Returns the first item with matching parameters.
         Creates item if it doesn't exist.
         """
-        account_result = Account.query.filter(Account.name == account).first()
-        if not account_result:
+        cache_key = (technology, account, region, name)
+        item_id = item_id_cache.get(cache_key)
+        if item_id is not None:
+            item = Item.query.get(item_id)
+            if item is not None and item.region == region and item.name == name:
+                return item
+            item_id_cache.pop(cache_key)
+
+        account_info = registry.account_by_name(account)
+        if not account_info:
             raise Exception("Account with name [{}] not found.".format(account))
 
         item = Item.query.join((Technology, Item.tech_id == Technology.id)) \
@@ -337,17 +875,27 @@ class Datastore(object):
                             .format(technology, region, account, name))
         if len(item) == 1:
             item = item[0]
+            item_id_cache.put(cache_key, item.id)
         else:
             item = None
 
         if not item:
-            technology_result = Technology.query.filter(Technology.name == technology).first()
-            if not technology_result:
-                technology_result = Technology(name=technology)
-                db.session.add(technology_result)
-                db.session.commit()
-                #db.session.close()
-                app.logger.info("Creating a new Technology: {} - ID: {}"
-                                .format(technology, technology_result.id))
-            item = Item(tech_id=technology_result.id, region=region, account_id=account_result.id, name=name)
+            item = Item(tech_id=self._get_technology_id(technology), region=region,
+                        account_id=account_info.id, name=name)
         return item
+
+    def _get_technology_id(self, technology):
+        """
+        Returns the id of the technology with the given name, creating it if it doesn't exist.
+        """
+        technology_id = registry.technology_id(technology)
+        if technology_id is None:
+            technology_result = Technology(name=technology)
+            db.session.add(technology_result)
+            db.session.commit()
+            #db.session.close()
+            registry.invalidate()
+            app.logger.info("Creating a new Technology: {} - ID: {}"
+                            .format(technology, technology_result.id))
+            technology_id = technology_result.id
+        return technology_id
@@ -0,0 +1,306 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+"""
+.. module: security_monkey.event_worker
+    :platform: Unix
+    :synopsis: Turns CloudTrail and AWS Config change events into targeted refreshes
+    of the items they touch, so full sweeps only need to run as reconciliation.
+
+.. version:: $$VERSION$$
+
+"""
+from security_monkey import app, db
+from security_monkey.datastore import Account, Item, Technology
+from security_monkey.monitors import get_monitor
+from security_monkey.common.event_queue import get_event_queue
+from security_monkey.common.account_registry import registry
+
+from collections import namedtuple
+from sqlalchemy import or_
+import json
+import traceback
+
+# account is an account number or name.  A resource of None stands for the whole (account, region).
+ResourceEvent = namedtuple('ResourceEvent', ['technology', 'account', 'region', 'resource'])
+
+# Technologies stored with the 'universal' region.
+GLOBAL_TECHNOLOGIES = set(['iamuser', 'iamrole', 'iamgroup', 'policy', 'iamssl'])
+
+# Technologies stored in a region that may differ from the region reporting the event.
+REGION_INDEPENDENT_TECHNOLOGIES = GLOBAL_TECHNOLOGIES | set(['s3'])
+
+# Technologies whose item name is the resource identifier, so new resources can be fetched by name.
+NAMED_BY_RESOURCE = GLOBAL_TECHNOLOGIES | set(['s3', 'sqs', 'sns', 'elb', 'redshift', 'keypair', 'ses', 'elasticip'])
+
+# API calls that never change anything.
+READ_ONLY_PREFIXES = ('Describe', 'List', 'Get', 'Head', 'Lookup')
+
+
+def _last_arn_segment(arn):
+    return arn.split(':')[-1].split('/')[-1]
+
+
+def _last_url_segment(url):
+    return url.rstrip('/').split('/')[-1]
+
+
+# eventSource: [(request or response key, technology, identifier to resource)]
+CLOUDTRAIL_RESOURCES = {
+    'ec2.amazonaws.com': [
+        ('groupId', 'securitygroup', None),
+        ('vpcId', 'vpc', None),
+        ('subnetId', 'subnet', None),
+        ('routeTableId', 'routetable', None),
+        ('keyName', 'keypair', None),
+        ('publicIp', 'elasticip', None),
+        ('instanceId', 'ec2', None),
+    ],
+    'iam.amazonaws.com': [
+        ('userName', 'iamuser', None),
+        ('roleName', 'iamrole', None),
+        ('groupName', 'iamgroup', None),
+        ('policyArn', 'policy', _last_arn_segment),
+        ('serverCertificateName', 'iamssl', None),
+    ],
+    's3.amazonaws.com': [('bucketName', 's3', None)],
+    'sqs.amazonaws.com': [('queueUrl', 'sqs', _last_url_segment)],
+    'sns.amazonaws.com': [('topicArn', 'sns', _last_arn_segment)],
+    'elasticloadbalancing.amazonaws.com': [('loadBalancerName', 'elb', None)],
+    'rds.amazonaws.com': [('dBSecurityGroupName', 'rds', None)],
+    'redshift.amazonaws.com': [('clusterIdentifier', 'redshift', None)],
+    'ses.amazonaws.com': [('identity', 'ses', None)],
+}
+
+# resourceType: (technology, configuration item key holding the identifier)
+CONFIG_RESOURCES = {
+    'AWS::EC2::SecurityGroup': ('securitygroup', 'resourceId'),
+    'AWS::EC2::Instance': ('ec2', 'resourceId'),
+    'AWS::EC2::VPC': ('vpc', 'resourceId'),
+    'AWS::EC2::Subnet': ('subnet', 'resourceId'),
+    'AWS::EC2::RouteTable': ('routetable', 'resourceId'),
+    'AWS::EC2::EIP': ('elasticip', 'resourceName'),
+    'AWS::IAM::User': ('iamuser', 'resourceName'),
+    'AWS::IAM::Role': ('iamrole', 'resourceName'),
+    'AWS::IAM::Group': ('iamgroup', 'resourceName'),
+    'AWS::IAM::Policy': ('policy', 'resourceName'),
+    'AWS::S3::Bucket': ('s3', 'resourceName'),
+    'AWS::ElasticLoadBalancing::LoadBalancer': ('elb', 'resourceName'),
+    'AWS::Redshift::Cluster': ('redshift', 'resourceId'),
+    'AWS::RDS::DBSecurityGroup': ('rds', 'resourceId'),
+}
+
+
+def parse_event(body):
+    """
+    Understands, with or without an SNS envelope:
+      - CloudWatch Events for CloudTrail API calls and Config item changes
+      - raw CloudTrail records, alone or in a {"Records": [...]} list
+      - AWS Config item change notifications
+      - {"technology": ..., "account": ..., "region": ..., "resource": ...},
+        for sending refreshes by hand.
+    :returns: list of ResourceEvent.  Unknown and read-only events give none.
+    """
+    try:
+        message = json.loads(body)
+    except ValueError:
+        app.logger.warn("Ignoring event that is not JSON: {}".format(body[:200]))
+        return []
+    return _resource_events(message)
+
+
+def _resource_events(message):
+    if not isinstance(message, dict):
+        return []
+    if message.get('Type') == 'Notification' and 'Message' in message:
+        try:
+            return _resource_events(json.loads(message['Message']))
+        except ValueError:
+            return []
+    if isinstance(message.get('Records'), list):
+        events = []
+        for record in message['Records']:
+            events.extend(_resource_events(record))
+        return events
+    if isinstance(message.get('detail'), dict):
+        message = message['detail']
+    config_item = message.get('configurationItem') or message.get('configurationItemSummary')
+    if config_item:
+        return _config_events(config_item)
+    if 'eventSource' in message:
+        return _cloudtrail_events(message)
+    if 'technology' in message and 'account' in message:
+        return [_resource_event(message['technology'], message['account'],
+                                message.get('region'), message.get('resource'))]
+    return []
+
+
+def _resource_event(technology, account, region, resource):
+    if technology in GLOBAL_TECHNOLOGIES:
+        region = 'universal'
+    return ResourceEvent(technology, account, region, resource)
+
+
+def _cloudtrail_events(record):
+    if record.get('errorCode') or record.get('eventName', '').startswith(READ_ONLY_PREFIXES):
+        return []
+    account = record.get('recipientAccountId') or record.get('userIdentity', {}).get('accountId')
+    region = record.get('awsRegion')
+    events = []
+    for (key, technology, to_resource) in CLOUDTRAIL_RESOURCES.get(record.get('eventSource'), []):
+        for parameters in [record.get('requestParameters'), record.get('responseElements')]:
+            for identifier in _find_values(parameters, key):
+                resource = to_resource(identifier) if to_resource else identifier
+                events.append(_resource_event(technology, account, region, resource))
+    return sorted(set(events))
+
+
+def _config_events(config_item):
+    resource_type = CONFIG_RESOURCES.get(config_item.get('resourceType'))
+    if not resource_type:
+        return []
+    (technology, key) = resource_type
+    resource = config_item.get(key) or config_item.get('resourceId')
+    return [_resource_event(technology, config_item.get('awsAccountId'), config_item.get('awsRegion'), resource)]
+
+
+def _find_values(data, key):
+    """
+    :returns: every string value of key in the nested dicts and lists of data.
+    """
+    values = []
+    if isinstance(data, dict):
+        for (data_key, value) in data.items():
+            if data_key == key and isinstance(value, basestring):
+                values.append(value)
+            else:
+                values.extend(_find_values(value, key))
+    elif isinstance(data, list):
+        for value in data:
+            values.extend(_find_values(value, key))
+    return values
+
+
+def _like_escape(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def resolve_locations(technology, account_name, region, resource):
+    """
+    Finds the stored items an identifier refers to.  Item names often embed
+    the identifier, as in "name (sg-1234 in vpc-5678)".
+    :returns: list of (account, region, name) locations.  A name of None asks for
+        the whole (account, region), for resources the database does not know yet
+        and that cannot be fetched by identifier.
+    """
+    if resource is None:
+        return [(account_name, region, None)]
+
+    escaped = _like_escape(resource)
+    query = Item.query.join((Technology, Item.tech_id == Technology.id)) \
+        .join((Account, Item.account_id == Account.id)) \
+        .filter(Technology.name == technology) \
+        .filter(Account.name == account_name) \
+        .filter(or_(Item.name == resource,
+                    Item.name.like(escaped + ' (%', escape='\\'),
+                    Item.name.like('%(' + escaped + ' %', escape='\\'),
+                    Item.name.like('%(' + escaped + ')%', escape='\\')))
+    if technology not in REGION_INDEPENDENT_TECHNOLOGIES:
+        query = query.filter(Item.region == region)
+
+    locations = [(account_name, item.region, item.name) for item in query.all()]
+    if locations:
+        return locations
+    if technology in NAMED_BY_RESOURCE:
+        return [(account_name, region, resource)]
+    return [(account_name, region, None)]
+
+
+def _account_name(account):
+    """
+    :returns: the name of the monitored account with the given number or name, or None.
+    """
+    account = str(account)
+    match = registry.account_by_number(account)
+    if match is None and not account.isdigit():
+        match = registry.account_by_name(account)
+    if match is None or match.third_party or not match.active:
+        return None
+    return match.name
+
+
+def _collapse(locations):
+    """
+    Drops named locations covered by a whole (account, region) refresh.
+    """
+    partitions = set([(account, region) for (account, region, name) in locations if name is None])
+    return sorted([(account, region, name) for (account, region, name) in locations
+                   if name is None or (account, region) not in partitions])
+
+
+def handle_events(queued_events):
+    """
+    Refreshes the items the events refer to, one refresh per technology.
+    :returns: the queued events that were handled and can be deleted.
+        The others are handed out again once their visibility timeout expires.
+    """
+    from security_monkey.scheduler import refresh_items
+
+    locations = {}
+    techs_of_event = []
+    for queued_event in queued_events:
+        techs = set()
+        for event in parse_event(queued_event.body):
+            if get_monitor(event.technology) is None or not event.region:
+                continue
+            account_name = _account_name(event.account)
+            if account_name is None:
+                continue
+            for location in resolve_locations(event.technology, account_name, event.region, event.resource):
+                locations.setdefault(event.technology, set()).add(location)
+            techs.add(event.technology)
+        techs_of_event.append((queued_event, techs))
+
+    failed = set()
+    for technology in sorted(locations):
+        tech_locations = _collapse(locations[technology])
+        try:
+            changes = refresh_items(technology, tech_locations)
+            app.logger.info("Event refresh of {} {} locations: {} created, {} changed, {} deleted".format(
+                len(tech_locations), technology, len(changes.created), len(changes.changed), len(changes.deleted)))
+        except Exception as e:
+            app.logger.error("Event refresh of {} failed: {}".format(technology, e))
+            app.logger.error(traceback.format_exc())
+            db.session.rollback()
+            failed.add(technology)
+
+    return [queued_event for (queued_event, event_techs) in techs_of_event if not event_techs & failed]
+
+
+def run_event_worker():
+    """
+    Consumes the queue configured with EVENT_QUEUE_BACKEND until interrupted.
+    """
+    queue = get_event_queue()
+    if queue is None:
+        raise ValueError("EVENT_QUEUE_BACKEND is not set")
+
+    batch_size = app.config.get('EVENT_BATCH_SIZE', 10)
+    wait_time = app.config.get('EVENT_WAIT_TIME', 20)
+    while True:
+        queued_events = queue.receive(batch_size, wait_time)
+        if not queued_events:
+            continue
+        for queued_event in handle_events(queued_events):
+            queue.delete(queued_event)
+        db.session.close()
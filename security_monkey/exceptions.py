@@ -108,3 +108,35 @@ class AWSRateLimitReached(SecurityMonkeyException):
     def __str__(self):
         return repr("Likely reached the AWS rate limit. {}/{}/{}:\n{}".format(
             self.tech, self.account, self.region, self.connection_message))
+
+
+class PartitionSkipped(SecurityMonkeyException):
+    """
+    A partition was left out on purpose.  Keeps its items from being deleted,
+    but is not a failure and is not retried.
+    """
+    pass
+
+
+class RegionSkipped(PartitionSkipped):
+    """The region keeps failing or coming back empty and was not scanned this run."""
+    def __init__(self, tech, account, region):
+        self.tech = tech
+        self.account = account
+        self.region = region
+
+    def __str__(self):
+        return repr("Skipped cold region {}/{}/{}".format(
+            self.tech, self.account, self.region))
+
+
+class RegionNotScanned(PartitionSkipped):
+    """The watcher does not scan this region for the account."""
+    def __init__(self, tech, account, region):
+        self.tech = tech
+        self.account = account
+        self.region = region
+
+    def __str__(self):
+        return repr("Region {} is not scanned for {}/{}".format(
+            self.region, self.tech, self.account))
@@ -24,6 +24,10 @@
 
 from security_monkey.alerter import Alerter
 from security_monkey.monitors import all_monitors
+from security_monkey.common.connection_registry import connection_registry
+from security_monkey.common.concurrency import map_in_threads, prefetch, StageTimer
+from security_monkey.common.rate_limiter import rate_limiter
+from security_monkey.common.inventory import inventory
 from security_monkey import app, db
 
 import time
@@ -51,29 +55,57 @@ class Reporter(object):
         """Starts the process of watchers -> auditors -> alerters -> watchers.save()"""
         app.logger.info("Starting work on account {}.".format(account))
         time1 = time.time()
-        for (watcher, auditor) in self.get_watchauditors(account, interval):
-            app.logger.info("Running {} for {} ({} minutes interval)".format(watcher.i_am_singular, account, interval))
-            (items, exception_map) = watcher.slurp()
-            watcher.find_changes(current=items, exception_map=exception_map)
-            items_to_audit = [item for item in watcher.created_items + watcher.changed_items]
 
-            if len(items_to_audit) > 0 and auditor is not None:
-                auditor.audit_these_objects(items_to_audit)
-
-            if auditor is not None:
-                auditor.save_issues()
+        def run_watcher(watchauditor):
+            (watcher, auditor) = watchauditor
+            self._run_watcher(account, interval, watcher, auditor)
 
-            watcher.save()
-            app.logger.info("Account {} is done with {}".format(account, watcher.i_am_singular))
+        with connection_registry.hold(account):
+            map_in_threads(run_watcher, self.get_watchauditors(account, interval),
+                           app.config.get('TECH_WORKERS', 1))
 
         time2 = time.time()
         app.logger.info('Run Account %s took %0.1f s' % (account, (time2-time1)))
+        for ((_, endpoint), stats) in rate_limiter.stats(account).items():
+            if stats['throttles'] or stats['waits']:
+                app.logger.info('Rate limiter {} for {}: {calls} calls, {throttles} throttles, '
+                                '{waits} waits ({wait_time:0.1f} s), now {rate:0.2f} calls/s'
+                                .format(endpoint, account, **stats))
 
         if account in self.account_alerters:
             self.account_alerters[account].report()
 
+        inventory.invalidate(account)
+        connection_registry.close(account)
         db.session.close()
 
+    def _run_watcher(self, account, interval, watcher, auditor):
+        """
+        Slurps, audits and saves a single technology for the given account,
+        one (account, region) partition at a time.  Slurping, change detection
+        and auditing/saving run in their own threads, connected by queues of
+        at most PIPELINE_QUEUE_SIZE partitions, so the next partitions are
+        fetched while the previous ones are diffed and written.
+        """
+        app.logger.info("Running {} for {} ({} minutes interval)".format(watcher.i_am_singular, account, interval))
+        timer = StageTimer()
+        queue_size = app.config.get('PIPELINE_QUEUE_SIZE', 2)
+
+        batches = prefetch(timer.iterate('slurp', watcher.slurp_stream()), queue_size)
+        partition_changes = prefetch(timer.pipe('diff', watcher.find_changes_stream, batches), queue_size)
+        for changes in partition_changes:
+            items_to_audit = changes.created + changes.changed
+
+            if len(items_to_audit) > 0 and auditor is not None:
+                with timer.stage('audit'):
+                    auditor.audit_these_objects(items_to_audit)
+                    auditor.save_issues()
+
+            with timer.stage('save'):
+                watcher.save(changes)
+
+        app.logger.info("Account {} is done with {}: {}".format(account, watcher.i_am_singular, timer.summary()))
+
     def get_watchauditors(self, account, interval=None):
         """
         Return a list of (watcher, auditor) enabled for a specific account,
@@ -11,9 +11,12 @@
 from apscheduler.threadpool import ThreadPool
 from apscheduler.scheduler import Scheduler
 
-from security_monkey.datastore import Account
+from security_monkey.datastore import Account, Datastore
 from security_monkey.monitors import all_monitors, get_monitor
 from security_monkey.reporter import Reporter
+from security_monkey.common.connection_registry import connection_registry
+from security_monkey.common.concurrency import map_in_threads
+from security_monkey.common.inventory import inventory
 
 from security_monkey import app, db, handler, jirasync
 
@@ -43,15 +46,24 @@ def run_change_reporter(accounts, interval=None):
     """ Runs Reporter """
     accounts = __prep_accounts__(accounts)
     reporter = Reporter(accounts=accounts, alert_accounts=accounts, debug=True)
-    for account in accounts:
-        reporter.run(account, interval)
+    map_in_threads(lambda account: reporter.run(account, interval), accounts,
+                   app.config.get('ACCOUNT_WORKERS', 1))
 
 
 def find_changes(accounts, monitor_names, debug=True):
     monitor_names = __prep_monitor_names__(monitor_names)
-    for monitor_name in monitor_names:
-        monitor = get_monitor(monitor_name)
-        _find_changes(accounts, monitor, debug)
+    monitors = [get_monitor(monitor_name) for monitor_name in monitor_names]
+
+    def find_account_changes(account):
+        with connection_registry.hold(account):
+            map_in_threads(lambda monitor: _find_changes(account, monitor, debug), monitors,
+                           app.config.get('TECH_WORKERS', 1))
+        # Only once every technology is done, as they share the account's connections and inventory.
+        inventory.invalidate(account)
+        connection_registry.close(account)
+
+    map_in_threads(find_account_changes, __prep_accounts__(accounts),
+                   app.config.get('ACCOUNT_WORKERS', 1))
 
 
 def audit_changes(accounts, monitor_names, send_report, debug=True):
@@ -63,25 +75,92 @@ def audit_changes(accounts, monitor_names, send_report, debug=True):
         if monitor.has_auditor():
             auditors.append(monitor.auditor_class(accounts=accounts, debug=True))
     if auditors:
-        _audit_changes(accounts, auditors, send_report, debug)
+        map_in_threads(lambda auditor: _audit_changes(accounts, [auditor], send_report, debug), auditors,
+                       app.config.get('TECH_WORKERS', 1))
 
 
 def _find_changes(accounts, monitor, debug=True):
     """ Runs a watcher and auditor on changed items """
     accounts = __prep_accounts__(accounts)
     cw = monitor.watcher_class(accounts=accounts, debug=True)
-    (items, exception_map) = cw.slurp()
-    cw.find_changes(current=items, exception_map=exception_map)
+    au = monitor.auditor_class(accounts=accounts, debug=True) if monitor.has_auditor() else None
 
-    # Audit these changed items
-    if monitor.has_auditor():
-        items_to_audit = [item for item in cw.created_items + cw.changed_items]
+    for changes in cw.find_changes_stream():
+        # Audit these changed items
+        if au is not None:
+            items_to_audit = changes.created + changes.changed
+            au.audit_these_objects(items_to_audit)
+            au.save_issues()
 
-        au = monitor.auditor_class(accounts=accounts, debug=True)
-        au.audit_these_objects(items_to_audit)
-        au.save_issues()
+        cw.save(changes)
+    db.session.close()
+
+
+def refresh_items(monitor_name, locations):
+    """
+    Re-slurps, audits and saves only the items of a technology at the given
+    (account, region, name) locations, without touching any other item.
+    :returns: PartitionChanges for the given items.
+    """
+    monitor = get_monitor(monitor_name)
+    accounts = sorted(set([account for (account, region, name) in locations]))
+    for account in accounts:
+        # The point of a refresh is to see the current state, not this cycle's snapshot.
+        inventory.invalidate(account)
+
+    for account in accounts:
+        connection_registry.acquire(account)
+    try:
+        cw = monitor.watcher_class(accounts=accounts, debug=True)
+        changes = cw.find_changes_for_locations(locations)
 
-    cw.save()
+        if monitor.has_auditor():
+            items_to_audit = changes.created + changes.changed
+            if items_to_audit:
+                au = monitor.auditor_class(accounts=accounts, debug=True)
+                au.audit_these_objects(items_to_audit)
+                au.save_issues()
+
+        cw.save(changes)
+    finally:
+        for account in accounts:
+            connection_registry.release(account)
+    return changes
+
+
+def retry_failed_partitions():
+    """
+    Re-slurps the (account, region) partitions that failed in an earlier run
+    and are due for a retry, leaving every other partition alone.
+    A failed account re-runs all of its partitions.
+    """
+    datastore = Datastore()
+    for (tech, account, region) in datastore.get_due_failed_partitions():
+        monitor = get_monitor(tech)
+        if monitor is None:
+            continue
+        app.logger.info("Retrying {} in {}/{}".format(tech, account, region or 'all regions'))
+        try:
+            if region is None:
+                with connection_registry.hold(account):
+                    _find_changes(account, monitor)
+            else:
+                refresh_items(tech, [(account, region, None)])
+        except Exception as e:
+            app.logger.warn("Retry of {} in {}/{} failed: {}".format(tech, account, region, e))
+            db.session.rollback()
+            # Slurp errors are recorded by save().  Anything else still needs to back off.
+            datastore.record_partition_results(tech, [], {(account, region): e})
+    db.session.close()
+
+
+def repair_latest_revisions():
+    """ Fixes items whose latest_revision_id drifted from their newest revision """
+    try:
+        Datastore().repair_latest_revisions()
+    except Exception as e:
+        app.logger.warn("Latest revision repair failed: {}".format(e))
+        db.session.rollback()
     db.session.close()
 
 
@@ -121,6 +200,9 @@ def setup_scheduler():
     log.setLevel(app.config.get('LOG_LEVEL'))
     log.addHandler(handler)
 
+    # Before the first watcher run, which would not see items with an unset latest_revision_id.
+    repair_latest_revisions()
+
     try:
         accounts = Account.query.filter(Account.third_party==False).filter(Account.active==True).all()
         accounts = [account.name for account in accounts]
@@ -128,9 +210,13 @@ def setup_scheduler():
             print "Scheduler adding account {}".format(account)
             rep = Reporter(accounts=[account])
             for period in rep.get_intervals(account):
+                minutes = period
+                if app.config.get('EVENT_QUEUE_BACKEND'):
+                    # The event worker keeps items current, so full sweeps only reconcile what it missed.
+                    minutes = max(period, app.config.get('RECONCILIATION_INTERVAL', 60))
                 scheduler.add_interval_job(
                     run_change_reporter,
-                    minutes=period,
+                    minutes=minutes,
                     start_date=datetime.now()+timedelta(seconds=2),
                     args=[account, period]
                 )
@@ -138,6 +224,17 @@ def setup_scheduler():
             if auditors:
                 scheduler.add_cron_job(_audit_changes, hour=10, day_of_week="mon-fri", args=[account, auditors, True])
 
+        scheduler.add_interval_job(
+            retry_failed_partitions,
+            seconds=app.config.get('FAILED_PARTITION_RETRY_INTERVAL', 60),
+            start_date=datetime.now()+timedelta(seconds=30)
+        )
+        scheduler.add_interval_job(
+            repair_latest_revisions,
+            minutes=app.config.get('LATEST_REVISION_REPAIR_INTERVAL', 60),
+            start_date=datetime.now()+timedelta(minutes=5)
+        )
+
     except Exception as e:
         app.logger.warn("Scheduler Exception: {}".format(e))
         app.logger.warn(traceback.format_exc())
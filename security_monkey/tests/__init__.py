@@ -22,6 +22,12 @@
 
 import unittest
 from security_monkey import app, db
+from security_monkey.common.connection_registry import connection_registry
+from security_monkey.common.region_catalog import region_catalog
+from security_monkey.common.inventory import inventory
+from security_monkey.common.ignore_matcher import ignore_matcher
+from security_monkey.datastore import item_id_cache
+from security_monkey.common.account_registry import registry
 
 
 class SecurityMonkey(object):
@@ -30,6 +36,12 @@ class SecurityMonkey(object):
     db.create_all()
 
   def tearDown(self):
+    connection_registry.close()
+    region_catalog.clear()
+    inventory.invalidate()
+    ignore_matcher.invalidate()
+    item_id_cache.clear()
+    registry.invalidate()
     db.session.remove()
     # db.drop_all()
 
@@ -0,0 +1,61 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.account_registry import AccountRegistry, registry
+from security_monkey.common.utils.utils import add_account
+from security_monkey.datastore import Account
+from security_monkey import db
+
+import random
+
+
+class AccountRegistryTestCase(SecurityMonkeyTestCase):
+
+    def setUp(self):
+        super(AccountRegistryTestCase, self).setUp()
+        # The test database is not dropped between tests.
+        self.number = str(random.randint(10 ** 11, 10 ** 12 - 1))
+        self.name = 'registry{}'.format(self.number[-6:])
+
+    def test_lookups(self):
+        add_account(self.number, False, self.name, self.name + '-s3', True, 'notes')
+
+        account = registry.account_by_name(self.name)
+        self.assertEqual((account.number, account.s3_name, account.third_party, account.active),
+                         (self.number, self.name + '-s3', False, True))
+        self.assertIs(registry.account_by_number(self.number), account)
+        self.assertIs(registry.account_by_s3_name(self.name + '-s3'), account)
+        self.assertIs(registry.account_by_id(account.id), account)
+
+    def test_lookups_are_served_from_memory(self):
+        accounts = AccountRegistry()
+        add_account(self.number, False, self.name, self.name, True, '')
+        self.assertEqual(accounts.account_by_number(self.number).name, self.name)
+
+        # A change made behind the registry's back is only seen after invalidate().
+        Account.query.filter(Account.number == self.number).update({Account.active: False})
+        db.session.commit()
+        self.assertTrue(accounts.account_by_number(self.number).active)
+        accounts.invalidate()
+        self.assertFalse(accounts.account_by_number(self.number).active)
+
+    def test_unknown_name_reloads(self):
+        accounts = AccountRegistry()
+        accounts.accounts()
+        # Accounts added by another process are found by name without waiting for REGISTRY_CACHE_TTL.
+        db.session.add(Account(name=self.name, number=self.number, active=True, third_party=False))
+        db.session.commit()
+
+        self.assertIsNone(accounts.account_by_number(self.number))
+        self.assertEqual(accounts.account_by_name(self.name).number, self.number)
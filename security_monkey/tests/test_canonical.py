@@ -0,0 +1,41 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.utils.canonical import canonical_bytes, config_hash, configs_equal
+
+import datetime
+import decimal
+import json
+
+
+class CanonicalTestCase(SecurityMonkeyTestCase):
+
+    def test_order_does_not_matter(self):
+        config_a = {'rules': [{'from_port': 22, 'cidr_ip': '10.0.0.0/8'}, {'from_port': 443, 'cidr_ip': '0.0.0.0/0'}],
+                    'name': 'web'}
+        config_b = {'name': u'web',
+                    'rules': [{'cidr_ip': u'0.0.0.0/0', 'from_port': 443}, {'cidr_ip': '10.0.0.0/8', 'from_port': 22}]}
+        self.assertTrue(configs_equal(config_a, config_b))
+        self.assertEqual(config_hash(config_a), config_hash(config_b))
+        self.assertFalse(configs_equal(config_a, {'name': 'web', 'rules': []}))
+
+    def test_survives_json_round_trip(self):
+        config = {'tags': set(['b', 'a']), 'ports': (1, 2), 1: None, 'ratio': 0.5, 'count': 10L}
+        self.assertEqual(canonical_bytes(config), canonical_bytes(json.loads(json.dumps(
+            {'tags': ['a', 'b'], 'ports': [2, 1], 1: None, 'ratio': 0.5, 'count': 10}))))
+
+    def test_other_types(self):
+        self.assertEqual(canonical_bytes({'date': datetime.datetime(2015, 7, 1, 12, 0, 0)}),
+                         '{"date":"2015-07-01T12:00:00"}')
+        self.assertEqual(canonical_bytes([decimal.Decimal('2'), decimal.Decimal('0.5'), True]), '[0.5,2,true]')
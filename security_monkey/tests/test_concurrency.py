@@ -0,0 +1,70 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.concurrency import prefetch, StageTimer
+
+import threading
+import time
+
+
+class ConcurrencyTestCase(SecurityMonkeyTestCase):
+
+    def test_prefetch_stays_bounded(self):
+        """The producer never gets more than `size` items ahead of the consumer."""
+        produced = []
+        ahead = []
+
+        def source():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        consumed = 0
+        for value in prefetch(source(), 2):
+            time.sleep(0.01)
+            consumed += 1
+            ahead.append(len(produced) - consumed)
+        self.assertEqual(consumed, 10)
+        # One item may be in the producer's hands on top of the queued ones.
+        self.assertTrue(max(ahead) <= 3)
+
+    def test_prefetch_reraises_errors(self):
+        def source():
+            yield 1
+            raise ValueError("slurp failed")
+
+        results = []
+        with self.assertRaises(ValueError):
+            for value in prefetch(source(), 2):
+                results.append(value)
+        self.assertEqual(results, [1])
+
+    def test_prefetch_runs_in_another_thread(self):
+        threads = []
+
+        def source():
+            threads.append(threading.current_thread())
+            yield 1
+
+        self.assertEqual(list(prefetch(source(), 1)), [1])
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_stage_timer(self):
+        timer = StageTimer()
+        with timer.stage('audit'):
+            time.sleep(0.01)
+        list(timer.iterate('slurp', [1, 2]))
+        self.assertEqual(timer.stages, ['audit', 'slurp'])
+        self.assertTrue(timer.totals['audit'] >= 0.01)
+        self.assertTrue(timer.summary().startswith('audit '))
@@ -0,0 +1,53 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.connection_registry import ConnectionRegistry
+from security_monkey import app
+from mock import patch
+from mock import MagicMock
+
+
+class ConnectionRegistryTestCase(SecurityMonkeyTestCase):
+
+    def tearDown(self):
+        app.config.pop('CONNECTION_MAX_AGE', None)
+        super(ConnectionRegistryTestCase, self).tearDown()
+
+    @patch('security_monkey.common.sts_connect.connect')
+    def test_expired_connection_is_closed(self, test_patch):
+        old, new = MagicMock(), MagicMock()
+        test_patch.side_effect = [old, new]
+
+        registry = ConnectionRegistry()
+        self.assertIs(registry.connect('test', 'ec2', region='us-east-1'), old)
+        app.config['CONNECTION_MAX_AGE'] = -1
+        self.assertIs(registry.connect('test', 'ec2', region='us-east-1'), new)
+
+        self.assertEqual(old.close.call_count, 1)
+        self.assertEqual(new.close.call_count, 0)
+
+    @patch('security_monkey.common.sts_connect.connect')
+    def test_close_waits_for_holders(self, test_patch):
+        conn = MagicMock()
+        test_patch.return_value = conn
+
+        registry = ConnectionRegistry()
+        registry.acquire('test')
+        with registry.hold('test'):
+            registry.connect('test', 'ec2', region='us-east-1')
+        registry.close('test')
+        self.assertEqual(conn.close.call_count, 0)
+
+        registry.release('test')
+        self.assertEqual(conn.close.call_count, 1)
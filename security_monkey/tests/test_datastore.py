@@ -0,0 +1,190 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Datastore, Item, ItemRevision, ItemAudit, FailedPartition, StoredItem
+from security_monkey.datastore import filter_config_contains
+from security_monkey.common.utils.utils import add_account
+from security_monkey import app, db
+from mock import patch
+from mock import MagicMock
+from mock import call
+
+import uuid
+
+
+class DatastoreTestCase(SecurityMonkeyTestCase):
+
+    def setUp(self):
+        super(DatastoreTestCase, self).setUp()
+        add_account('000000000012', False, 'datastore_test', 'datastore_test', True, '')
+        self.datastore = Datastore()
+        # The test database is not dropped between tests.
+        self.tech = 'test{}'.format(uuid.uuid4().hex[:8])
+
+    def tearDown(self):
+        app.config.pop('FAILED_PARTITION_RETRY_BASE', None)
+        app.config.pop('REVISION_STORAGE', None)
+        super(DatastoreTestCase, self).tearDown()
+
+    def _item(self, name):
+        return Item.query.filter(Item.name == name).filter(Item.region == 'us-east-1') \
+            .filter(Item.tech_id == self.datastore._get_technology_id(self.tech)).one()
+
+    def test_get_latest_revisions(self):
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'web', True, {'port': 80})
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'web', True, {'port': 443})
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'gone', False, {})
+
+        latest = list(self.datastore.get_latest_revisions(self.tech, 'datastore_test', include_config=True))
+
+        self.assertEqual([(item.name, item.account, item.config) for item in latest],
+                         [('web', 'datastore_test', {'port': 443})])
+        self.assertEqual(latest[0].revision_id, self._item('web').latest_revision_id)
+
+        everything = self.datastore.get_latest_revisions(self.tech, 'datastore_test', include_inactive=True)
+        self.assertEqual(sorted([item.name for item in everything]), ['gone', 'web'])
+
+    def test_get_latest_revisions_does_not_write(self):
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'unset', True, {'v': 1})
+        Item.query.filter(Item.id == self._item('unset').id).update({Item.latest_revision_id: None})
+        db.session.commit()
+
+        self.assertEqual(list(self.datastore.get_latest_revisions(self.tech, 'datastore_test')), [])
+        db.session.rollback()
+        self.assertIsNone(self._item('unset').latest_revision_id)
+
+    def test_repair_job(self):
+        """The scheduled repair points drifted and missing pointers back at the newest revision."""
+        from security_monkey.scheduler import repair_latest_revisions
+
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'drifted', True, {'v': 1})
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'drifted', True, {'v': 2})
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'missing', True, {'v': 1})
+        drifted, missing = self._item('drifted'), self._item('missing')
+        newest = {drifted.id: drifted.latest_revision_id, missing.id: missing.latest_revision_id}
+        oldest = ItemRevision.query.filter(ItemRevision.item_id == drifted.id) \
+            .order_by(ItemRevision.id).first()
+        Item.query.filter(Item.id == drifted.id).update({Item.latest_revision_id: oldest.id})
+        Item.query.filter(Item.id == missing.id).update({Item.latest_revision_id: None})
+        db.session.commit()
+
+        repair_latest_revisions()
+
+        for item_id, revision_id in newest.items():
+            self.assertEqual(Item.query.get(item_id).latest_revision_id, revision_id)
+
+    def _failed_partitions(self):
+        return FailedPartition.query.filter(FailedPartition.tech_id == self.datastore._get_technology_id(self.tech)).all()
+
+    def test_failed_partition_backs_off(self):
+        self.datastore.record_partition_results(self.tech, [], {('datastore_test', 'us-east-1'): ValueError('boom')})
+
+        failed, = self._failed_partitions()
+        self.assertEqual((failed.region, failed.attempts, failed.last_error), ('us-east-1', 1, 'boom'))
+        self.assertNotIn((self.tech, 'datastore_test', 'us-east-1'), self.datastore.get_due_failed_partitions())
+
+        app.config['FAILED_PARTITION_RETRY_BASE'] = 0
+        self.datastore.record_partition_results(self.tech, [], {('datastore_test', 'us-east-1'): ValueError('boom')})
+
+        self.assertEqual(self._failed_partitions()[0].attempts, 2)
+        self.assertIn((self.tech, 'datastore_test', 'us-east-1'), self.datastore.get_due_failed_partitions())
+
+    def test_failed_partition_is_cleared(self):
+        """Slurping the region successfully, or its whole account, deletes the failure."""
+        failures = {('datastore_test', 'us-east-1'): ValueError('boom'), ('datastore_test', 'us-west-2'): ValueError('boom')}
+        self.datastore.record_partition_results(self.tech, [], failures)
+
+        self.datastore.record_partition_results(self.tech, [('datastore_test', 'us-east-1')], {})
+        self.assertEqual([failed.region for failed in self._failed_partitions()], ['us-west-2'])
+
+        self.datastore.record_partition_results(self.tech, [('datastore_test', None)], {})
+        self.assertEqual(self._failed_partitions(), [])
+
+    @patch('security_monkey.scheduler.refresh_items')
+    @patch('security_monkey.scheduler.get_monitor')
+    def test_failed_partition_is_retried(self, monitor_patch, refresh_patch):
+        """A due region is refreshed on its own."""
+        from security_monkey.scheduler import retry_failed_partitions
+
+        monitor_patch.return_value = MagicMock()
+        app.config['FAILED_PARTITION_RETRY_BASE'] = 0
+        self.datastore.record_partition_results(self.tech, [], {('datastore_test', 'us-east-1'): ValueError('boom')})
+
+        retry_failed_partitions()
+
+        self.assertIn(call(self.tech, [('datastore_test', 'us-east-1', None)]), refresh_patch.call_args_list)
+
+    def test_store_many(self):
+        issue = ItemAudit(score=5, issue='Open to the world', notes='0.0.0.0/0')
+        self.datastore.store_many(self.tech, [
+            StoredItem('us-east-1', 'datastore_test', 'a', True, {'port': 80}, [issue]),
+            StoredItem('us-east-1', 'datastore_test', 'b', True, {'port': 22}, []),
+        ])
+        self.datastore.store_many(self.tech, [
+            StoredItem('us-east-1', 'datastore_test', 'a', True, {'port': 443}, []),
+        ])
+
+        latest = self.datastore.get_latest_revisions(self.tech, 'datastore_test', include_config=True)
+        self.assertEqual(sorted([(item.name, item.config) for item in latest]),
+                         [('a', {'port': 443}), ('b', {'port': 22})])
+        self.assertEqual(ItemRevision.query.filter(ItemRevision.item_id == self._item('a').id).count(), 2)
+        # The issue is gone from the second revision.
+        self.assertEqual(ItemAudit.query.filter(ItemAudit.item_id == self._item('a').id).count(), 0)
+
+    def test_store_many_concurrent_insert(self):
+        """An item created by another process between the lookup and the insert does not lose the batch."""
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'raced', True, {'v': 1})
+        real_get_item_ids = self.datastore._get_item_ids
+        lookups = []
+
+        def stale_lookup(*args):
+            # The first lookup happens before the other process commits its item.
+            lookups.append(args)
+            if len(lookups) == 1:
+                return {}
+            return real_get_item_ids(*args)
+
+        with patch.object(self.datastore, '_get_item_ids', side_effect=stale_lookup):
+            self.datastore.store_many(self.tech, [
+                StoredItem('us-east-1', 'datastore_test', 'raced', True, {'v': 2}, []),
+                StoredItem('us-east-1', 'datastore_test', 'fresh', True, {'v': 1}, []),
+            ])
+
+        raced = self._item('raced')
+        self.assertEqual(ItemRevision.query.filter(ItemRevision.item_id == raced.id).count(), 2)
+        self.assertEqual(self._item('fresh').name, 'fresh')
+        latest = self.datastore.get_latest_revisions(self.tech, 'datastore_test', include_config=True)
+        self.assertEqual(sorted([(item.name, item.config) for item in latest]),
+                         [('fresh', {'v': 1}), ('raced', {'v': 2})])
+
+    def test_config_search_on_delta_revisions(self):
+        """A delta revision is found by the values it carried over from its snapshot."""
+        app.config['REVISION_STORAGE'] = 'delta'
+        rules = [{'port': port, 'cidr': '10.0.0.0/8'} for port in range(50)]
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'sg', True,
+                             {'description': 'snapshot-only-text', 'rules': rules})
+        self.datastore.store(self.tech, 'us-east-1', 'datastore_test', 'sg', True,
+                             {'description': 'snapshot-only-text', 'rules': rules + [{'port': 8443}]})
+
+        item_id = self._item('sg').id
+        snapshot, delta = ItemRevision.query.filter(ItemRevision.item_id == item_id).order_by(ItemRevision.id).all()
+        self.assertIsNotNone(delta.snapshot_id)
+
+        def search(text):
+            query = ItemRevision.query.filter(ItemRevision.item_id == item_id)
+            return sorted([revision.id for revision in filter_config_contains(query, text)])
+
+        self.assertEqual(search('SNAPSHOT-ONLY'), [snapshot.id, delta.id])
+        self.assertEqual(search('8443'), [delta.id])
+        self.assertEqual(search('not-in-any-config'), [])
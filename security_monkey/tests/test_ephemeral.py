@@ -0,0 +1,41 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.utils.ephemeral import compile_ephemeral_paths
+from copy import deepcopy
+
+
+class EphemeralTestCase(SecurityMonkeyTestCase):
+
+    def test_durable_view(self):
+        config = {
+            'user': {'password_last_used': '2015-07-01T00:00:00Z', 'arn': 'arn:aws:iam::000000000000:user/test'},
+            'assigned_to': ['i-00000001'],
+            'rules': [{'ip_protocol': 'tcp', 'hits': 3}]
+        }
+        original = deepcopy(config)
+        durable_view = compile_ephemeral_paths(['user$password_last_used', 'assigned_to', 'rules$*$hits'])
+
+        view = durable_view(config)
+
+        self.assertEqual(view, {
+            'user': {'arn': 'arn:aws:iam::000000000000:user/test'},
+            'rules': [{'ip_protocol': 'tcp'}]
+        })
+        self.assertEqual(config, original)
+
+    def test_untouched_config_is_not_copied(self):
+        config = {'user': {'arn': 'arn:aws:iam::000000000000:user/test'}}
+        durable_view = compile_ephemeral_paths(['user$password_last_used'])
+        self.assertTrue(durable_view(config) is config)
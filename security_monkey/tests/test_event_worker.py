@@ -0,0 +1,70 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.event_worker import parse_event, ResourceEvent, _collapse
+from security_monkey.common.event_queue import SQLiteEventQueue
+
+import json
+
+
+class EventWorkerTestCase(SecurityMonkeyTestCase):
+
+    def test_cloudtrail_event(self):
+        event = {
+            "detail-type": "AWS API Call via CloudTrail",
+            "detail": {
+                "eventSource": "ec2.amazonaws.com",
+                "eventName": "AuthorizeSecurityGroupIngress",
+                "awsRegion": "us-west-2",
+                "recipientAccountId": "012345678910",
+                "requestParameters": {"groupId": "sg-12345678"}
+            }
+        }
+        self.assertEqual(parse_event(json.dumps(event)),
+                         [ResourceEvent('securitygroup', '012345678910', 'us-west-2', 'sg-12345678')])
+
+        event['detail']['eventName'] = 'DescribeSecurityGroups'
+        self.assertEqual(parse_event(json.dumps(event)), [])
+
+    def test_config_event_in_sns_envelope(self):
+        notification = {
+            "messageType": "ConfigurationItemChangeNotification",
+            "configurationItem": {
+                "resourceType": "AWS::IAM::Role",
+                "resourceName": "deploy",
+                "resourceId": "AROAEXAMPLE",
+                "awsAccountId": "012345678910",
+                "awsRegion": "us-east-1"
+            }
+        }
+        envelope = {"Type": "Notification", "Message": json.dumps(notification)}
+        self.assertEqual(parse_event(json.dumps(envelope)),
+                         [ResourceEvent('iamrole', '012345678910', 'universal', 'deploy')])
+
+    def test_collapse(self):
+        locations = [('test', 'us-east-1', 'a'), ('test', 'us-east-1', None), ('test', 'us-west-2', 'b')]
+        self.assertEqual(_collapse(locations), [('test', 'us-east-1', None), ('test', 'us-west-2', 'b')])
+
+    def test_sqlite_queue(self):
+        queue = SQLiteEventQueue(':memory:', visibility_timeout=60)
+        queue.send('{"technology": "s3", "account": "test", "region": "us-east-1", "resource": "bucket"}')
+
+        events = queue.receive(max_events=10, wait_time=0)
+        self.assertEqual(len(events), 1)
+        # Received events stay hidden until their visibility timeout expires.
+        self.assertEqual(queue.receive(max_events=10, wait_time=0), [])
+
+        queue.delete(events[0])
+        queue.visibility_timeout = 0
+        self.assertEqual(queue.receive(max_events=10, wait_time=0), [])
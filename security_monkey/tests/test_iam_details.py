@@ -0,0 +1,103 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.iam_details import AuthorizationDetails
+from security_monkey.common.iam_details import PolicyAttachmentIndex
+
+import datetime
+
+USER_ARN = 'arn:aws:iam::000000000000:user/test'
+GROUP_ARN = 'arn:aws:iam::000000000000:group/admins'
+ROLE_ARN = 'arn:aws:iam::000000000000:role/web'
+POLICY_ARN = 'arn:aws:iam::aws:policy/ReadOnlyAccess'
+
+DETAILS = {
+    'UserDetailList': [{
+        'UserName': 'test',
+        'Arn': USER_ARN,
+        'GroupList': ['admins'],
+        'UserPolicyList': [{'PolicyName': 'inline', 'PolicyDocument': '%7B%22Version%22%3A%20%222012-10-17%22%7D'}],
+        'AttachedManagedPolicies': [{'PolicyName': 'ReadOnlyAccess', 'PolicyArn': POLICY_ARN}]
+    }],
+    'GroupDetailList': [{
+        'GroupName': 'admins',
+        'Arn': GROUP_ARN,
+        'GroupPolicyList': [],
+        'AttachedManagedPolicies': []
+    }],
+    'RoleDetailList': [{
+        'RoleName': 'web',
+        'Arn': ROLE_ARN,
+        'AssumeRolePolicyDocument': {'Version': '2012-10-17'},
+        'InstanceProfileList': [{
+            'InstanceProfileName': 'web',
+            'Arn': 'arn:aws:iam::000000000000:instance-profile/web',
+            'CreateDate': datetime.datetime(2015, 1, 2, 3, 4, 5),
+            'Roles': []
+        }],
+        'RolePolicyList': [],
+        'AttachedManagedPolicies': [{'PolicyName': 'ReadOnlyAccess', 'PolicyArn': POLICY_ARN}]
+    }],
+    'Policies': [{
+        'PolicyName': 'ReadOnlyAccess',
+        'Arn': POLICY_ARN,
+        'DefaultVersionId': 'v3',
+        'PolicyVersionList': [
+            {'VersionId': 'v2', 'IsDefaultVersion': False, 'Document': 'old'},
+            {'VersionId': 'v3', 'IsDefaultVersion': True, 'Document': 'current'}
+        ]
+    }]
+}
+
+
+class AuthorizationDetailsTestCase(SecurityMonkeyTestCase):
+
+    def test_user_config(self):
+        details = AuthorizationDetails(DETAILS)
+        self.assertEqual(details.inline_policies(USER_ARN), {'inline': {'Version': '2012-10-17'}})
+        self.assertEqual(details.managed_policies(USER_ARN),
+                         [{'name': 'ReadOnlyAccess', 'arn': POLICY_ARN, 'version': 'v3'}])
+        self.assertEqual(details.group_members(GROUP_ARN), {USER_ARN: 'test'})
+
+    def test_role_config(self):
+        details = AuthorizationDetails(DETAILS)
+        profiles = details.instance_profiles(ROLE_ARN)
+        self.assertEqual(profiles[0]['instance_profile_name'], 'web')
+        self.assertEqual(profiles[0]['create_date'], '2015-01-02T03:04:05Z')
+        self.assertNotIn('roles', profiles[0])
+
+    def test_policy_attachments(self):
+        details = AuthorizationDetails(DETAILS)
+        attachments = details.policy_attachments(POLICY_ARN)
+        self.assertEqual(attachments['users'], [USER_ARN])
+        self.assertEqual(attachments['roles'], [ROLE_ARN])
+        self.assertEqual(attachments['groups'], [])
+        self.assertEqual(details.default_policy_document(POLICY_ARN), 'current')
+
+    def test_unknown_principals_fall_back(self):
+        details = AuthorizationDetails(DETAILS)
+        self.assertIsNone(details.inline_policies('arn:aws:iam::000000000000:user/new'))
+        self.assertIsNone(details.instance_profiles('arn:aws:iam::000000000000:role/new'))
+
+    def test_attachment_index(self):
+        policies = [{'PolicyName': 'ReadOnlyAccess', 'Arn': POLICY_ARN, 'DefaultVersionId': 'v3', 'AttachmentCount': 2}]
+        attachments = {POLICY_ARN: {'users': [USER_ARN], 'groups': [], 'roles': [ROLE_ARN]}}
+        index = PolicyAttachmentIndex(policies, attachments)
+
+        self.assertEqual(index.managed_policies(ROLE_ARN),
+                         [{'name': 'ReadOnlyAccess', 'arn': POLICY_ARN, 'version': 'v3'}])
+        self.assertEqual(index.managed_policies(GROUP_ARN), [])
+        self.assertEqual(index.policy_attachments(POLICY_ARN)['users'], [USER_ARN])
+        self.assertEqual(index.policy_attachments('arn:aws:iam::aws:policy/Unattached'),
+                         {'users': [], 'groups': [], 'roles': []})
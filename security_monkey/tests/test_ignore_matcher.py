@@ -0,0 +1,30 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.ignore_matcher import PrefixTrie
+
+
+class IgnoreMatcherTestCase(SecurityMonkeyTestCase):
+
+    def test_prefix_match(self):
+        trie = PrefixTrie(['Test-', 'test-sg-legacy', 'dev'])
+
+        self.assertEqual(trie.match('TEST-sg-1'), 'Test-')
+        self.assertEqual(trie.match('development'), 'dev')
+        self.assertEqual(trie.match('test'), None)
+        self.assertEqual(trie.match('prod-sg'), None)
+
+    def test_empty(self):
+        self.assertEqual(PrefixTrie([]).match('anything'), None)
+        self.assertEqual(PrefixTrie(['']).match('anything'), '')
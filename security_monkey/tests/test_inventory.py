@@ -0,0 +1,47 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.inventory import Inventory
+from mock import patch
+from mock import MagicMock
+
+import boto.ec2
+
+
+class InventoryTestCase(SecurityMonkeyTestCase):
+
+    @patch('security_monkey.common.sts_connect.connect')
+    def test_rds_instances_use_the_rds_endpoint(self, test_patch):
+        """The security group watcher asks with its EC2 region, but RDS must be called on its own endpoint."""
+        rds = MagicMock()
+        rds.get_all_dbinstances.return_value = []
+        test_patch.return_value = rds
+
+        Inventory().get('testaccount', boto.ec2.get_region('us-west-2'), 'rds_instances')
+
+        region = test_patch.call_args[1]['region']
+        self.assertEqual(region.name, 'us-west-2')
+        self.assertEqual(region.endpoint, 'rds.us-west-2.amazonaws.com')
+
+    @patch('security_monkey.common.sts_connect.connect')
+    def test_datasets_are_fetched_once(self, test_patch):
+        ec2 = MagicMock()
+        ec2.get_only_instances.return_value = ['i-12345678']
+        test_patch.return_value = ec2
+
+        inventory = Inventory()
+        region = boto.ec2.get_region('us-east-1')
+        inventory.get('testaccount', region, 'instances')
+        self.assertEqual(inventory.get('testaccount', region, 'instances'), ['i-12345678'])
+        self.assertEqual(ec2.get_only_instances.call_count, 1)
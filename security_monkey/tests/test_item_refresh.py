@@ -0,0 +1,81 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.datastore import Datastore, Item
+from security_monkey.event_worker import parse_event, resolve_locations, ResourceEvent
+from security_monkey.common.event_queue import SQLiteEventQueue
+from security_monkey.common.utils.utils import add_account
+from security_monkey import app
+from mock import patch
+
+import json
+import uuid
+
+
+class ItemRefreshTestCase(SecurityMonkeyTestCase):
+
+    def setUp(self):
+        super(ItemRefreshTestCase, self).setUp()
+        self.csrf_enabled = app.config.get('WTF_CSRF_ENABLED', True)
+        app.config['WTF_CSRF_ENABLED'] = False
+        add_account('000000000012', False, 'datastore_test', 'datastore_test', True, '')
+        self.name = 'refresh-{}'.format(uuid.uuid4().hex[:8])
+        Datastore().store('securitygroup', 'us-west-2', 'datastore_test', self.name, True, {'rules': []})
+        self.item_id = Item.query.filter(Item.name == self.name).one().id
+
+    def tearDown(self):
+        app.config['WTF_CSRF_ENABLED'] = self.csrf_enabled
+        super(ItemRefreshTestCase, self).tearDown()
+
+    def test_requires_login(self):
+        response = self.test_app.post('/api/1/items/{}/refresh'.format(self.item_id))
+        self.assertEqual(response.status_code, 401)
+
+    @patch('security_monkey.views.item.get_event_queue')
+    @patch('security_monkey.views.item.__check_auth__')
+    def test_refresh_item(self, auth_patch, queue_patch):
+        """The refresh is queued as an event the event worker resolves to the item."""
+        auth_patch.return_value = (None, None)
+        queue = SQLiteEventQueue(':memory:')
+        queue_patch.return_value = queue
+
+        response = self.test_app.post('/api/1/items/{}/refresh'.format(self.item_id))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(json.loads(response.data)['status'], 'queued')
+        events = queue.receive(max_events=10, wait_time=0)
+        self.assertEqual(len(events), 1)
+        event = parse_event(events[0].body)
+        self.assertEqual(event, [ResourceEvent('securitygroup', 'datastore_test', 'us-west-2', self.name)])
+        self.assertEqual(resolve_locations(*event[0]), [('datastore_test', 'us-west-2', self.name)])
+
+    @patch('security_monkey.views.item.get_event_queue')
+    @patch('security_monkey.views.item.__check_auth__')
+    def test_refresh_needs_an_event_queue(self, auth_patch, queue_patch):
+        auth_patch.return_value = (None, None)
+        queue_patch.return_value = None
+
+        response = self.test_app.post('/api/1/items/{}/refresh'.format(self.item_id))
+
+        self.assertEqual(response.status_code, 503)
+
+    @patch('security_monkey.views.item.get_event_queue')
+    @patch('security_monkey.views.item.__check_auth__')
+    def test_unknown_item(self, auth_patch, queue_patch):
+        auth_patch.return_value = (None, None)
+
+        response = self.test_app.post('/api/1/items/0/refresh')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(queue_patch.call_count, 0)
@@ -0,0 +1,39 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.utils.json_delta import make_patch, apply_patch
+
+from copy import deepcopy
+
+
+class JSONDeltaTestCase(SecurityMonkeyTestCase):
+
+    def test_round_trip(self):
+        source = {"name": "web", "tags": {"env": "prod", "a/b": 1}, "rules": [{"port": 80}, {"port": 443}]}
+        target = {"name": "web", "tags": {"env": "test", "~c": 2}, "rules": [{"port": 443}], "vpc": None}
+        self.assertEqual(apply_patch(source, make_patch(source, target)), target)
+        self.assertEqual(make_patch(target, deepcopy(target)), [])
+
+    def test_list_insert_and_remove(self):
+        source = [{"port": port} for port in range(100)]
+        target = source[:10] + [{"port": 1000}] + source[10:50] + source[51:]
+        patch = make_patch(source, target)
+        self.assertEqual(len(patch), 2)
+        self.assertEqual(apply_patch(source, patch), target)
+
+    def test_source_is_not_modified(self):
+        source = {"rules": [{"port": 80}]}
+        original = deepcopy(source)
+        apply_patch(source, make_patch(source, {"rules": [{"port": 22}, {"port": 80}]}))
+        self.assertEqual(source, original)
@@ -0,0 +1,98 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.rate_limiter import RateLimiter
+from security_monkey import app
+from boto.exception import BotoServerError
+from botocore.exceptions import ClientError
+from mock import patch
+
+
+def throttling_error():
+    e = BotoServerError(400, 'Bad Request')
+    e.error_code = 'Throttling'
+    return e
+
+
+def client_throttling_error(code='Throttling'):
+    return ClientError({'Error': {'Code': code, 'Message': 'Rate exceeded'}}, 'ListPolicies')
+
+
+class FakeConnection(object):
+    """
+    Stands in for a boto connection.  get_all_key_pairs is a bound method,
+    so the limiter finds the endpoint from its host like on a real connection.
+    """
+
+    def __init__(self, results, host='ec2.us-east-1.amazonaws.com'):
+        self.host = host
+        self.results = list(results)
+        self.call_count = 0
+
+    def get_all_key_pairs(self):
+        self.call_count += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class RateLimiterTestCase(SecurityMonkeyTestCase):
+
+    @patch('time.sleep')
+    def test_throttled_call_is_retried(self, sleep_patch):
+        limiter = RateLimiter()
+        conn = FakeConnection([throttling_error(), ['kp']])
+
+        self.assertEqual(limiter.call('TEST_ACCOUNT', conn.get_all_key_pairs), ['kp'])
+
+        stats = limiter.stats('TEST_ACCOUNT')[('TEST_ACCOUNT', 'ec2.us-east-1.amazonaws.com')]
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['throttles'], 1)
+        self.assertTrue(stats['rate'] < app.config.get('AWS_RATE_LIMIT', 20))
+
+    @patch('time.sleep')
+    def test_retry_budget(self, sleep_patch):
+        limiter = RateLimiter()
+        retries = app.config.get('AWS_THROTTLE_RETRIES', 5)
+        conn = FakeConnection([throttling_error() for _ in range(retries + 1)])
+
+        self.assertRaises(BotoServerError, limiter.call, 'TEST_ACCOUNT', conn.get_all_key_pairs)
+        self.assertEqual(conn.call_count, retries + 1)
+
+    def test_endpoints_are_limited_separately(self):
+        limiter = RateLimiter()
+        limiter.call('TEST_ACCOUNT', FakeConnection([1]).get_all_key_pairs)
+        limiter.call('TEST_ACCOUNT', FakeConnection([1], host='ec2.eu-west-1.amazonaws.com').get_all_key_pairs)
+        limiter.call('OTHER_ACCOUNT', FakeConnection([1]).get_all_key_pairs)
+
+        self.assertEqual(len(limiter.stats()), 3)
+        self.assertEqual(len(limiter.stats('TEST_ACCOUNT')), 2)
+
+    @patch('time.sleep')
+    def test_boto3_throttled_call_is_retried(self, sleep_patch):
+        limiter = RateLimiter()
+        conn = FakeConnection([client_throttling_error('RequestLimitExceeded'), ['policy']],
+                              host='iam.amazonaws.com')
+        self.assertEqual(limiter.call('TEST_ACCOUNT', conn.get_all_key_pairs), ['policy'])
+
+        stats = limiter.stats('TEST_ACCOUNT')[('TEST_ACCOUNT', 'iam.amazonaws.com')]
+        self.assertEqual(stats['throttles'], 1)
+        self.assertTrue(stats['rate'] < app.config.get('AWS_RATE_LIMIT', 20))
+
+    def test_other_client_errors_are_raised(self):
+        limiter = RateLimiter()
+        conn = FakeConnection([client_throttling_error('AccessDenied')])
+        self.assertRaises(ClientError, limiter.call, 'TEST_ACCOUNT', conn.get_all_key_pairs)
+        self.assertEqual(conn.call_count, 1)
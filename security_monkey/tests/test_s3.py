@@ -91,6 +91,31 @@ class S3TestCase(SecurityMonkeyTestCase):
         self.assertEqual(len(items), 2)
         self.assertEqual(len(el), 0)
     
+    def test_group_buckets_by_region(self):
+        """Buckets are grouped by their location, and a bucket that cannot be located skips the account."""
+        from security_monkey.watchers.s3 import S3
+
+        class Bucket(object):
+            def __init__(self, name, location):
+                self.name = name
+                self.location = location
+
+            def get_location(self):
+                if self.location is None:
+                    raise Exception("Access Denied")
+                return self.location
+
+        buckets = [Bucket('classic', ''), Bucket('west', 'us-west-2'), Bucket('eu', 'EU'),
+                   Bucket('west2', 'us-west-2'), Bucket('denied', None)]
+        cw = S3(accounts=['testaccount'], debug=True)
+        cw.bucket_workers = 3
+        exception_map = {}
+        by_region = cw.group_buckets_by_region('testaccount', buckets, exception_map)
+
+        self.assertEqual(sorted(by_region.keys()), ['eu-west-1', 'us-east-1', 'us-west-2'])
+        self.assertEqual([bucket.name for bucket in by_region['us-west-2']], ['west', 'west2'])
+        self.assertEqual(exception_map.keys(), [('s3', 'testaccount')])
+
     def test_auditor_acl_authenticated_users(self):
         au = S3Auditor(debug=True)
         data = {
@@ -0,0 +1,68 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.common.sts_connect import RoleCredentialCache
+from mock import patch
+from mock import MagicMock
+
+import datetime
+
+
+def mock_assume_role(expires_in):
+    expiration = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+    role = MagicMock()
+    role.credentials.expiration = expiration.strftime('%Y-%m-%dT%H:%M:%SZ')
+    sts = MagicMock()
+    sts.assume_role.return_value = role
+    return sts
+
+
+class STSConnectTestCase(SecurityMonkeyTestCase):
+
+    @patch('boto.connect_sts')
+    def test_credentials_are_reused(self, test_patch):
+        """Only the first request for an account/role should call AssumeRole."""
+        sts = mock_assume_role(3600)
+        test_patch.return_value = sts
+
+        cache = RoleCredentialCache()
+        first = cache.get('000000000000', 'SecurityMonkey')
+        second = cache.get('000000000000', 'SecurityMonkey')
+
+        self.assertIs(first, second)
+        self.assertEqual(sts.assume_role.call_count, 1)
+
+    @patch('boto.connect_sts')
+    def test_roles_are_cached_separately(self, test_patch):
+        sts = mock_assume_role(3600)
+        test_patch.return_value = sts
+
+        cache = RoleCredentialCache()
+        cache.get('000000000000', 'SecurityMonkey')
+        cache.get('000000000000', 'CustomRole')
+        cache.get('111111111111', 'SecurityMonkey')
+
+        self.assertEqual(sts.assume_role.call_count, 3)
+
+    @patch('boto.connect_sts')
+    def test_expiring_credentials_are_replaced(self, test_patch):
+        """Credentials inside the expiry margin must not be handed out."""
+        sts = mock_assume_role(30)
+        test_patch.return_value = sts
+
+        cache = RoleCredentialCache()
+        cache.get('000000000000', 'SecurityMonkey')
+        cache.get('000000000000', 'SecurityMonkey')
+
+        self.assertEqual(sts.assume_role.call_count, 2)
@@ -0,0 +1,241 @@
+#     Copyright 2014 Netflix, Inc.
+#
+#     Licensed under the Apache License, Version 2.0 (the "License");
+#     you may not use this file except in compliance with the License.
+#     You may obtain a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#     Unless required by applicable law or agreed to in writing, software
+#     distributed under the License is distributed on an "AS IS" BASIS,
+#     WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#     See the License for the specific language governing permissions and
+#     limitations under the License.
+from security_monkey.tests import SecurityMonkeyTestCase
+from security_monkey.watcher import Watcher, ChangeItem, _partition_failures
+from security_monkey.common.utils.canonical import config_hash
+from security_monkey.common.region_catalog import region_catalog
+from security_monkey.exceptions import RegionSkipped, RegionNotScanned
+from security_monkey.common.utils.utils import add_account
+from security_monkey import app
+from boto.ec2.regioninfo import RegionInfo
+from mock import MagicMock
+
+import threading
+import time
+import uuid
+
+
+class PartitionWatcher(Watcher):
+    index = 'testpartition'
+    i_am_singular = 'Test Partition'
+    i_am_plural = 'Test Partitions'
+
+    def __init__(self, accounts=None, debug=False, failing=(), delays=None):
+        super(PartitionWatcher, self).__init__(accounts=accounts, debug=debug)
+        self.failing = set(failing)
+        self.delays = delays or {}
+        self.threads = set()
+        self.slurped = []
+
+    def slurp_partition(self, account, region, exception_map):
+        region_name = getattr(region, 'name', region)
+        self.threads.add(threading.current_thread().ident)
+        self.slurped.append(region_name)
+        time.sleep(self.delays.get(region_name, 0))
+        if region_name in self.failing:
+            raise ValueError("{} is down".format(region_name))
+        return [ChangeItem(index=self.index, account=account, region=region_name,
+                           name='item-{}'.format(region_name), new_config={'region': region_name})]
+
+
+class WatcherTestCase(SecurityMonkeyTestCase):
+
+    def test_slurp_partitions_keeps_order(self):
+        """Partitions finishing out of order are still merged in the order they were given."""
+        watcher = PartitionWatcher(accounts=['test'], delays={'us-east-1': 0.2})
+        watcher.region_workers = 3
+        partitions = [('test', 'us-east-1'), ('test', 'us-west-1'), ('test', 'us-west-2')]
+
+        items, exception_map = watcher.slurp_partitions(partitions)
+
+        self.assertEqual([item.region for item in items], ['us-east-1', 'us-west-1', 'us-west-2'])
+        self.assertEqual(exception_map, {})
+        self.assertTrue(len(watcher.threads) > 1)
+
+    def test_slurp_partitions_isolates_failures(self):
+        """An exception in one partition is recorded for it alone."""
+        watcher = PartitionWatcher(accounts=['test'], failing=['us-west-1'])
+        watcher.region_workers = 2
+        partitions = [('test', 'us-east-1'), ('test', 'us-west-1'), ('test', 'us-west-2')]
+
+        items, exception_map = watcher.slurp_partitions(partitions)
+
+        self.assertEqual([item.region for item in items], ['us-east-1', 'us-west-2'])
+        self.assertEqual(exception_map.keys(), [('testpartition', 'test', 'us-west-1')])
+
+    def test_cold_region_is_skipped(self):
+        """A region that came back empty REGION_COLD_AFTER times is skipped, but not forgotten."""
+        watcher = PartitionWatcher(accounts=['test'])
+        watcher.region_service = 'ec2'
+        for _ in range(app.config.get('REGION_COLD_AFTER', 5)):
+            region_catalog.record('test', 'testpartition', 'ap-south-1', False)
+        partitions = [('test', RegionInfo(name='us-east-1')), ('test', RegionInfo(name='ap-south-1'))]
+
+        items, exception_map = watcher.slurp_partitions(partitions)
+
+        self.assertEqual(watcher.slurped, ['us-east-1'])
+        self.assertEqual([item.region for item in items], ['us-east-1'])
+        # The skip keeps find_deleted away from the items already recorded in the region.
+        self.assertIsInstance(exception_map[('testpartition', 'test', 'ap-south-1')], RegionSkipped)
+        self.assertTrue(watcher.locationInExceptionMap(('testpartition', 'test', 'ap-south-1', 'old-item'),
+                                                       exception_map))
+
+    def test_cold_region_is_rescanned(self):
+        watcher = PartitionWatcher(accounts=['test'])
+        watcher.region_service = 'ec2'
+        for _ in range(app.config.get('REGION_COLD_AFTER', 5)):
+            region_catalog.record('test', 'testpartition', 'ap-south-1', False)
+        partitions = [('test', RegionInfo(name='ap-south-1'))]
+
+        for _ in range(app.config.get('REGION_COLD_SCAN_INTERVAL', 12)):
+            watcher.slurp_partitions(partitions)
+
+        self.assertEqual(watcher.slurped, ['ap-south-1'])
+        # Finding items brings the region back to every run.
+        self.assertTrue(region_catalog.should_scan('test', 'testpartition', 'ap-south-1'))
+
+    def test_cold_regions_are_tracked_per_technology(self):
+        """Technologies sharing a region_service go cold and are sampled independently."""
+        keypairs = PartitionWatcher(accounts=['test'])
+        keypairs.index = 'testkeypair'
+        keypairs.region_service = 'ec2'
+        groups = PartitionWatcher(accounts=['test'])
+        groups.index = 'testgroup'
+        groups.region_service = 'ec2'
+        partitions = [('test', RegionInfo(name='ap-south-1'))]
+
+        for _ in range(app.config.get('REGION_COLD_AFTER', 5)):
+            region_catalog.record('test', 'testkeypair', 'ap-south-1', False)
+        for _ in range(app.config.get('REGION_COLD_SCAN_INTERVAL', 12) - 1):
+            groups.slurp_partitions(partitions)
+            keypairs.slurp_partitions(partitions)
+
+        # Security groups finding items do not warm the region up for keypairs,
+        # nor use up its rescan interval.
+        self.assertEqual(keypairs.slurped, [])
+        self.assertEqual(len(groups.slurped), app.config.get('REGION_COLD_SCAN_INTERVAL', 12) - 1)
+        keypairs.slurp_partitions(partitions)
+        self.assertEqual(keypairs.slurped, ['ap-south-1'])
+
+    def test_find_modified_compares_hashes(self):
+        """Only items whose stored hash differs have their previous config loaded and compared."""
+        watcher = PartitionWatcher(accounts=['test'])
+        watcher.datastore = MagicMock()
+        watcher.datastore.get_revision_configs.return_value = {2: {'port': 80}}
+
+        same = {'port': 443, 'rules': ['a', 'b']}
+        previous = [ChangeItem(index='testpartition', account='test', region='us-east-1', name='same',
+                               new_config=None, revision_id=1, config_hash=config_hash(same)),
+                    ChangeItem(index='testpartition', account='test', region='us-east-1', name='changed',
+                               new_config=None, revision_id=2, config_hash='stale')]
+        current = [ChangeItem(index='testpartition', account='test', region='us-east-1', name='same',
+                              new_config=dict(same)),
+                   ChangeItem(index='testpartition', account='test', region='us-east-1', name='changed',
+                              new_config={'port': 22})]
+
+        watcher.find_modified(previous=previous, current=current)
+
+        watcher.datastore.get_revision_configs.assert_called_once_with([2])
+        self.assertEqual([item.name for item in watcher.changed_items], ['changed'])
+        self.assertEqual(watcher.changed_items[0].old_config, {'port': 80})
+        # The stale hash is backfilled from the loaded config.
+        watcher.datastore.set_config_hashes.assert_called_once_with({2: config_hash({'port': 80})})
+
+    def test_find_modified_skips_unreadable_revisions(self):
+        """A revision that could not be loaded is neither compared nor given a hash."""
+        watcher = PartitionWatcher(accounts=['test'])
+        watcher.datastore = MagicMock()
+        watcher.datastore.get_revision_configs.return_value = {}
+
+        previous = [ChangeItem(index='testpartition', account='test', region='us-east-1', name='lost',
+                               new_config=None, revision_id=3, config_hash='stored')]
+        current = [ChangeItem(index='testpartition', account='test', region='us-east-1', name='lost',
+                              new_config={'port': 22})]
+
+        watcher.find_modified(previous=previous, current=current)
+
+        self.assertEqual(watcher.changed_items, [])
+        self.assertFalse(watcher.datastore.set_config_hashes.called)
+        self.assertEqual(previous[0].config_hash, 'stored')
+
+    def test_find_changes_stream(self):
+        """Each partition is diffed against its own previous items as soon as it is slurped."""
+        def previous_item(region, name, config):
+            return ChangeItem(index='testpartition', account='test', region=region, name=name,
+                              new_config=None, revision_id=hash(name), config_hash=config_hash(config))
+
+        def current_item(region, name, config):
+            return ChangeItem(index='testpartition', account='test', region=region, name=name, new_config=config)
+
+        watcher = PartitionWatcher(accounts=['test'])
+        watcher.datastore = MagicMock()
+        watcher.datastore.get_revision_configs.return_value = {}
+        watcher.read_previous_items = lambda: [previous_item('us-east-1', 'kept', {'a': 1}),
+                                               previous_item('us-east-1', 'removed', {'b': 1}),
+                                               previous_item('us-west-2', 'unreachable', {'c': 1}),
+                                               previous_item('eu-west-1', 'orphan', {'d': 1})]
+        failure = ValueError("us-west-2 is down")
+        batches = [('test', 'us-east-1', [current_item('us-east-1', 'kept', {'a': 1}),
+                                          current_item('us-east-1', 'added', {'e': 1})], {}),
+                   ('test', 'us-west-2', [], {('testpartition', 'test', 'us-west-2'): failure})]
+
+        east, west, rest = list(watcher.find_changes_stream(batches))
+
+        self.assertEqual([item.name for item in east.created], ['added'])
+        self.assertEqual([item.name for item in east.deleted], ['removed'])
+        self.assertEqual(east.changed, [])
+        self.assertEqual(east.partitions, [('test', 'us-east-1')])
+        # Items of a failed partition are neither changed nor deleted.
+        self.assertEqual(west.deleted, [])
+        self.assertEqual(west.failures, {('test', 'us-west-2'): failure})
+        # Regions that were never slurped are checked for deletions at the end.
+        self.assertEqual([item.name for item in rest.deleted], ['orphan'])
+
+    def test_partition_failures(self):
+        """Errors fail their partition.  Regions skipped on purpose are not retried."""
+        error = ValueError("Access Denied")
+        exception_map = {('testpartition', 'test', 'ap-south-1'): RegionSkipped('testpartition', 'test', 'ap-south-1'),
+                         ('testpartition', 'test', 'cn-north-1'): RegionNotScanned('testpartition', 'test', 'cn-north-1'),
+                         ('testpartition', 'test', 'us-east-1', 'web'): error,
+                         ('testpartition', 'other'): error}
+
+        self.assertEqual(_partition_failures(exception_map),
+                         {('test', 'us-east-1'): error, ('other', None): error})
+
+    def test_cold_partition_is_not_recorded_as_slurped(self):
+        watcher = PartitionWatcher(accounts=['test'])
+        skipped = {('testpartition', 'test', 'ap-south-1'): RegionSkipped('testpartition', 'test', 'ap-south-1')}
+
+        changes = watcher._find_changes_in([], [], skipped, [('test', 'ap-south-1')], skipped)
+
+        self.assertEqual(changes.partitions, [])
+        self.assertEqual(changes.failures, {})
+
+    def test_read_previous_items_from_the_datastore(self):
+        """Stored items are read back once each, with their configs loaded on demand."""
+        add_account('000000000003', False, 'watcher_test', 'watcher_test', True, '')
+        watcher = PartitionWatcher(accounts=['watcher_test'])
+        # The test database is not dropped between tests.
+        watcher.index = 'test{}'.format(uuid.uuid4().hex[:8])
+        watcher.datastore.store(watcher.index, 'us-east-1', 'watcher_test', 'web', True, {'port': 80})
+        watcher.datastore.store(watcher.index, 'us-east-1', 'watcher_test', 'web', True, {'port': 443})
+        watcher.datastore.store(watcher.index, 'us-west-2', 'watcher_test', 'db', True, {'port': 5432})
+
+        previous = watcher.read_previous_items()
+
+        self.assertEqual(sorted([(item.region, item.name) for item in previous]),
+                         [('us-east-1', 'web'), ('us-west-2', 'db')])
+        self.assertEqual([item.new_config for item in previous], [None, None])
+        watcher.load_previous_configs(previous)
+        self.assertEqual(sorted([item.config['port'] for item in previous]), [443, 5432])
@@ -18,6 +18,8 @@ from security_monkey.views import __check_admin__
 from security_monkey.views import ACCOUNT_FIELDS
 from security_monkey.datastore import Account
 from security_monkey.datastore import User
+from security_monkey.datastore import item_id_cache
+from security_monkey.common.account_registry import registry
 from security_monkey import db
 
 from flask.ext.restful import marshal, reqparse
@@ -156,6 +158,9 @@ class AccountGetPutDelete(AuthenticatedService):
         db.session.add(account)
         db.session.commit()
         db.session.refresh(account)
+        registry.invalidate()
+        # Cached item ids are keyed on the account name.
+        item_id_cache.clear()
 
         marshaled_account = marshal(account.__dict__, ACCOUNT_FIELDS)
         marshaled_account['auth'] = self.auth_dict
@@ -209,6 +214,8 @@ class AccountGetPutDelete(AuthenticatedService):
 
         db.session.delete(account)
         db.session.commit()
+        registry.invalidate()
+        item_id_cache.clear()
 
         return {'status': 'deleted'}, 202
 
@@ -287,6 +294,7 @@ class AccountPostList(AuthenticatedService):
         db.session.add(account)
         db.session.commit()
         db.session.refresh(account)
+        registry.invalidate()
 
         marshaled_account = marshal(account.__dict__, ACCOUNT_FIELDS)
         marshaled_account['auth'] = self.auth_dict
@@ -18,6 +18,7 @@ from security_monkey.views import __check_admin__
 from security_monkey.views import IGNORELIST_FIELDS
 from security_monkey.datastore import IgnoreListEntry
 from security_monkey.datastore import Technology
+from security_monkey.common.ignore_matcher import ignore_matcher
 from security_monkey import db
 from security_monkey import api
 
@@ -157,6 +158,7 @@ class IgnoreListGetPutDelete(AuthenticatedService):
 
         db.session.add(result)
         db.session.commit()
+        ignore_matcher.invalidate()
         db.session.refresh(result)
 
         whitelistentry_marshaled = marshal(result.__dict__, IGNORELIST_FIELDS)
@@ -203,6 +205,7 @@ class IgnoreListGetPutDelete(AuthenticatedService):
 
         IgnoreListEntry.query.filter(IgnoreListEntry.id == item_id).delete()
         db.session.commit()
+        ignore_matcher.invalidate()
 
         return {'status': 'deleted'}, 202
 
@@ -350,6 +353,7 @@ class IgnorelistListPost(AuthenticatedService):
 
         db.session.add(entry)
         db.session.commit()
+        ignore_matcher.invalidate()
         db.session.refresh(entry)
 
         ignorelistentry_marshaled = marshal(entry.__dict__, IGNORELIST_FIELDS)
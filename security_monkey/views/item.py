@@ -22,13 +22,14 @@ from security_monkey.datastore import Item
 from security_monkey.datastore import Account
 from security_monkey.datastore import Technology
 from security_monkey.datastore import ItemRevision
+from security_monkey.datastore import filter_config_contains
+from security_monkey.common.event_queue import get_event_queue
 from security_monkey import db
 from security_monkey import api
 
 from flask.ext.restful import marshal, reqparse
-from sqlalchemy.sql.expression import cast
-from sqlalchemy import String
 from sqlalchemy.orm import joinedload
+import json
 
 
 class ItemGet(AuthenticatedService):
@@ -238,11 +239,11 @@ class ItemList(AuthenticatedService):
             query = query.filter(ItemRevision.active == active)
         if 'searchconfig' in args:
             searchconfig = args['searchconfig']
-            query = query.filter(cast(ItemRevision.config, String).ilike('%{}%'.format(searchconfig)))
+            query = filter_config_contains(query, searchconfig)
 
         # Eager load the joins and leave the config column out of this.
         query = query.options(joinedload('issues'))
-        query = query.options(joinedload('revisions').defer('config'))
+        query = query.options(joinedload('revisions').defer('stored_config'))
         query = query.options(joinedload('account'))
         query = query.options(joinedload('technology'))
 
@@ -292,3 +293,73 @@ class ItemList(AuthenticatedService):
         marshaled_dict['count'] = len(marshaled_items)
 
         return marshaled_dict, 200
+
+
+class ItemRefresh(AuthenticatedService):
+    def __init__(self):
+        super(ItemRefresh, self).__init__()
+
+    def post(self, item_id):
+        """
+            .. http:post:: /api/1/items/<int:item_id>/refresh
+
+            Queues a refresh of a single item on the event queue, so the event
+            worker re-reads, audits and saves it if it changed, instead of waiting
+            for the next run of its watcher.  Needs EVENT_QUEUE_BACKEND.
+
+            **Example Request**:
+
+            .. sourcecode:: http
+
+                POST /api/1/items/1234/refresh HTTP/1.1
+                Host: example.com
+                Accept: application/json
+
+            **Example Response**:
+
+            .. sourcecode:: http
+
+                HTTP/1.1 202 Accepted
+                Vary: Accept
+                Content-Type: application/json
+
+                {
+                    'status': 'queued',
+                    'auth': {
+                        'authenticated': true,
+                        'user': 'user@example.com'
+                    }
+                }
+
+            :statuscode 202: Refresh queued
+            :statuscode 404: Item with given ID not found.
+            :statuscode 401: Authentication Error. Please Login.
+            :statuscode 503: No event queue is configured.
+        """
+
+        auth, retval = __check_auth__(self.auth_dict)
+        if auth:
+            return retval
+
+        item = Item.query.filter(Item.id == item_id).first()
+        if not item:
+            return {"status": "Item with the given ID not found."}, 404
+
+        from security_monkey.monitors import get_monitor
+        if not get_monitor(item.technology.name):
+            return {"status": "No watcher for technology {}.".format(item.technology.name)}, 404
+
+        queue = get_event_queue()
+        if queue is None:
+            return {"status": "Refreshing items needs an event queue. Set EVENT_QUEUE_BACKEND."}, 503
+
+        queue.send(json.dumps({
+            'technology': item.technology.name,
+            'account': item.account.name,
+            'region': item.region,
+            'resource': item.name
+        }))
+        return {
+            'status': 'queued',
+            'auth': self.auth_dict
+        }, 202
@@ -22,10 +22,9 @@ from security_monkey.datastore import Item
 from security_monkey.datastore import Account
 from security_monkey.datastore import Technology
 from security_monkey.datastore import ItemRevision
+from security_monkey.datastore import filter_config_contains
 
 from flask.ext.restful import marshal, reqparse
-from sqlalchemy.sql.expression import cast
-from sqlalchemy import String
 
 
 class RevisionGet(AuthenticatedService):
@@ -201,7 +200,7 @@ class RevisionList(AuthenticatedService):
             query = query.filter(ItemRevision.active == active)
         if 'searchconfig' in args:
             searchconfig = args['searchconfig']
-            query = query.filter(cast(ItemRevision.config, String).ilike('%{}%'.format(searchconfig)))
+            query = filter_config_contains(query, searchconfig)
         query = query.order_by(ItemRevision.date_created.desc())
         revisions = query.paginate(page, count)
 
@@ -10,19 +10,66 @@
 """
 
 from common.utils.PolicyDiff import PolicyDiff
-from common.utils.utils import sub_dict
+from common.utils.canonical import config_hash, configs_equal
+from common.utils.ephemeral import compile_ephemeral_paths
 from security_monkey import app
-from security_monkey.datastore import Account
-from security_monkey.datastore import IgnoreListEntry, Technology
+from security_monkey.common.account_registry import registry
 from security_monkey.common.jinja import get_jinja_env
+from security_monkey.common.concurrency import imap_in_threads
+from security_monkey.common.ignore_matcher import ignore_matcher, PrefixTrie
+from security_monkey.common.rate_limiter import rate_limiter
+from security_monkey.common.region_catalog import region_catalog
+from security_monkey.exceptions import BotoConnectionIssue, PartitionSkipped, RegionSkipped, RegionNotScanned
 
-from boto.exception import BotoServerError
-import time
+from collections import namedtuple
+import threading
 
 import datastore
 from copy import deepcopy
-import dpath.util
-from dpath.exceptions import PathNotFound
+
+# The (account, region) partition being slurped by the current thread.
+_partition = threading.local()
+
+# Change items found in one partition by Watcher.find_changes_stream, along with the
+# (account, region) partitions that were slurped and {(account, region): exception}
+# for those that failed.  A region of None stands for the whole account.
+PartitionChanges = namedtuple('PartitionChanges', ['created', 'changed', 'deleted', 'ephemeral',
+                                                   'partitions', 'failures'])
+
+
+def _location_wanted(wanted, location):
+    """
+    :param wanted: set of (account, region, name) locations, where a name of None matches any name.
+    """
+    (account, region, name) = location
+    return location in wanted or (account, region, None) in wanted
+
+
+def _partition_failures(exception_map):
+    """
+    :returns: dict of {(account, region): exception} for the partitions the exceptions
+        were raised in.  A failure in a single item fails its whole partition, which
+        is then slurped again as a whole.  Partitions skipped on purpose, such as cold
+        regions, are not failures.
+    """
+    failures = {}
+    for location, exception in exception_map.items():
+        if isinstance(exception, PartitionSkipped):
+            continue
+        if len(location) >= 3:
+            failures[(location[1], location[2])] = exception
+        elif len(location) == 2:
+            failures[(location[1], None)] = exception
+    return failures
+
+
+def _cold_partitions(exception_map):
+    """
+    :returns: set of (account, region) cold partitions that were left for a later
+        run, and so were neither slurped nor failed.
+    """
+    return set([(location[1], location[2]) for location, exception in exception_map.items()
+                if isinstance(exception, RegionSkipped) and len(location) == 3])
 
 
 class Watcher(object):
@@ -31,16 +78,17 @@ class Watcher(object):
     index = 'abstract'
     i_am_singular = 'Abstract'
     i_am_plural = 'Abstracts'
-    rate_limit_delay = 0
-    ignore_list = []
+    ignore_list = PrefixTrie([])
     interval = 15    #in minutes
+    region_workers = 5    # concurrent (account, region) partitions in slurp_partitions
+    region_service = None    # region catalog service for regional watchers, e.g. 'ec2'
 
     def __init__(self, accounts=None, debug=False):
         """Initializes the Watcher"""
         self.datastore = datastore.Datastore()
         if not accounts:
-            accounts = Account.query.filter(Account.third_party==False).filter(Account.active==True).all()
-            self.accounts = [account.name for account in accounts]
+            self.accounts = [account.name for account in registry.accounts()
+                             if not account.third_party and account.active]
         else:
             self.accounts = accounts
         self.debug = debug
@@ -49,65 +97,37 @@ class Watcher(object):
         self.changed_items = []
         self.ephemeral_items = []
         # TODO: grab these from DB, keyed on account
-        self.rate_limit_delay = 0
         self.interval = 15
         self.honor_ephemerals = False
         self.ephemeral_paths = []
+        self.region_workers = app.config.get('REGION_WORKERS', {}).get(self.index, self.region_workers)
 
     def prep_for_slurp(self):
         """
         Should be run before slurp is run to grab the IgnoreList.
         """
-        query = IgnoreListEntry.query
-        query = query.join((Technology, Technology.id == IgnoreListEntry.tech_id))
-        self.ignore_list = query.filter(Technology.name==self.index).all()
+        self.ignore_list = ignore_matcher.trie(self.index)
 
     def check_ignore_list(self, name):
         """
         See if the given item has a name flagging it to be ignored by security_monkey.
         """
-        for result in self.ignore_list:
-            if name.lower().startswith(result.prefix.lower()):
-                app.logger.warn("Ignoring {}/{} because of IGNORELIST prefix {}".format(self.index, name, result.prefix))
-                return True
+        prefix = self.ignore_list.match(name)
+        if prefix is not None:
+            app.logger.debug("Ignoring {}/{} because of IGNORELIST prefix {}".format(self.index, name, prefix))
+            return True
 
         return False
 
     def wrap_aws_rate_limited_call(self, awsfunc, *args, **nargs):
-        attempts = 0
-
-        while True:
-            attempts = attempts + 1
-            try:
-                if self.rate_limit_delay > 0:
-                    time.sleep(self.rate_limit_delay)
-
-                retval = awsfunc(*args, **nargs)
-
-                if self.rate_limit_delay > 0:
-                    app.logger.warn(("Successfully Executed Rate-Limited Function. " +
-                                     "Tech: {} Account: {}. "
-                                     "Reducing sleep period from {} to {}")
-                                    .format(self.index, self.accounts, self.rate_limit_delay, self.rate_limit_delay / 2))
-                    self.rate_limit_delay = self.rate_limit_delay / 2
-
-                return retval
-            except BotoServerError as e:
-                if e.error_code == 'Throttling':
-                    if self.rate_limit_delay == 0:
-                        self.rate_limit_delay = 1
-                        app.logger.warn(('Being rate-limited by AWS. Increasing delay on tech {} ' +
-                                        'in account {} from 0 to 1 second. Attempt {}')
-                                        .format(self.index, self.accounts, attempts))
-                    elif self.rate_limit_delay < 16:
-                        self.rate_limit_delay = self.rate_limit_delay * 2
-                        app.logger.warn(('Still being rate-limited by AWS. Increasing delay on tech {} ' +
-                                        'in account {} to {} seconds. Attempt {}')
-                                        .format(self.index, self.accounts, self.rate_limit_delay, attempts))
-                    else:
-                        raise e
-                else:
-                    raise e
+        """
+        Calls awsfunc through the rate limiter shared by every watcher,
+        keyed on the account being slurped and the endpoint being called.
+        """
+        account = getattr(_partition, 'account', None)
+        if account is None:
+            account = ','.join(self.accounts)
+        return rate_limiter.call(account, awsfunc, *args, **nargs)
 
     def created(self):
         """
@@ -140,6 +160,150 @@ class Watcher(object):
         """
         raise NotImplementedError()
 
+    def slurp_partition(self, account, region, exception_map):
+        """
+        Fetches every item in a single (account, region) partition.  Watchers
+        that slurp region by region override this and call slurp_partitions().
+        :returns: list of items found in the partition.
+        """
+        raise NotImplementedError()
+
+    def regional_partitions(self, exception_map):
+        """
+        Builds the (account, region) partitions for every account, using the
+        regions the region catalog has for region_service.  Accounts whose
+        regions cannot be discovered are added to the exception_map.
+        """
+        partitions = []
+        for account in self.accounts:
+            try:
+                regions = region_catalog.regions(account, self.region_service)
+            except Exception as e:  # EC2ResponseError
+                # Some Accounts don't subscribe to EC2 and will throw an exception here.
+                exc = BotoConnectionIssue(str(e), self.index, account, None)
+                self.slurp_exception((self.index, account), exc, exception_map)
+                continue
+            partitions.extend([(account, region) for region in regions])
+        return partitions
+
+    def slurp_partitions(self, partitions, exception_map=None):
+        """
+        Runs slurp_partition over a list of (account, region) tuples, using at most
+        region_workers threads, and merges the resulting items and exceptions.
+        Cold regions are skipped, and the outcome of every scanned partition is
+        reported to the region catalog, when the watcher has a region_service.
+        :returns: item_list - list of items from every partition.
+        :returns: exception_map - exceptions from every partition, merged into
+            the given exception_map if one is provided.
+        """
+        if exception_map is None:
+            exception_map = {}
+
+        item_list = []
+        for (account, region_name, items, partition_exceptions) in self._slurp_partitions(partitions):
+            item_list.extend(items)
+            exception_map.update(partition_exceptions)
+
+        return item_list, exception_map
+
+    def slurp_stream(self):
+        """
+        Streaming variant of slurp().  Yields (account, region_name, item_list, exception_map)
+        for every (account, region) partition as soon as it has been slurped, so
+        callers only need to hold on to one partition's items at a time.
+        Accounts whose regions cannot be discovered are yielded with a region_name of None.
+        Watchers without a region_service yield everything slurp() returns as a
+        single batch, with both account and region_name set to None.
+        """
+        if not self.region_service:
+            item_list, exception_map = self.slurp()
+            yield None, None, item_list, exception_map
+            return
+
+        self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        for location, exc in exception_map.items():
+            yield location[1], None, [], {location: exc}
+
+        for batch in self._slurp_partitions(partitions):
+            yield batch
+
+    def slurp_items(self, locations):
+        """
+        Fetches only the items at the given (account, region, name) locations.
+        The accounts must be among the watcher's accounts.  A name of None
+        stands for every item in the (account, region) partition.
+
+        Regional watchers slurp just the (account, region) partitions holding
+        the items, cold or not.  Other watchers slurp everything.  Either way,
+        items that were not asked for are dropped.  Watchers that can fetch a
+        single item directly override this.
+        :returns: item_list - list of the items found at the given locations.
+        :returns: exception_map - A dict where the keys are a tuple containing the
+            location of the exception and the value is the actual exception
+        """
+        wanted = set([tuple(location) for location in locations])
+        if self.region_service:
+            self.prep_for_slurp()
+            exception_map = {}
+            wanted_partitions = set([(account, region) for (account, region, name) in wanted])
+            partitions = [(account, region) for (account, region) in self.regional_partitions(exception_map)
+                          if (account, region.name) in wanted_partitions]
+            scanned = set([(account, region.name) for (account, region) in partitions])
+            for (account, region_name) in wanted_partitions - scanned:
+                # Keeps find_deleted from deleting items in regions this watcher cannot scan.
+                exc = RegionNotScanned(self.index, account, region_name)
+                self.slurp_exception((self.index, account, region_name), exc, exception_map)
+            item_list = []
+            for (account, region_name, items, partition_exceptions) in self._slurp_partitions(partitions,
+                                                                                              skip_cold=False):
+                item_list.extend(items)
+                exception_map.update(partition_exceptions)
+        else:
+            item_list, exception_map = self.slurp()
+
+        item_list = [item for item in item_list
+                     if _location_wanted(wanted, (item.account, item.region, item.name))]
+        return item_list, exception_map
+
+    def _slurp_partitions(self, partitions, skip_cold=True):
+        """
+        Yields (account, region_name, items, exception_map) for every partition, in order.
+        """
+        partition_list = []
+        for (account, region) in partitions:
+            if self.region_service and skip_cold and \
+                    not region_catalog.should_scan(account, self.index, region.name):
+                # Keeps find_deleted from treating the region's items as deleted.
+                exception_map = {}
+                exc = RegionSkipped(self.index, account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+                yield account, region.name, [], exception_map
+            else:
+                partition_list.append((account, region))
+
+        def slurp_one(partition):
+            account, region = partition
+            region_name = getattr(region, 'name', region)
+            partition_exceptions = {}
+            _partition.account = account
+            try:
+                items = self.slurp_partition(account, region, partition_exceptions)
+            except Exception as e:
+                app.logger.exception("Unhandled exception slurping {}/{}/{}".format(self.index, account, region_name))
+                self.slurp_exception((self.index, account, region_name), e, partition_exceptions)
+                items = []
+            finally:
+                _partition.account = None
+            return account, region_name, items, partition_exceptions
+
+        for (account, region_name, items, partition_exceptions) in imap_in_threads(slurp_one, partition_list,
+                                                                                   self.region_workers):
+            if self.region_service:
+                region_catalog.record(account, self.index, region_name, len(items) > 0)
+            yield account, region_name, items, partition_exceptions
+
     def slurp_exception(self, location=None, exception=None, exception_map={}):
         """
         Logs any exceptions that happen in slurp and adds them to the exception_map
@@ -198,9 +362,13 @@ class Watcher(object):
         item_locations = list(set(prev_map).difference(set(curr_map)))
         item_locations = [item_location for item_location in item_locations if not self.locationInExceptionMap(item_location, exception_map)]
         list_deleted_items = [prev_map[item] for item in item_locations]
+        self.load_previous_configs(list_deleted_items)
 
         for item in list_deleted_items:
             deleted_change_item = ChangeItem.from_items(old_item=item, new_item=None)
+            if item.new_config is None:
+                # Its last revision could not be read, the item is still gone.
+                deleted_change_item.old_config = {}
             app.logger.debug("%s: %s/%s/%s deleted" % (self.i_am_singular, item.account, item.region, item.name))
             self.deleted_items.append(deleted_change_item)
 
@@ -231,6 +399,16 @@ class Watcher(object):
         item_locations = list(set(curr_map).intersection(set(prev_map)))
         item_locations = [item_location for item_location in item_locations if not self.locationInExceptionMap(item_location, exception_map)]
 
+        # Only items whose hash differs, or was never recorded, need their previous config.
+        item_locations = [location for location in item_locations
+                          if prev_map[location].config_hash is None
+                          or prev_map[location].config_hash != config_hash(curr_map[location].config)]
+        self.load_previous_configs([prev_map[location] for location in item_locations])
+        # Items whose previous config could not be read are compared on the next run.
+        item_locations = [location for location in item_locations if prev_map[location].new_config is not None]
+
+        durable_view = compile_ephemeral_paths(self.ephemeral_paths)
+
         for location in item_locations:
             prev_item = prev_map[location]
             curr_item = curr_map[location]
@@ -238,24 +416,18 @@ class Watcher(object):
             eph_change_item = None
             dur_change_item = None
 
-            if not sub_dict(prev_item.config) == sub_dict(curr_item.config):
+            if not configs_equal(prev_item.config, curr_item.config):
                 eph_change_item = ChangeItem.from_items(old_item=prev_item, new_item=curr_item)
 
             if self.ephemerals_skipped():
-                # deepcopy configs before filtering
-                dur_prev_item = deepcopy(prev_item)
-                dur_curr_item = deepcopy(curr_item)
-                # filter-out ephemeral paths in both old and new config dicts
-                for path in self.ephemeral_paths:
-                    for cfg in [dur_prev_item.config, dur_curr_item.config]:
-                        try:
-                            dpath.util.delete(cfg, path, separator='$')
-                        except PathNotFound:
-                            pass
-
-                # now, compare only non-ephemeral paths
-                if not sub_dict(dur_prev_item.config) == sub_dict(dur_curr_item.config):
-                    dur_change_item = ChangeItem.from_items(old_item=dur_prev_item, new_item=dur_curr_item)
+                # compare only non-ephemeral paths. The views share data with
+                # the original configs, so only copy them once a change is found.
+                dur_prev_config = durable_view(prev_item.config)
+                dur_curr_config = durable_view(curr_item.config)
+                if not configs_equal(dur_prev_config, dur_curr_config):
+                    dur_change_item = ChangeItem.from_items(old_item=prev_item, new_item=curr_item)
+                    dur_change_item.old_config = deepcopy(dur_prev_config)
+                    dur_change_item.new_config = deepcopy(dur_curr_config)
 
                 # store all changes, divided in specific categories
                 if eph_change_item:
@@ -282,26 +454,125 @@ class Watcher(object):
         self.find_new(previous=prev, current=current)
         self.find_modified(previous=prev, current=current, exception_map=exception_map)
 
+    def find_changes_stream(self, batches=None):
+        """
+        Streaming variant of slurp() followed by find_changes().  Runs change
+        detection on every partition from slurp_stream(), or from the given
+        batches in the same format, as soon as it arrives, against the
+        previous items of that partition only.
+        Items from partitions that were not slurped at all are checked for
+        deletion once the stream is exhausted.
+
+        The change items still accumulate in created_items, changed_items,
+        deleted_items and ephemeral_items for the alerter.
+        :yields: PartitionChanges for each partition.
+        """
+        if batches is None:
+            batches = self.slurp_stream()
+
+        previous = {}
+        for item in self.read_previous_items():
+            previous.setdefault((item.account, item.region), []).append(item)
+
+        exception_map = {}
+        for (account, region_name, items, partition_exceptions) in batches:
+            exception_map.update(partition_exceptions)
+            if account is None:
+                keys = previous.keys()
+            elif region_name is None:
+                keys = [key for key in previous if key[0] == account]
+            else:
+                keys = set([(account, region_name)] + [(item.account, item.region) for item in items])
+
+            prev = []
+            for key in keys:
+                prev.extend(previous.pop(key, []))
+            if account is None:
+                partitions = [(watched, None) for watched in self.accounts]
+            else:
+                partitions = [(account, region_name)]
+            yield self._find_changes_in(prev, items, exception_map, partitions, partition_exceptions)
+
+        remaining = [item for items in previous.values() for item in items]
+        if remaining:
+            yield self._find_changes_in(remaining, [], exception_map)
+
+    def find_changes_for_locations(self, locations):
+        """
+        Refreshes the items at the given (account, region, name) locations with
+        slurp_items() and runs change detection on those items only.  An item
+        that is gone is deleted; every other item is left alone.  A name of
+        None refreshes the whole (account, region) partition.
+        :returns: PartitionChanges for the given items.
+        """
+        item_list, exception_map = self.slurp_items(locations)
+        wanted = set([tuple(location) for location in locations])
+        previous = [item for item in self.read_previous_items()
+                    if _location_wanted(wanted, (item.account, item.region, item.name))]
+        partitions = sorted(set([(account, region) for (account, region, name) in wanted]))
+        return self._find_changes_in(previous, item_list, exception_map, partitions, exception_map)
+
+    def _find_changes_in(self, previous, current, exception_map, partitions=(), partition_exceptions=None):
+        counts = (len(self.created_items), len(self.changed_items),
+                  len(self.deleted_items), len(self.ephemeral_items))
+        self.find_deleted(previous=previous, current=current, exception_map=exception_map)
+        self.find_new(previous=previous, current=current)
+        self.find_modified(previous=previous, current=current, exception_map=exception_map)
+        partition_exceptions = partition_exceptions or {}
+        skipped = _cold_partitions(partition_exceptions)
+        return PartitionChanges(self.created_items[counts[0]:], self.changed_items[counts[1]:],
+                                self.deleted_items[counts[2]:], self.ephemeral_items[counts[3]:],
+                                [partition for partition in partitions if partition not in skipped],
+                                _partition_failures(partition_exceptions))
+
     def read_previous_items(self):
         """
-        Pulls the last-recorded configuration from the database.
+        Pulls the last-recorded configuration hashes from the database.
+        The configs themselves are deferred until load_previous_configs is
+        called for the items that need them.
         :return: List of all items for the given technology and the given account.
         """
         prev_list = []
         for account in self.accounts:
-            prev = self.datastore.get_all_ctype_filtered(tech=self.index, account=account, include_inactive=False)
-            # Returns a map of {Item: ItemRevision}
-            for item in prev:
-                item_revision = prev[item]
+            for previous in self.datastore.get_latest_revisions(self.index, account):
                 new_item = ChangeItem(index=self.index,
-                                      region=item.region,
-                                      account=item.account.name,
-                                      name=item.name,
-                                      new_config=item_revision.config)
+                                      region=previous.region,
+                                      account=previous.account,
+                                      name=previous.name,
+                                      new_config=None,
+                                      revision_id=previous.revision_id,
+                                      config_hash=previous.config_hash)
                 prev_list.append(new_item)
 
         return prev_list
 
+    def load_previous_configs(self, previous):
+        """
+        Loads the recorded config of the given items from read_previous_items in one pass.
+        Revisions whose stored hash is missing or stale get it backfilled.
+        Items whose revision could not be read keep a new_config of None.
+        """
+        unloaded = [item for item in previous if item.new_config is None]
+        if not unloaded:
+            return
+
+        configs = self.datastore.get_revision_configs([item.revision_id for item in unloaded])
+        backfill = {}
+        for item in unloaded:
+            item.new_config = configs.get(item.revision_id)
+            if item.new_config is None:
+                app.logger.warn("{}: could not load revision {} of {}/{}/{}".format(
+                    self.i_am_singular, item.revision_id, item.account, item.region, item.name))
+                continue
+            stored_hash = config_hash(item.new_config)
+            if item.config_hash != stored_hash:
+                item.config_hash = stored_hash
+                backfill[item.revision_id] = stored_hash
+
+        if backfill:
+            app.logger.debug("{}: backfilling config hashes on {} revisions".format(self.i_am_singular, len(backfill)))
+            self.datastore.set_config_hashes(backfill)
+
     def get_latest_config(self, config_dict):
         """
         config_dict is a dict indexed by timestamp, with configuration as the value;
@@ -340,24 +611,29 @@ class Watcher(object):
 
         return has_issues, has_new_issue, has_unjustified_issue
 
-    def save(self):
+    def save(self, changes=None):
         """
         save new configs, if necessary
+        :param changes: PartitionChanges from find_changes_stream(), to only save
+            the items of that partition and record whether it failed.
+            Defaults to every item found so far.
         """
-        app.logger.info("{} deleted {} in {}".format(len(self.deleted_items), self.i_am_plural, self.accounts))
-        app.logger.info("{} created {} in {}".format(len(self.created_items), self.i_am_plural, self.accounts))
-        for item in self.created_items + self.deleted_items:
-            item.save(self.datastore)
+        if changes is None:
+            changes = PartitionChanges(self.created_items, self.changed_items,
+                                       self.deleted_items, self.ephemeral_items, [], {})
 
+        app.logger.info("{} deleted {} in {}".format(len(changes.deleted), self.i_am_plural, self.accounts))
+        app.logger.info("{} created {} in {}".format(len(changes.created), self.i_am_plural, self.accounts))
         if self.ephemerals_skipped():
-            changes_tot = len(self.ephemeral_items)
-            changeset = self.ephemeral_items
+            changeset = changes.ephemeral
         else:
-            changes_tot = len(self.changed_items)
-            changeset = self.changed_items
-        app.logger.info("{} changed {} in {}".format(changes_tot, self.i_am_plural, self.accounts))
-        for item in changeset:
-            item.save(self.datastore)
+            changeset = changes.changed
+        app.logger.info("{} changed {} in {}".format(len(changeset), self.i_am_plural, self.accounts))
+
+        self.datastore.store_many(self.index, [item.stored_item() for item in
+                                               changes.created + changes.deleted + changeset])
+
+        self.datastore.record_partition_results(self.index, changes.partitions, changes.failures)
 
     def plural_name(self):
         """
@@ -387,7 +663,8 @@ class ChangeItem(object):
     Object tracks two different revisions of a given item.
     """
 
-    def __init__(self, index=None, region=None, account=None, name=None, old_config={}, new_config={}, active=False, audit_issues=None):
+    def __init__(self, index=None, region=None, account=None, name=None, old_config={}, new_config={}, active=False, audit_issues=None,
+                 revision_id=None, config_hash=None):
         self.index = index
         self.region = region
         self.account = account
@@ -401,6 +678,9 @@ class ChangeItem(object):
         self.confirmed_existing_issues = []
         self.confirmed_disabled_issues = []
         self.found_new_issue = False
+        # Set on items read back from the database.
+        self.revision_id = revision_id
+        self.config_hash = config_hash
 
     @classmethod
     def from_items(cls, old_item=None, new_item=None):
@@ -467,3 +747,10 @@ class ChangeItem(object):
         """
         app.logger.debug("Saving {}/{}/{}/{}\n\t{}".format(self.index, self.account, self.region, self.name, self.new_config))
         datastore.store(self.index, self.region, self.account, self.name, self.active, self.new_config, new_issues=self.audit_issues)
+
+    def stored_item(self):
+        """
+        :return: the StoredItem to save this item with Datastore.store_many.
+        """
+        return datastore.StoredItem(self.region, self.account, self.name, self.active,
+                                    self.new_config, self.audit_issues)
@@ -25,17 +25,18 @@ from security_monkey.watcher import ChangeItem
 from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.inventory import inventory
 from security_monkey import app
 
 import json
 import boto
-from boto.ec2 import regions
 
 
 class EC2(Watcher):
     index = 'ec2'
     i_am_singular = 'EC2 Instance'
     i_am_plural = 'EC2 Instances'
+    region_service = 'ec2'
 
     def __init__(self, accounts=None, debug=False):
         super(EC2, self).__init__(accounts=accounts, debug=debug)
@@ -48,53 +49,50 @@ class EC2(Watcher):
 
         """
         self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
+    def slurp_partition(self, account, region, exception_map):
         item_list = []
-        exception_map = {}
-        from security_monkey.common.sts_connect import connect
-        for account in self.accounts:
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(EC2.index, account, region.name))
-                try:
-                    ec2 = connect(account, 'ec2', region=region)
-                    all_instances = self.wrap_aws_rate_limited_call(
-                        ec2.get_only_instances
-                    )
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'ec2', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-                app.logger.debug("Found {} {}".format(len(all_instances), EC2.i_am_plural))
-                for instance in all_instances:
-                    # A list of properties, in order of priority, to try and use as the name
-                    names = [instance.tags.get('Name'),
-                             instance.private_dns_name,
-                             instance.id]
-                    for name in names:
-                        if name:
-                            break
-
-                    if self.check_ignore_list(name):
-                        continue
-
-                    # Dont try to track pending, rebooting, terminated, etc, instances as they are missing attributes
-                    if instance.state not in ['running', 'stopped']:
-                        continue
-
-                    groups = [{'id': group.id, 'name': group.name} for group in instance.groups]
-                    instance_info = {'tags': dict(instance.tags),
-                                     'type': instance.instance_type,
-                                     'vpc_id': instance.vpc_id,
-                                     'subnet_id': instance.subnet_id,
-                                     'security_groups': groups,
-                                     'id': instance.id,
-                                     'dns_name': instance.private_dns_name}
-
-                    item = EC2Item(region=region.name, account=account, name=name,
-                                   config=instance_info)
-                    item_list.append(item)
-        return item_list, exception_map
+        app.logger.debug("Checking {}/{}/{}".format(EC2.index, account, region.name))
+        try:
+            all_instances = inventory.get(account, region, 'instances')
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), 'ec2', account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+        app.logger.debug("Found {} {}".format(len(all_instances), EC2.i_am_plural))
+        for instance in all_instances:
+            # A list of properties, in order of priority, to try and use as the name
+            names = [instance.tags.get('Name'),
+                     instance.private_dns_name,
+                     instance.id]
+            for name in names:
+                if name:
+                    break
+
+            if self.check_ignore_list(name):
+                continue
+
+            # Dont try to track pending, rebooting, terminated, etc, instances as they are missing attributes
+            if instance.state not in ['running', 'stopped']:
+                continue
+
+            groups = [{'id': group.id, 'name': group.name} for group in instance.groups]
+            instance_info = {'tags': dict(instance.tags),
+                             'type': instance.instance_type,
+                             'vpc_id': instance.vpc_id,
+                             'subnet_id': instance.subnet_id,
+                             'security_groups': groups,
+                             'id': instance.id,
+                             'dns_name': instance.private_dns_name}
+
+            item = EC2Item(region=region.name, account=account, name=name,
+                           config=instance_info)
+            item_list.append(item)
+        return item_list
 
 
 class EC2Item(ChangeItem):
@@ -24,31 +24,15 @@ from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.iam_details import get_authorization_details
+from security_monkey.common.iam_details import get_policy_attachments
+from security_monkey.common.iam_details import managed_policies_for
 from security_monkey import app
 
 import json
 import urllib
 
 
-def all_managed_policies(conn):
-    managed_policies = {}
-
-    for policy in conn.policies.all():
-        for attached_group in policy.attached_groups.all():
-            policy_dict = {
-                "name": policy.policy_name,
-                "arn": policy.arn,
-                "version": policy.default_version_id
-            }
-
-            if attached_group.arn not in managed_policies:
-                managed_policies[attached_group.arn] = [policy_dict]
-            else:
-                managed_policies[attached_group.arn].append(policy_dict)
-
-    return managed_policies
-
-
 class IAMGroup(Watcher):
     index = 'iamgroup'
     i_am_singular = 'IAM Group'
@@ -113,6 +97,21 @@ class IAMGroup(Watcher):
 
         return all_group_users
 
+    def inline_policies_for_group(self, iam, group_name, account, exception_map):
+        policies = {}
+        for policy_name in self.get_all_group_policies(iam, group_name):
+            policy = self.wrap_aws_rate_limited_call(iam.get_group_policy, group_name, policy_name)
+            policy = policy.policy_document
+            policy = urllib.unquote(policy)
+            try:
+                policydict = json.loads(policy)
+            except:
+                exc = InvalidAWSJSON(policy)
+                self.slurp_exception((self.index, account, 'universal', group_name), exc, exception_map)
+
+            policies[policy_name] = dict(policydict)
+        return policies
+
     def slurp(self):
         """
         :returns: item_list - list of IAM Groups.
@@ -123,12 +122,16 @@ class IAMGroup(Watcher):
         item_list = []
         exception_map = {}
 
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         for account in self.accounts:
-
             try:
-                iam_b3 = connect(account, 'iam_boto3')
-                managed_policies = all_managed_policies(iam_b3)
+                # Inline policies, managed policies and members come from
+                # GetAccountAuthorizationDetails when possible.  Groups missing
+                # from it are fetched per call.
+                details = get_authorization_details(account)
+                if details is None:
+                    # Managed policies then come from the attachment index shared by the IAM watchers.
+                    get_policy_attachments(account)
 
                 iam = connect(account, 'iam')
                 groups = self.get_all_groups(iam)
@@ -149,28 +152,26 @@ class IAMGroup(Watcher):
                     'users': {}
                 }
 
-                if managed_policies.has_key(group.arn):
-                    item_config['managed_policies'] = managed_policies.get(group.arn)
+                try:
+                    group_managed_policies = managed_policies_for(account, details, group.arn)
+                except Exception as e:
+                    exc = BotoConnectionIssue(str(e), 'iamgroup', account, None)
+                    self.slurp_exception((self.index, account, 'universal', group.group_name), exc, exception_map)
+                    continue
+                if group_managed_policies:
+                    item_config['managed_policies'] = group_managed_policies
 
                 ### GROUP POLICIES ###
-                group_policies = self.get_all_group_policies(iam, group.group_name)
-
-                for policy_name in group_policies:
-                    policy = self.wrap_aws_rate_limited_call(iam.get_group_policy, group.group_name, policy_name)
-                    policy = policy.policy_document
-                    policy = urllib.unquote(policy)
-                    try:
-                        policydict = json.loads(policy)
-                    except:
-                        exc = InvalidAWSJSON(policy)
-                        self.slurp_exception((self.index, account, 'universal', group.group_name), exc, exception_map)
-
-                    item_config['grouppolicies'][policy_name] = dict(policydict)
+                group_policies = details.inline_policies(group.arn) if details else None
+                if group_policies is None:
+                    group_policies = self.inline_policies_for_group(iam, group.group_name, account, exception_map)
+                item_config['grouppolicies'] = group_policies
 
                 ### GROUP USERS ###
-                group_users = self.get_all_group_users(iam, group['group_name'])
-                for user in group_users:
-                    item_config['users'][user.arn] = user.user_name
+                group_users = details.group_members(group.arn) if details else None
+                if group_users is None:
+                    group_users = {user.arn: user.user_name for user in self.get_all_group_users(iam, group['group_name'])}
+                item_config['users'] = group_users
 
                 item = IAMGroupItem(account=account, name=group.group_name, config=item_config)
                 item_list.append(item)
@@ -25,31 +25,15 @@ from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.exceptions import AWSRateLimitReached
 from boto.exception import BotoServerError
+from security_monkey.common.iam_details import get_authorization_details
+from security_monkey.common.iam_details import get_policy_attachments
+from security_monkey.common.iam_details import managed_policies_for
 from security_monkey import app
 
 import json
 import urllib
 
 
-def all_managed_policies(conn):
-    managed_policies = {}
-
-    for policy in conn.policies.all():
-        for attached_role in policy.attached_roles.all():
-            policy_dict = {
-                "name": policy.policy_name,
-                "arn": policy.arn,
-                "version": policy.default_version_id
-            }
-
-            if attached_role.arn not in managed_policies:
-                managed_policies[attached_role.arn] = [policy_dict]
-            else:
-                managed_policies[attached_role.arn].append(policy_dict)
-
-    return managed_policies
-
-
 class IAMRole(Watcher):
     index = 'iamrole'
     i_am_singular = 'IAM Role'
@@ -93,6 +77,20 @@ class IAMRole(Watcher):
 
         return all_policy_names
 
+    def inline_policies_for_role(self, iam, role):
+        policies = {}
+        for policy_name in self.policy_names_for_role(iam, role):
+            policy_response = self.wrap_aws_rate_limited_call(
+                iam.get_role_policy,
+                role.role_name,
+                policy_name
+            )
+            policy = policy_response.policy_document
+            policy = urllib.unquote(policy)
+            policy = json.loads(policy)
+            policies[policy_name] = policy
+        return policies
+
     def slurp(self):
         """
         :returns: item_list - list of IAM Roles.
@@ -103,11 +101,16 @@ class IAMRole(Watcher):
 
         item_list = []
         exception_map = {}
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         for account in self.accounts:
             try:
-                iam_b3 = connect(account, 'iam_boto3')
-                managed_policies = all_managed_policies(iam_b3)
+                # Inline policies, managed policies and instance profiles come from
+                # GetAccountAuthorizationDetails when possible.  Roles missing from it
+                # are fetched per call.
+                details = get_authorization_details(account)
+                if details is None:
+                    # Managed policies then come from the attachment index shared by the IAM watchers.
+                    get_policy_attachments(account)
 
                 iam = connect(account, 'iam')
                 all_roles = []
@@ -134,8 +137,14 @@ class IAMRole(Watcher):
                 if self.check_ignore_list(role.role_name):
                     continue
 
-                if managed_policies.has_key(role.arn):
-                    item_config['managed_policies'] = managed_policies.get(role.arn)
+                try:
+                    role_managed_policies = managed_policies_for(account, details, role.arn)
+                except Exception as e:
+                    exc = BotoConnectionIssue(str(e), 'iamrole', account, None)
+                    self.slurp_exception((self.index, account, 'universal', role.role_name), exc, exception_map)
+                    continue
+                if role_managed_policies:
+                    item_config['managed_policies'] = role_managed_policies
 
                 assume_role_policy_document = role.get('assume_role_policy_document', '')
                 assume_role_policy_document = urllib.unquote(assume_role_policy_document)
@@ -145,24 +154,20 @@ class IAMRole(Watcher):
                 del role['assume_role_policy_document']
                 item_config['role'] = dict(role)
 
-                instance_profiles = self.instance_profiles_for_role(iam, role)
+                instance_profiles = details.instance_profiles(role.arn) if details else None
+                if instance_profiles is None:
+                    instance_profiles = self.instance_profiles_for_role(iam, role)
+                    for instance_profile in instance_profiles:
+                        del instance_profile['roles']
                 if len(instance_profiles) > 0:
                     item_config['instance_profiles'] = []
                     for instance_profile in instance_profiles:
-                        del instance_profile['roles']
                         item_config['instance_profiles'].append(dict(instance_profile))
 
-                item_config['rolepolicies'] = {}
-                for policy_name in self.policy_names_for_role(iam, role):
-                    policy_response = self.wrap_aws_rate_limited_call(
-                        iam.get_role_policy,
-                        role.role_name,
-                        policy_name
-                    )
-                    policy = policy_response.policy_document
-                    policy = urllib.unquote(policy)
-                    policy = json.loads(policy)
-                    item_config['rolepolicies'][policy_name] = policy
+                role_policies = details.inline_policies(role.arn) if details else None
+                if role_policies is None:
+                    role_policies = self.inline_policies_for_role(iam, role)
+                item_config['rolepolicies'] = role_policies
 
                 item = IAMRoleItem(account=account, name=role.role_name, config=item_config)
                 item_list.append(item)
@@ -200,7 +200,7 @@ class IAMSSL(Watcher):
         return item_list, exception_map
 
     def get_all_certs_in_region(self, account, region, exception_map):
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         import traceback
         all_certs = []
         app.logger.debug("Checking {}/{}/{}".format(self.index, account, region))
@@ -24,31 +24,15 @@ from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import InvalidAWSJSON
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.iam_details import get_authorization_details
+from security_monkey.common.iam_details import get_policy_attachments
+from security_monkey.common.iam_details import managed_policies_for
 from security_monkey import app
 
 import json
 import urllib
 
 
-def all_managed_policies(conn):
-    managed_policies = {}
-
-    for policy in conn.policies.all():
-        for attached_user in policy.attached_users.all():
-            policy_dict = {
-                "name": policy.policy_name,
-                "arn": policy.arn,
-                "version": policy.default_version_id
-            }
-
-            if attached_user.arn not in managed_policies:
-                managed_policies[attached_user.arn] = [policy_dict]
-            else:
-                managed_policies[attached_user.arn].append(policy_dict)
-
-    return managed_policies
-
-
 class IAMUser(Watcher):
     index = 'iamuser'
     i_am_singular = 'IAM User'
@@ -123,6 +107,25 @@ class IAMUser(Watcher):
                 break
         return all_certificates
 
+    def inline_policies_for_user(self, conn, user, account, exception_map):
+        policies = {}
+        for policy_name in self.policy_names_for_user(conn, user):
+            policy_document = self.wrap_aws_rate_limited_call(
+                conn.get_user_policy,
+                user.user_name,
+                policy_name
+            )
+            policy_document = policy_document.policy_document
+            policy = urllib.unquote(policy_document)
+            try:
+                policydict = json.loads(policy)
+            except:
+                exc = InvalidAWSJSON(policy)
+                self.slurp_exception((self.index, account, 'universal', user.user_name), exc, exception_map)
+
+            policies[policy_name] = dict(policydict)
+        return policies
+
     def slurp(self):
         """
         :returns: item_list - list of IAM Groups.
@@ -133,13 +136,16 @@ class IAMUser(Watcher):
         item_list = []
         exception_map = {}
 
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         for account in self.accounts:
             all_users = []
-
             try:
-                iam_b3 = connect(account, 'iam_boto3')
-                managed_policies = all_managed_policies(iam_b3)
+                # Inline and managed policies come from GetAccountAuthorizationDetails
+                # when possible.  Users missing from it are fetched per call.
+                details = get_authorization_details(account)
+                if details is None:
+                    # Managed policies then come from the attachment index shared by the IAM watchers.
+                    get_policy_attachments(account)
 
                 iam = connect(account, 'iam')
                 marker = None
@@ -178,27 +184,20 @@ class IAMUser(Watcher):
                 app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, user.user_name, account))
                 item_config['user'] = dict(user)
 
-                if managed_policies.has_key(user.arn):
-                    item_config['managed_policies'] = managed_policies.get(user.arn)
+                try:
+                    user_managed_policies = managed_policies_for(account, details, user.arn)
+                except Exception as e:
+                    exc = BotoConnectionIssue(str(e), 'iamuser', account, None)
+                    self.slurp_exception((self.index, account, 'universal', user.user_name), exc, exception_map)
+                    continue
+                if user_managed_policies:
+                    item_config['managed_policies'] = user_managed_policies
 
                 ### USER POLICIES ###
-                policy_names = self.policy_names_for_user(iam, user)
-
-                for policy_name in policy_names:
-                    policy_document = self.wrap_aws_rate_limited_call(
-                        iam.get_user_policy,
-                        user.user_name,
-                        policy_name
-                    )
-                    policy_document = policy_document.policy_document
-                    policy = urllib.unquote(policy_document)
-                    try:
-                        policydict = json.loads(policy)
-                    except:
-                        exc = InvalidAWSJSON(policy)
-                        self.slurp_exception((self.index, account, 'universal', user.user_name), exc, exception_map)
-
-                    item_config['userpolicies'][policy_name] = dict(policydict)
+                user_policies = details.inline_policies(user.arn) if details else None
+                if user_policies is None:
+                    user_policies = self.inline_policies_for_user(iam, user, account, exception_map)
+                item_config['userpolicies'] = user_policies
 
                 ### ACCESS KEYS ###
                 access_keys = self.access_keys_for_user(iam, user)
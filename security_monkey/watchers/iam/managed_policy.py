@@ -23,6 +23,8 @@
 from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.iam_details import get_authorization_details
+from security_monkey.common.iam_details import policy_attachments_for
 from security_monkey import app
 
 
@@ -44,11 +46,15 @@ class ManagedPolicy(Watcher):
         item_list = []
         exception_map = {}
 
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         for account in self.accounts:
             all_policies = []
 
             try:
+                # Attachments and documents come from GetAccountAuthorizationDetails
+                # when possible.  Otherwise, attachments come from the attachment index
+                # shared by the IAM watchers and documents are fetched per call.
+                details = get_authorization_details(account)
                 iam = connect(account, 'iam_boto3')
 
                 for policy in iam.policies.all():
@@ -64,6 +70,17 @@ class ManagedPolicy(Watcher):
                 if self.check_ignore_list(policy.policy_name):
                     continue
 
+                try:
+                    attachments = policy_attachments_for(account, details, policy.arn)
+                except Exception as e:
+                    exc = BotoConnectionIssue(str(e), 'policy', account, None)
+                    self.slurp_exception((self.index, account, 'universal', policy.policy_name), exc, exception_map)
+                    continue
+
+                document = details.default_policy_document(policy.arn) if details else None
+                if document is None:
+                    document = policy.default_version.document
+
                 item_config = {
                     'name': policy.policy_name,
                     'arn': policy.arn,
@@ -71,10 +88,10 @@ class ManagedPolicy(Watcher):
                     'update_date': str(policy.update_date),
                     'default_version_id': policy.default_version_id,
                     'attachment_count': policy.attachment_count,
-                    'attached_users': [a.arn for a in policy.attached_users.all()],
-                    'attached_groups': [a.arn for a in policy.attached_groups.all()],
-                    'attached_roles': [a.arn for a in policy.attached_roles.all()],
-                    'policy': policy.default_version.document
+                    'attached_users': attachments['users'],
+                    'attached_groups': attachments['groups'],
+                    'attached_roles': attachments['roles'],
+                    'policy': document
                 }
 
                 app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, policy.policy_name, account))
@@ -31,6 +31,7 @@ class Keypair(Watcher):
     index = 'keypair'
     i_am_singular = 'Keypair'
     i_am_plural = 'Keypairs'
+    region_service = 'ec2'
 
     def __init__(self, accounts=None, debug=False):
         super(Keypair, self).__init__(accounts=accounts, debug=debug)
@@ -44,44 +45,37 @@ class Keypair(Watcher):
         """
         self.prep_for_slurp()
 
-        item_list = []
         exception_map = {}
-        from security_monkey.common.sts_connect import connect
-        for account in self.accounts:
-            try:
-                ec2 = connect(account, 'ec2')
-                regions = ec2.get_all_regions()
-            except Exception as e:  # EC2ResponseError
-                # Some Accounts don't subscribe to EC2 and will throw an exception here.
-                exc = BotoConnectionIssue(str(e), 'keypair', account, None)
-                self.slurp_exception((self.index, account), exc, exception_map)
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
+
+    def slurp_partition(self, account, region, exception_map):
+        item_list = []
+        from security_monkey.common.connection_registry import connect
+        app.logger.debug("Checking {}/{}/{}".format(Keypair.index, account, region.name))
+
+        try:
+            rec2 = connect(account, 'ec2', region=region)
+            kps = self.wrap_aws_rate_limited_call(
+                rec2.get_all_key_pairs
+            )
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), 'keypair', account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+
+        app.logger.debug("Found {} {}".format(len(kps), Keypair.i_am_plural))
+        for kp in kps:
+
+            if self.check_ignore_list(kp.name):
                 continue
 
-            for region in regions:
-                app.logger.debug("Checking {}/{}/{}".format(Keypair.index, account, region.name))
-
-                try:
-                    rec2 = connect(account, 'ec2', region=region)
-                    kps = self.wrap_aws_rate_limited_call(
-                        rec2.get_all_key_pairs
-                    )
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'keypair', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-
-                app.logger.debug("Found {} {}".format(len(kps), Keypair.i_am_plural))
-                for kp in kps:
-
-                    if self.check_ignore_list(kp.name):
-                        continue
-
-                    item_list.append(KeypairItem(region=region.name, account=account, name=kp.name,
-                                                 config={
-                                                     'fingerprint': kp.fingerprint
-                                                 }))
-        return item_list, exception_map
+            item_list.append(KeypairItem(region=region.name, account=account, name=kp.name,
+                                         config={
+                                             'fingerprint': kp.fingerprint
+                                         }))
+        return item_list
 
 
 class KeypairItem(ChangeItem):
@@ -25,13 +25,13 @@ from security_monkey.watcher import ChangeItem
 from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
-from boto.rds import regions
 
 
 class RDSSecurityGroup(Watcher):
     index = 'rds'
     i_am_singular = 'RDS Security Group'
     i_am_plural = 'RDS Security Groups'
+    region_service = 'rds'
 
     def __init__(self, accounts=None, debug=False):
         super(RDSSecurityGroup, self).__init__(accounts=accounts, debug=debug)
@@ -44,80 +44,80 @@ class RDSSecurityGroup(Watcher):
 
         """
         self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
+    def slurp_partition(self, account, region, exception_map):
         item_list = []
-        exception_map = {}
-        from security_monkey.common.sts_connect import connect
-        for account in self.accounts:
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
-
-                sgs = []
-                try:
-                    rds = connect(account, 'rds', region=region)
-
-                    marker = None
-                    while True:
-                        response = self.wrap_aws_rate_limited_call(
-                            rds.get_all_dbsecurity_groups,
-                            marker=marker
-                        )
-
-                        sgs.extend(response)
-                        if response.marker:
-                            marker = response.marker
-                        else:
-                            break
-
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-
-                app.logger.debug("Found {} {}".format(len(sgs), self.i_am_plural))
-                for sg in sgs:
-
-                    if self.check_ignore_list(sg.name):
-                        continue
-
-                    name = sg.name
-                    vpc_id = None
-                    if hasattr(sg, 'VpcId'):
-                        vpc_id = sg.VpcId
-                        name = "{} (in {})".format(sg.name, vpc_id)
-
-                    item_config = {
-                        "name": sg.name,
-                        "description": sg.description,
-                        "owner_id": sg.owner_id,
-                        "region": region.name,
-                        "ec2_groups": [],
-                        "ip_ranges": [],
-                        "vpc_id": vpc_id
-                    }
-
-                    for ipr in sg.ip_ranges:
-                        ipr_config = {
-                            "cidr_ip": ipr.cidr_ip,
-                            "status": ipr.status,
-                        }
-                        item_config["ip_ranges"].append(ipr_config)
-                    item_config["ip_ranges"] = sorted(item_config["ip_ranges"])
-
-                    for ec2_sg in sg.ec2_groups:
-                        ec2sg_config = {
-                            "name": ec2_sg.name,
-                            "owner_id": ec2_sg.owner_id,
-                            "Status": ec2_sg.Status,
-                        }
-                        item_config["ec2_groups"].append(ec2sg_config)
-                    item_config["ec2_groups"] = sorted(item_config["ec2_groups"])
-
-                    item = RDSSecurityGroupItem(region=region.name, account=account, name=name, config=item_config)
-                    item_list.append(item)
-
-        return item_list, exception_map
+        from security_monkey.common.connection_registry import connect
+        app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+
+        sgs = []
+        try:
+            rds = connect(account, 'rds', region=region)
+
+            marker = None
+            while True:
+                response = self.wrap_aws_rate_limited_call(
+                    rds.get_all_dbsecurity_groups,
+                    marker=marker
+                )
+
+                sgs.extend(response)
+                if response.marker:
+                    marker = response.marker
+                else:
+                    break
+
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+
+        app.logger.debug("Found {} {}".format(len(sgs), self.i_am_plural))
+        for sg in sgs:
+
+            if self.check_ignore_list(sg.name):
+                continue
+
+            name = sg.name
+            vpc_id = None
+            if hasattr(sg, 'VpcId'):
+                vpc_id = sg.VpcId
+                name = "{} (in {})".format(sg.name, vpc_id)
+
+            item_config = {
+                "name": sg.name,
+                "description": sg.description,
+                "owner_id": sg.owner_id,
+                "region": region.name,
+                "ec2_groups": [],
+                "ip_ranges": [],
+                "vpc_id": vpc_id
+            }
+
+            for ipr in sg.ip_ranges:
+                ipr_config = {
+                    "cidr_ip": ipr.cidr_ip,
+                    "status": ipr.status,
+                }
+                item_config["ip_ranges"].append(ipr_config)
+            item_config["ip_ranges"] = sorted(item_config["ip_ranges"])
+
+            for ec2_sg in sg.ec2_groups:
+                ec2sg_config = {
+                    "name": ec2_sg.name,
+                    "owner_id": ec2_sg.owner_id,
+                    "Status": ec2_sg.Status,
+                }
+                item_config["ec2_groups"].append(ec2sg_config)
+            item_config["ec2_groups"] = sorted(item_config["ec2_groups"])
+
+            item = RDSSecurityGroupItem(region=region.name, account=account, name=name, config=item_config)
+            item_list.append(item)
+        return item_list
 
 
 class RDSSecurityGroupItem(ChangeItem):
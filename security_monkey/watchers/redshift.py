@@ -24,15 +24,15 @@ from security_monkey.watcher import Watcher
 from security_monkey.watcher import ChangeItem
 from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import BotoConnectionIssue
+from security_monkey.common.inventory import inventory
 from security_monkey import app
 
-from boto.redshift import regions
-
 
 class Redshift(Watcher):
     index = 'redshift'
     i_am_singular = 'Redshift Cluster'
     i_am_plural = 'Redshift Clusters'
+    region_service = 'redshift'
 
     def __init__(self, accounts=None, debug=False):
         super(Redshift, self).__init__(accounts=accounts, debug=debug)
@@ -45,43 +45,29 @@ class Redshift(Watcher):
 
         """
         self.prep_for_slurp()
-        from security_monkey.common.sts_connect import connect
-        item_list = []
         exception_map = {}
-        for account in self.accounts:
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
-                try:
-                    redshift = connect(account, 'redshift', region=region)
-
-                    all_clusters = []
-                    marker = None
-                    while True:
-                        response = self.wrap_aws_rate_limited_call(
-                            redshift.describe_clusters,
-                            marker=marker
-                        )
-                        all_clusters.extend(response['DescribeClustersResponse']['DescribeClustersResult']['Clusters'])
-                        if response['DescribeClustersResponse']['DescribeClustersResult']['Marker'] is not None:
-                            marker = response['DescribeClustersResponse']['DescribeClustersResult']['Marker']
-                        else:
-                            break
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'redshift', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-                app.logger.debug("Found {} {}".format(len(all_clusters), Redshift.i_am_plural))
-                for cluster in all_clusters:
-                    cluster_id = cluster['ClusterIdentifier']
-                    if self.check_ignore_list(cluster_id):
-                        continue
-
-                    item = RedshiftCluster(region=region.name, account=account, name=cluster_id, config=dict(cluster))
-                    item_list.append(item)
+    def slurp_partition(self, account, region, exception_map):
+        item_list = []
+        app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+        try:
+            all_clusters = inventory.get(account, region, 'redshift_clusters')
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), 'redshift', account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+        app.logger.debug("Found {} {}".format(len(all_clusters), Redshift.i_am_plural))
+        for cluster in all_clusters:
+            cluster_id = cluster['ClusterIdentifier']
+            if self.check_ignore_list(cluster_id):
+                continue
 
-        return item_list, exception_map
+            item = RedshiftCluster(region=region.name, account=account, name=cluster_id, config=dict(cluster))
+            item_list.append(item)
+        return item_list
 
 
 class RedshiftCluster(ChangeItem):
@@ -25,9 +25,11 @@ from security_monkey.watcher import ChangeItem
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey.exceptions import S3PermissionsIssue
 from security_monkey.exceptions import S3ACLReturnedNoneDisplayName
+from security_monkey.common.concurrency import map_in_threads
 from security_monkey import app
 
 from boto.s3.connection import OrdinaryCallingFormat
+from boto.exception import S3ResponseError
 import boto
 import json
 
@@ -105,8 +107,11 @@ class S3(Watcher):
     region_mappings = dict(APNortheast='ap-northeast-1', APSoutheast='ap-southeast-1', APSoutheast2='ap-southeast-2',
                            DEFAULT='', EU='eu-west-1', SAEast='sa-east-1', USWest='us-west-1', USWest2='us-west-2')
 
+    bucket_workers = 10    # buckets read concurrently per account
+
     def __init__(self, accounts=None, debug=False):
         super(S3, self).__init__(accounts=accounts, debug=debug)
+        self.bucket_workers = app.config.get('S3_BUCKET_WORKERS', self.bucket_workers)
 
     def slurp(self):
         """
@@ -119,7 +124,7 @@ class S3(Watcher):
         item_list = []
         exception_map = {}
 
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         for account in self.accounts:
 
             try:
@@ -132,58 +137,117 @@ class S3(Watcher):
                 self.slurp_exception((self.index, account), exc, exception_map)
                 continue
 
-            for bucket in all_buckets:
-                app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, bucket.name, account))
+            buckets = [bucket for bucket in all_buckets if not self.check_ignore_list(bucket.name)]
+            buckets_by_region = self.group_buckets_by_region(account, buckets, exception_map)
 
-                if self.check_ignore_list(bucket.name):
-                    continue
+            work = []
+            for region, region_buckets in buckets_by_region.items():
+                # One shared connection per region serves every bucket in it.
+                if region == 'us-east-1':
+                    s3regionconn = connect(account, 's3', calling_format=OrdinaryCallingFormat())
+                else:
+                    s3regionconn = connect(account, 's3', region=region, calling_format=OrdinaryCallingFormat())
+                work.extend([(s3regionconn, region, bucket) for bucket in region_buckets])
 
-                try:
-                    loc = self.wrap_aws_rate_limited_call(bucket.get_location)
-                    region = self.translate_location_to_region(loc)
-                    if region == '':
-                        s3regionconn = self.wrap_aws_rate_limited_call(
-                            connect,
-                            account,
-                            's3',
-                            calling_format=OrdinaryCallingFormat()
-                        )
-                        region = 'us-east-1'
-                    else:
-                        s3regionconn = self.wrap_aws_rate_limited_call(
-                            connect,
-                            account,
-                            's3',
-                            region=region,
-                            calling_format=OrdinaryCallingFormat()
-                        )
-
-                    bhandle = self.wrap_aws_rate_limited_call(
-                        s3regionconn.get_bucket,
-                        bucket,
-                        validate=False
-                    )
-                    s3regionconn.close()
-                except Exception as e:
-                    exc = S3PermissionsIssue(bucket.name)
-                    # Unfortunately, we can't get the region, so the entire account
-                    # will be skipped in find_changes, not just the bad bucket.
-                    self.slurp_exception((self.index, account), exc, exception_map)
-                    continue
+            def slurp_bucket(args):
+                return self.slurp_bucket(account, *args)
+
+            for (item, bucket_exceptions) in map_in_threads(slurp_bucket, work, self.bucket_workers):
+                if item:
+                    item_list.append(item)
+                exception_map.update(bucket_exceptions)
+
+        return item_list, exception_map
+
+    def slurp_items(self, locations):
+        """
+        Reads just the given (account, region, name) buckets.  Buckets that
+        no longer exist are left out, so find_changes deletes them.
+        """
+        if any([name is None for (account, region, name) in locations]):
+            # Finding every bucket in a region means listing and locating them all anyway.
+            return super(S3, self).slurp_items(locations)
+
+        self.prep_for_slurp()
 
-                app.logger.debug("Slurping %s (%s) from %s/%s" % (self.i_am_singular, bucket.name, account, region))
-                try:
-                    bucket_dict = self.conv_bucket_to_dict(bhandle, account, region, bucket.name, exception_map)
-                except Exception as e:
-                    exc = S3PermissionsIssue(bucket.name)
-                    self.slurp_exception((self.index, account, region, bucket.name), exc, exception_map)
+        item_list = []
+        exception_map = {}
+
+        from security_monkey.common.connection_registry import connect
+        for (account, region, name) in locations:
+            if self.check_ignore_list(name):
+                continue
+            try:
+                if region == 'us-east-1':
+                    s3regionconn = connect(account, 's3', calling_format=OrdinaryCallingFormat())
+                else:
+                    s3regionconn = connect(account, 's3', region=region, calling_format=OrdinaryCallingFormat())
+                bucket = self.wrap_aws_rate_limited_call(s3regionconn.get_bucket, name)
+            except Exception as e:
+                if isinstance(e, S3ResponseError) and e.status == 404:
                     continue
+                exc = BotoConnectionIssue(str(e), 's3', account, region)
+                self.slurp_exception((self.index, account, region, name), exc, exception_map)
+                continue
 
-                item = S3Item(account=account, region=region, name=bucket.name, config=bucket_dict)
+            item, bucket_exceptions = self.slurp_bucket(account, s3regionconn, region, bucket)
+            if item:
                 item_list.append(item)
+            exception_map.update(bucket_exceptions)
 
         return item_list, exception_map
 
+    def group_buckets_by_region(self, account, buckets, exception_map):
+        """
+        Resolves the location of every bucket, bucket_workers at a time.
+        :returns: dict of {region: [bucket, ...]}
+        """
+        def locate(bucket):
+            app.logger.debug("Slurping %s (%s) from %s" % (self.i_am_singular, bucket.name, account))
+            try:
+                loc = self.wrap_aws_rate_limited_call(bucket.get_location)
+            except Exception as e:
+                return bucket, None, e
+            return bucket, self.translate_location_to_region(loc) or 'us-east-1', None
+
+        buckets_by_region = {}
+        for (bucket, region, e) in map_in_threads(locate, buckets, self.bucket_workers):
+            if e is not None:
+                exc = S3PermissionsIssue(bucket.name)
+                # Unfortunately, we can't get the region, so the entire account
+                # will be skipped in find_changes, not just the bad bucket.
+                self.slurp_exception((self.index, account), exc, exception_map)
+                continue
+            buckets_by_region.setdefault(region, []).append(bucket)
+        return buckets_by_region
+
+    def slurp_bucket(self, account, s3regionconn, region, bucket):
+        """
+        Reads the ACL, policy, versioning, lifecycle and logging of a single bucket.
+        :returns: (S3Item or None, dict of exceptions for this bucket)
+        """
+        bucket_exceptions = {}
+        app.logger.debug("Slurping %s (%s) from %s/%s" % (self.i_am_singular, bucket.name, account, region))
+        try:
+            bhandle = self.wrap_aws_rate_limited_call(
+                s3regionconn.get_bucket,
+                bucket,
+                validate=False
+            )
+        except Exception:
+            exc = S3PermissionsIssue(bucket.name)
+            self.slurp_exception((self.index, account), exc, bucket_exceptions)
+            return None, bucket_exceptions
+
+        try:
+            bucket_dict = self.conv_bucket_to_dict(bhandle, account, region, bucket.name, bucket_exceptions)
+        except Exception:
+            exc = S3PermissionsIssue(bucket.name)
+            self.slurp_exception((self.index, account, region, bucket.name), exc, bucket_exceptions)
+            return None, bucket_exceptions
+
+        return S3Item(account=account, region=region, name=bucket.name, config=bucket_dict), bucket_exceptions
+
     def translate_location_to_region(self, location):
         if location in self.region_mappings:
             return self.region_mappings[location]
@@ -26,13 +26,12 @@ from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
-from boto.ses import regions
-
 
 class SES(Watcher):
     index = 'ses'
     i_am_singular = 'SES Identity'
     i_am_plural = 'SES Identities'
+    region_service = 'ses'
 
     def __init__(self, accounts=None, debug=False):
         super(SES, self).__init__(accounts=accounts, debug=debug)
@@ -45,47 +44,49 @@ class SES(Watcher):
 
         """
         self.prep_for_slurp()
-        from security_monkey.common.sts_connect import connect
-        item_list = []
         exception_map = {}
-        for account in self.accounts:
-            for region in regions():
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
-                if region.name == 'eu-central-1':
-                    # as of boto 2.34.0, boto cannot connect to ses in eu-central-1
-                    # TODO: Remove this if-block when boto can handle ses in eu-central-1
-                    continue
+    def regional_partitions(self, exception_map):
+        # as of boto 2.34.0, boto cannot connect to ses in eu-central-1
+        # TODO: Remove this filter when boto can handle ses in eu-central-1
+        partitions = super(SES, self).regional_partitions(exception_map)
+        return [(account, region) for (account, region) in partitions if region.name != 'eu-central-1']
+
+    def slurp_partition(self, account, region, exception_map):
+        item_list = []
+        from security_monkey.common.connection_registry import connect
+        app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+        try:
+            ses = connect(account, 'ses', region=region.name)
+            response = self.wrap_aws_rate_limited_call(
+                ses.list_identities
+            )
+            identities = response.Identities
+            response = self.wrap_aws_rate_limited_call(
+                ses.list_verified_email_addresses
+            )
+            verified_identities = response.VerifiedEmailAddresses
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+        app.logger.debug("Found {} {}. {} are verified.".format(len(identities), self.i_am_plural, len(verified_identities)))
+        for identity in identities:
+            if self.check_ignore_list(identity):
+                continue
 
-                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
-                try:
-                    ses = connect(account, 'ses', region=region.name)
-                    response = self.wrap_aws_rate_limited_call(
-                        ses.list_identities
-                    )
-                    identities = response.Identities
-                    response = self.wrap_aws_rate_limited_call(
-                        ses.list_verified_email_addresses
-                    )
-                    verified_identities = response.VerifiedEmailAddresses
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-                app.logger.debug("Found {} {}. {} are verified.".format(len(identities), self.i_am_plural, len(verified_identities)))
-                for identity in identities:
-                    if self.check_ignore_list(identity):
-                        continue
-                    
-                    config = {
-                        'name': identity,
-                        'verified': identity in verified_identities
-                    }
+            config = {
+                'name': identity,
+                'verified': identity in verified_identities
+            }
 
-                    item = SESItem(region=region.name, account=account, name=identity, config=dict(config))
-                    item_list.append(item)
+            item = SESItem(region=region.name, account=account, name=identity, config=dict(config))
+            item_list.append(item)
 
-        return item_list, exception_map
+        return item_list
 
 
 class SESItem(ChangeItem):
@@ -30,13 +30,13 @@ from security_monkey import app
 
 import json
 import re
-from boto.sns import regions
 
 
 class SNS(Watcher):
     index = 'sns'
     i_am_singular = 'SNS Topic Policy'
     i_am_plural = 'SNS Topic Policies'
+    region_service = 'sns'
 
     def __init__(self, accounts=None, debug=False):
         super(SNS, self).__init__(accounts=accounts, debug=debug)
@@ -49,37 +49,38 @@ class SNS(Watcher):
 
         """
         self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
+    def slurp_partition(self, account, region, exception_map):
         item_list = []
-        exception_map = {}
-        for account in self.accounts:
-            for region in regions():
-                try:
-                    (sns, topics) = self.get_all_topics_in_region(account, region)
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'sns', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-
-                app.logger.debug("Found {} {}".format(len(topics), SNS.i_am_plural))
-                for topic in topics:
-                    arn = topic['TopicArn']
-
-                    if self.check_ignore_list(arn):
-                        continue
-
-                    item = self.build_item(arn=arn,
-                                           conn=sns,
-                                           region=region.name,
-                                           account=account,
-                                           exception_map=exception_map)
-                    if item:
-                        item_list.append(item)
-        return item_list, exception_map
+        try:
+            (sns, topics) = self.get_all_topics_in_region(account, region)
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), 'sns', account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+
+        app.logger.debug("Found {} {}".format(len(topics), SNS.i_am_plural))
+        for topic in topics:
+            arn = topic['TopicArn']
+
+            if self.check_ignore_list(arn):
+                continue
+
+            item = self.build_item(arn=arn,
+                                   conn=sns,
+                                   region=region.name,
+                                   account=account,
+                                   exception_map=exception_map)
+            if item:
+                item_list.append(item)
+        return item_list
 
     def get_all_topics_in_region(self, account, region):
-        from security_monkey.common.sts_connect import connect
+        from security_monkey.common.connection_registry import connect
         sns = connect(account, 'sns', region=region)
         app.logger.debug("Checking {}/{}/{}".format(SNS.index, account, region.name))
         topics = []
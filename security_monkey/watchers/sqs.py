@@ -29,13 +29,13 @@ from security_monkey import app
 
 import json
 import boto
-from boto.sqs import regions
 
 
 class SQS(Watcher):
     index = 'sqs'
     i_am_singular = 'SQS Policy'
     i_am_plural = 'SQS Policies'
+    region_service = 'sqs'
 
     def __init__(self, accounts=None, debug=False):
         super(SQS, self).__init__(accounts=accounts, debug=debug)
@@ -48,48 +48,49 @@ class SQS(Watcher):
 
         """
         self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
+    def slurp_partition(self, account, region, exception_map):
         item_list = []
-        exception_map = {}
-        from security_monkey.common.sts_connect import connect
-        for account in self.accounts:
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(SQS.index, account, region.name))
-                try:
-                    sqs = connect(account, 'sqs', region=region)
-                    all_queues = self.wrap_aws_rate_limited_call(
-                        sqs.get_all_queues
-                    )
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), 'sqs', account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-                app.logger.debug("Found {} {}".format(len(all_queues), SQS.i_am_plural))
-                for q in all_queues:
+        from security_monkey.common.connection_registry import connect
+        app.logger.debug("Checking {}/{}/{}".format(SQS.index, account, region.name))
+        try:
+            sqs = connect(account, 'sqs', region=region)
+            all_queues = self.wrap_aws_rate_limited_call(
+                sqs.get_all_queues
+            )
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), 'sqs', account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+        app.logger.debug("Found {} {}".format(len(all_queues), SQS.i_am_plural))
+        for q in all_queues:
 
-                    if self.check_ignore_list(q.name):
-                        continue
+            if self.check_ignore_list(q.name):
+                continue
 
+            try:
+                policy = self.wrap_aws_rate_limited_call(
+                    q.get_attributes,
+                    attributes='Policy'
+                )
+                if 'Policy' in policy:
                     try:
-                        policy = self.wrap_aws_rate_limited_call(
-                            q.get_attributes,
-                            attributes='Policy'
-                        )
-                        if 'Policy' in policy:
-                            try:
-                                json_str = policy['Policy']
-                                policy = json.loads(json_str)
-                                item = SQSItem(region=region.name, account=account, name=q.name,
-                                               config=policy)
-                                item_list.append(item)
-                            except:
-                                self.slurp_exception((self.index, account, region, q.name), InvalidAWSJSON(json_str), exception_map)
-                    except boto.exception.SQSError:
-                        # A number of Queues are so ephemeral that they may be gone by the time
-                        # the code reaches here.  Just ignore them and move on.
-                        pass
-        return item_list, exception_map
+                        json_str = policy['Policy']
+                        policy = json.loads(json_str)
+                        item = SQSItem(region=region.name, account=account, name=q.name,
+                                       config=policy)
+                        item_list.append(item)
+                    except:
+                        self.slurp_exception((self.index, account, region.name, q.name), InvalidAWSJSON(json_str), exception_map)
+            except boto.exception.SQSError:
+                # A number of Queues are so ephemeral that they may be gone by the time
+                # the code reaches here.  Just ignore them and move on.
+                pass
+        return item_list
 
 
 class SQSItem(ChangeItem):
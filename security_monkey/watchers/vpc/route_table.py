@@ -26,13 +26,12 @@ from security_monkey.constants import TROUBLE_REGIONS
 from security_monkey.exceptions import BotoConnectionIssue
 from security_monkey import app
 
-from boto.vpc import regions
-
 
 class RouteTable(Watcher):
     index = 'routetable'
     i_am_singular = 'Route Table'
     i_am_plural = 'Route Tables'
+    region_service = 'vpc'
 
     def __init__(self, accounts=None, debug=False):
         super(RouteTable, self).__init__(accounts=accounts, debug=debug)
@@ -45,68 +44,68 @@ class RouteTable(Watcher):
 
         """
         self.prep_for_slurp()
+        exception_map = {}
+        partitions = self.regional_partitions(exception_map)
+        return self.slurp_partitions(partitions, exception_map)
 
+    def slurp_partition(self, account, region, exception_map):
         item_list = []
-        exception_map = {}
-        from security_monkey.common.sts_connect import connect
-        for account in self.accounts:
-            for region in regions():
-                app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
-                try:
-                    conn = connect(account, 'vpc', region=region)
-                    all_route_tables = self.wrap_aws_rate_limited_call(
-                        conn.get_all_route_tables
-                    )
-                except Exception as e:
-                    if region.name not in TROUBLE_REGIONS:
-                        exc = BotoConnectionIssue(str(e), self.index, account, region.name)
-                        self.slurp_exception((self.index, account, region.name), exc, exception_map)
-                    continue
-                app.logger.debug("Found {} {}".format(len(all_route_tables), self.i_am_plural))
-
-                for route_table in all_route_tables:
-
-                    subnet_name = route_table.tags.get(u'Name', None)
-                    if subnet_name:
-                        subnet_name = "{0} ({1})".format(subnet_name, route_table.id)
-                    else:
-                        subnet_name = route_table.id
-
-                    if self.check_ignore_list(subnet_name):
-                        continue
-
-                    routes = []
-                    for boto_route in route_table.routes:
-                        routes.append({
-                            "destination_cidr_block": boto_route.destination_cidr_block,
-                            "gateway_id": boto_route.gateway_id,
-                            "instance_id": boto_route.instance_id,
-                            "interface_id": boto_route.interface_id,
-                            "state": boto_route.state,
-                            "vpc_peering_connection_id": boto_route.vpc_peering_connection_id
-                        })
-
-                    associations = []
-                    for boto_association in route_table.associations:
-                        associations.append({
-                            "id": boto_association.id,
-                            "main": boto_association.main,
-                            "subnet_id": boto_association.subnet_id
-                        })
-
-                    config = {
-                        "name": route_table.tags.get(u'Name', None),
-                        "id": route_table.id,
-                        "routes": routes,
-                        "tags": dict(route_table.tags),
-                        "vpc_id": route_table.vpc_id,
-                        "associations": associations
-                    }
-
-                    item = RouteTableItem(region=region.name, account=account, name=subnet_name, config=config)
-                    item_list.append(item)
-
-        return item_list, exception_map
+        from security_monkey.common.connection_registry import connect
+        app.logger.debug("Checking {}/{}/{}".format(self.index, account, region.name))
+        try:
+            conn = connect(account, 'vpc', region=region)
+            all_route_tables = self.wrap_aws_rate_limited_call(
+                conn.get_all_route_tables
+            )
+        except Exception as e:
+            if region.name not in TROUBLE_REGIONS:
+                exc = BotoConnectionIssue(str(e), self.index, account, region.name)
+                self.slurp_exception((self.index, account, region.name), exc, exception_map)
+            return item_list
+        app.logger.debug("Found {} {}".format(len(all_route_tables), self.i_am_plural))
+
+        for route_table in all_route_tables:
+
+            subnet_name = route_table.tags.get(u'Name', None)
+            if subnet_name:
+                subnet_name = "{0} ({1})".format(subnet_name, route_table.id)
+            else:
+                subnet_name = route_table.id
+
+            if self.check_ignore_list(subnet_name):
+                continue
+
+            routes = []
+            for boto_route in route_table.routes:
+                routes.append({
+                    "destination_cidr_block": boto_route.destination_cidr_block,
+                    "gateway_id": boto_route.gateway_id,
+                    "instance_id": boto_route.instance_id,
+                    "interface_id": boto_route.interface_id,
+                    "state": boto_route.state,
+                    "vpc_peering_connection_id": boto_route.vpc_peering_connection_id
+                })
+
+            associations = []
+            for boto_association in route_table.associations:
+                associations.append({
+                    "id": boto_association.id,
+                    "main": boto_association.main,
+                    "subnet_id": boto_association.subnet_id
+                })
+
+            config = {
+                "name": route_table.tags.get(u'Name', None),
+                "id": route_table.id,
+                "routes": routes,
+                "tags": dict(route_table.tags),
+                "vpc_id": route_table.vpc_id,
+                "associations": associations
+            }
+
+            item = RouteTableItem(region=region.name, account=account, name=subnet_name, config=config)
+            item_list.append(item)
+        return item_list
 
 
 class RouteTableItem(ChangeItem):